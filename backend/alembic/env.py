@@ -11,8 +11,8 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
 from app.database import Base
 from app.config import settings
 
-# Импортируем все модели, чтобы Alembic знал о них
-from app.models import user  # noqa
+# Импортируем все модели, чтобы их таблицы попали в метаданные
+from app import models  # noqa
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -69,6 +69,17 @@ def run_migrations_online() -> None:
     and associate a connection with the context.
 
     """
+    # Соединение может быть передано снаружи (например, из тестов)
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        context.configure(
+            connection=connection, target_metadata=target_metadata
+        )
+
+        with context.begin_transaction():
+            context.run_migrations()
+        return
+
     connectable = engine_from_config(
         config.get_section(config.config_ini_section, {}),
         prefix="sqlalchemy.",
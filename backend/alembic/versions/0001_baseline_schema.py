@@ -0,0 +1,146 @@
+"""baseline schema
+
+Исходная схема БД в том виде, в котором ее создавал Base.metadata.create_all.
+Для уже существующих баз достаточно выполнить `alembic stamp 0001`.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-16 23:55:40.030548
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('users',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('email', sa.String(), nullable=False),
+    sa.Column('full_name', sa.String(), nullable=False),
+    sa.Column('hashed_password', sa.String(), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.Column('is_verified', sa.Boolean(), nullable=True),
+    sa.Column('oauth_provider', sa.String(), nullable=True),
+    sa.Column('oauth_id', sa.String(), nullable=True),
+    sa.Column('phone_number', sa.String(), nullable=True),
+    sa.Column('date_of_birth', sa.Date(), nullable=True),
+    sa.Column('address', sa.String(), nullable=True),
+    sa.Column('tax_residence', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('reset_password_token', sa.String(), nullable=True),
+    sa.Column('reset_password_token_expires', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_users_email'), 'users', ['email'], unique=True)
+    op.create_index(op.f('ix_users_id'), 'users', ['id'], unique=False)
+    op.create_table('budget_categories',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('icon', sa.String(), nullable=True),
+    sa.Column('color', sa.String(), nullable=True),
+    sa.Column('category_type', sa.Enum('EXPENSE', 'INCOME', name='categorytypeenum'), nullable=False),
+    sa.Column('is_system', sa.Boolean(), nullable=True),
+    sa.Column('position', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_budget_categories_id'), 'budget_categories', ['id'], unique=False)
+    op.create_table('user_profiles',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('preferred_currency', sa.Enum('USD', 'EUR', 'RUB', 'KZT', 'GBP', name='currencyenum'), nullable=True),
+    sa.Column('preferred_language', sa.Enum('EN', 'RU', 'KZ', 'ES', 'DE', name='languageenum'), nullable=True),
+    sa.Column('email_notifications', sa.Boolean(), nullable=True),
+    sa.Column('push_notifications', sa.Boolean(), nullable=True),
+    sa.Column('transaction_alerts', sa.Boolean(), nullable=True),
+    sa.Column('subscription_type', sa.Enum('FREE', 'PREMIUM', 'BUSINESS', name='subscriptiontypeenum'), nullable=True),
+    sa.Column('subscription_expires', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id')
+    )
+    op.create_index(op.f('ix_user_profiles_id'), 'user_profiles', ['id'], unique=False)
+    op.create_table('financial_data',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('profile_id', sa.Integer(), nullable=False),
+    sa.Column('balance', sa.Float(), nullable=True),
+    sa.Column('savings', sa.Float(), nullable=True),
+    sa.Column('credit_score', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['profile_id'], ['user_profiles.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('profile_id')
+    )
+    op.create_index(op.f('ix_financial_data_id'), 'financial_data', ['id'], unique=False)
+    op.create_table('transactions',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('category_id', sa.Integer(), nullable=True),
+    sa.Column('amount', sa.Float(), nullable=False),
+    # Тип categorytypeenum уже создан вместе с budget_categories
+    sa.Column('transaction_type', postgresql.ENUM('EXPENSE', 'INCOME', name='categorytypeenum', create_type=False), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('transaction_date', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('payment_method', sa.Enum('CASH', 'CARD', name='paymentmethodenum'), nullable=True),
+    sa.Column('is_recurring', sa.Boolean(), nullable=True),
+    sa.Column('receipt_photo_url', sa.String(), nullable=True),
+    sa.Column('note', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['category_id'], ['budget_categories.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_transactions_id'), 'transactions', ['id'], unique=False)
+    op.create_table('bank_accounts',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('financial_data_id', sa.Integer(), nullable=False),
+    sa.Column('account_name', sa.String(), nullable=False),
+    sa.Column('account_number', sa.String(), nullable=False),
+    sa.Column('bank_name', sa.String(), nullable=False),
+    sa.Column('account_type', sa.String(), nullable=False),
+    sa.Column('is_primary', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['financial_data_id'], ['financial_data.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_bank_accounts_id'), 'bank_accounts', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_bank_accounts_id'), table_name='bank_accounts')
+    op.drop_table('bank_accounts')
+    op.drop_index(op.f('ix_transactions_id'), table_name='transactions')
+    op.drop_table('transactions')
+    op.drop_index(op.f('ix_financial_data_id'), table_name='financial_data')
+    op.drop_table('financial_data')
+    op.drop_index(op.f('ix_user_profiles_id'), table_name='user_profiles')
+    op.drop_table('user_profiles')
+    op.drop_index(op.f('ix_budget_categories_id'), table_name='budget_categories')
+    op.drop_table('budget_categories')
+    op.drop_index(op.f('ix_users_id'), table_name='users')
+    op.drop_index(op.f('ix_users_email'), table_name='users')
+    op.drop_table('users')
+
+    # PostgreSQL хранит перечисления как отдельные типы
+    for enum_name in ('paymentmethodenum', 'subscriptiontypeenum', 'languageenum', 'currencyenum', 'categorytypeenum'):
+        sa.Enum(name=enum_name).drop(op.get_bind(), checkfirst=True)
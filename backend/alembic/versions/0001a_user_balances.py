@@ -0,0 +1,58 @@
+"""user balances
+
+Таблица агрегированных балансов user_balances (см. BalanceService). Ее не
+было в схеме, которую создавал Base.metadata.create_all, поэтому она
+вынесена из 0001: базы, отмеченные `alembic stamp 0001`, получают ее здесь
+вместе с балансами, пересчитанными по транзакциям. В базах, где таблица
+уже создана прежней версией 0001, миграция ничего не делает.
+
+Revision ID: 0001a
+Revises: 0001
+Create Date: 2026-10-17 18:20:41.625310
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001a'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if 'user_balances' in sa.inspect(op.get_bind()).get_table_names():
+        return
+
+    op.create_table('user_balances',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('total_income', sa.Float(), nullable=False),
+    sa.Column('total_expense', sa.Float(), nullable=False),
+    sa.Column('transaction_count', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id')
+    )
+    op.create_index(op.f('ix_user_balances_id'), 'user_balances', ['id'], unique=False)
+
+    # Тот же пересчет, что BalanceService.rebuild (архива на этой ревизии еще нет)
+    op.execute("""
+        INSERT INTO user_balances (user_id, total_income, total_expense, transaction_count)
+        SELECT user_id,
+               COALESCE(SUM(CASE WHEN transaction_type = 'INCOME' THEN amount ELSE 0 END), 0),
+               COALESCE(SUM(CASE WHEN transaction_type = 'EXPENSE' THEN amount ELSE 0 END), 0),
+               COUNT(id)
+        FROM transactions
+        GROUP BY user_id
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_user_balances_id'), table_name='user_balances')
+    op.drop_table('user_balances')
@@ -0,0 +1,37 @@
+"""transaction composite indexes
+
+Составные индексы под запросы get_transactions и get_transactions_by_period:
+все они фильтруют по user_id и сортируют или ограничивают диапазон по дате.
+На PostgreSQL индексы строятся CONCURRENTLY, чтобы не блокировать запись
+в таблицу transactions на время миграции.
+
+Revision ID: 0002
+Revises: 0001a
+Create Date: 2026-10-16 23:55:57.764988
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY нельзя выполнять внутри транзакции
+    with op.get_context().autocommit_block():
+        op.create_index('ix_transactions_user_date_id', 'transactions', ['user_id', sa.text('transaction_date DESC'), sa.text('id DESC')], unique=False, postgresql_concurrently=True)
+        op.create_index('ix_transactions_user_type_date', 'transactions', ['user_id', 'transaction_type', 'transaction_date'], unique=False, postgresql_concurrently=True)
+        op.create_index('ix_transactions_user_category_date', 'transactions', ['user_id', 'category_id', 'transaction_date'], unique=False, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_transactions_user_category_date', table_name='transactions')
+    op.drop_index('ix_transactions_user_type_date', table_name='transactions')
+    op.drop_index('ix_transactions_user_date_id', table_name='transactions')
@@ -0,0 +1,51 @@
+"""transactions archive
+
+Таблица transactions_archive для старых транзакций (см. ArchiveService и
+scripts/archive_transactions.py). Колонки совпадают с transactions, из
+индексов только составной (user_id, transaction_date DESC, id DESC).
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 10:12:31.402118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('transactions_archive',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('category_id', sa.Integer(), nullable=True),
+    sa.Column('amount', sa.Float(), nullable=False),
+    # Типы перечислений уже созданы вместе с transactions
+    sa.Column('transaction_type', postgresql.ENUM('EXPENSE', 'INCOME', name='categorytypeenum', create_type=False), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('transaction_date', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('payment_method', postgresql.ENUM('CASH', 'CARD', name='paymentmethodenum', create_type=False), nullable=True),
+    sa.Column('is_recurring', sa.Boolean(), nullable=True),
+    sa.Column('receipt_photo_url', sa.String(), nullable=True),
+    sa.Column('note', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['category_id'], ['budget_categories.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_transactions_archive_user_date_id', 'transactions_archive', ['user_id', sa.text('transaction_date DESC'), sa.text('id DESC')], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_transactions_archive_user_date_id', table_name='transactions_archive')
+    op.drop_table('transactions_archive')
@@ -0,0 +1,78 @@
+"""money minor units
+
+Денежные колонки переводятся из FLOAT в BIGINT минорных единиц (см.
+app.utils.money): сумма умножается на 10^2 и округляется до ближайшего
+(половина — от нуля). Как и to_minor, пересчет идет через десятичное
+представление, а не двоичный float: 1.005 дает 101, а не 100. Показатель 2
+совпадает с MONEY_EXPONENT на момент миграции и зафиксирован здесь, чтобы
+миграция не зависела от кода приложения.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 11:40:05.118230
+
+"""
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SCALE = 100
+
+MONEY_COLUMNS = (
+    ('transactions', 'amount', False),
+    ('transactions_archive', 'amount', False),
+    ('user_balances', 'total_income', False),
+    ('user_balances', 'total_expense', False),
+    ('financial_data', 'balance', True),
+    ('financial_data', 'savings', True),
+)
+
+
+def to_minor(value: float) -> int:
+    """Минорные единицы, как app.utils.money.to_minor: float через str, половина — от нуля"""
+    return int((Decimal(str(value)) * SCALE).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    postgresql = bind.dialect.name == 'postgresql'
+    for table, column, nullable in MONEY_COLUMNS:
+        if postgresql:
+            # Пересчет и смена типа одной перезаписью таблицы; NUMERIC округляет
+            # половину от нуля по десятичной записи числа
+            op.alter_column(table, column, type_=sa.BigInteger(), existing_type=sa.Float(),
+                            existing_nullable=nullable,
+                            postgresql_using=f'round(CAST({column} AS NUMERIC) * {SCALE})::bigint')
+        else:
+            # В SQLite нет точного десятичного типа, поэтому значения
+            # пересчитываются в Python; затем таблица пересоздается с CAST
+            # к новому типу
+            rows = bind.execute(sa.text(f'SELECT rowid, {column} FROM {table} WHERE {column} IS NOT NULL')).all()
+            if rows:
+                bind.execute(sa.text(f'UPDATE {table} SET {column} = :value WHERE rowid = :rowid'),
+                             [{'rowid': rowid, 'value': to_minor(value)} for rowid, value in rows])
+            with op.batch_alter_table(table) as batch_op:
+                batch_op.alter_column(column, type_=sa.BigInteger(), existing_type=sa.Float(),
+                                      existing_nullable=nullable)
+
+
+def downgrade() -> None:
+    postgresql = op.get_bind().dialect.name == 'postgresql'
+    for table, column, nullable in MONEY_COLUMNS:
+        if postgresql:
+            op.alter_column(table, column, type_=sa.Float(), existing_type=sa.BigInteger(),
+                            existing_nullable=nullable, postgresql_using=f'{column}::double precision / {SCALE}')
+        else:
+            with op.batch_alter_table(table) as batch_op:
+                batch_op.alter_column(column, type_=sa.Float(), existing_type=sa.BigInteger(),
+                                      existing_nullable=nullable)
+            op.execute(f'UPDATE {table} SET {column} = {column} / {SCALE}.0')
@@ -1,6 +1,7 @@
 # app/api/v1/auth.py
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi.security import HTTPAuthorizationCredentials
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import get_db
 from app.schemas.auth import (
     LoginRequest,
@@ -12,8 +13,9 @@ from app.schemas.auth import (
 )
 from app.schemas.user import UserCreate, UserResponse
 from app.services.auth import AuthService
-from app.utils.dependencies import get_current_user
-from app.models.user import User
+from app.utils.dependencies import get_current_user, security
+from app.utils.security import SecurityUtils
+from app.utils.principal_cache import UserPrincipal
 
 router = APIRouter(
     prefix="/auth",
@@ -24,7 +26,7 @@ router = APIRouter(
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
 async def register(
     user_data: UserCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Регистрация нового пользователя"""
     user = await AuthService.register_user(user_data, db)
@@ -34,7 +36,7 @@ async def register(
 @router.post("/login", response_model=Token)
 async def login(
     login_data: LoginRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Вход пользователя"""
     token = await AuthService.login_user(
@@ -48,7 +50,7 @@ async def login(
 @router.post("/refresh", response_model=Token)
 async def refresh_token(
     token_data: RefreshTokenRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Обновление токенов"""
     token = await AuthService.refresh_token(token_data.refresh_token, db)
@@ -58,7 +60,7 @@ async def refresh_token(
 @router.post("/oauth/login", response_model=Token)
 async def oauth_login(
     oauth_data: OAuthLoginRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """OAuth вход/регистрация"""
     token = await AuthService.oauth_login(oauth_data, db)
@@ -67,18 +69,18 @@ async def oauth_login(
 
 @router.post("/logout")
 async def logout(
-    current_user: User = Depends(get_current_user)
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    current_user: UserPrincipal = Depends(get_current_user)
 ):
-    """Выход пользователя"""
-    # В простой реализации просто возвращаем успех
-    # В продакшене можно добавить blacklist токенов
+    """Выход пользователя: access-токен отзывается до своего истечения"""
+    SecurityUtils.revoke_token(credentials.credentials)
     return {"message": "Successfully logged out"}
 
 
 @router.post("/password-reset/request")
 async def request_password_reset(
     reset_data: PasswordResetRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Запрос на сброс пароля"""
     await AuthService.request_password_reset(reset_data.email, db)
@@ -88,7 +90,7 @@ async def request_password_reset(
 @router.post("/password-reset/confirm")
 async def reset_password(
     reset_data: PasswordResetConfirm,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Подтверждение сброса пароля"""
     await AuthService.reset_password(
@@ -1,6 +1,6 @@
 # app/api/v1/categories.py
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Dict
 from app.database import get_db
 from app.schemas.category import (
@@ -8,19 +8,20 @@ from app.schemas.category import (
 )
 from app.models.category import CategoryTypeEnum
 from app.services.category import CategoryService
-from app.utils.dependencies import get_current_active_user
-from app.models.user import User
+from app.utils.dependencies import etag_by_data_version, get_current_active_user
+from app.utils.principal_cache import UserPrincipal
 
 router = APIRouter(
     prefix="/categories",
-    tags=["Budget Categories"]
+    tags=["Budget Categories"],
+    dependencies=[Depends(etag_by_data_version)]
 )
 
 
 @router.get("/", response_model=Dict[str, List[CategoryResponse]])
 async def get_categories(
-        current_user: User = Depends(get_current_active_user),
-        db: Session = Depends(get_db)
+        current_user: UserPrincipal = Depends(get_current_active_user),
+        db: AsyncSession = Depends(get_db)
 ):
     """Получить все категории пользователя разделенные по типу"""
     categories = await CategoryService.get_categories(current_user.id, db)
@@ -29,8 +30,8 @@ async def get_categories(
 
 @router.get("/expense", response_model=List[CategoryResponse])
 async def get_expense_categories(
-        current_user: User = Depends(get_current_active_user),
-        db: Session = Depends(get_db)
+        current_user: UserPrincipal = Depends(get_current_active_user),
+        db: AsyncSession = Depends(get_db)
 ):
     """Получить все категории расходов пользователя"""
     categories = await CategoryService.get_categories_by_type(current_user.id, CategoryTypeEnum.EXPENSE, db)
@@ -39,8 +40,8 @@ async def get_expense_categories(
 
 @router.get("/income", response_model=List[CategoryResponse])
 async def get_income_categories(
-        current_user: User = Depends(get_current_active_user),
-        db: Session = Depends(get_db)
+        current_user: UserPrincipal = Depends(get_current_active_user),
+        db: AsyncSession = Depends(get_db)
 ):
     """Получить все категории доходов пользователя"""
     categories = await CategoryService.get_categories_by_type(current_user.id, CategoryTypeEnum.INCOME, db)
@@ -50,8 +51,8 @@ async def get_income_categories(
 @router.post("/", response_model=CategoryResponse, status_code=status.HTTP_201_CREATED)
 async def create_category(
         category_data: CategoryCreate,
-        current_user: User = Depends(get_current_active_user),
-        db: Session = Depends(get_db)
+        current_user: UserPrincipal = Depends(get_current_active_user),
+        db: AsyncSession = Depends(get_db)
 ):
     """Создать новую категорию"""
     category = await CategoryService.create_category(current_user.id, category_data, db)
@@ -60,8 +61,8 @@ async def create_category(
 
 @router.get("/system", response_model=SystemCategoriesResponse)
 async def get_system_categories(
-        current_user: User = Depends(get_current_active_user),
-        db: Session = Depends(get_db)
+        current_user: UserPrincipal = Depends(get_current_active_user),
+        db: AsyncSession = Depends(get_db)
 ):
     """Получить системные категории пользователя"""
     categories = await CategoryService.get_system_categories(current_user.id, db)
@@ -79,8 +80,8 @@ async def get_system_categories(
 @router.get("/{category_id}", response_model=CategoryResponse)
 async def get_category(
         category_id: int,
-        current_user: User = Depends(get_current_active_user),
-        db: Session = Depends(get_db)
+        current_user: UserPrincipal = Depends(get_current_active_user),
+        db: AsyncSession = Depends(get_db)
 ):
     """Получить категорию по ID"""
     category = await CategoryService.get_category(category_id, current_user.id, db)
@@ -97,8 +98,8 @@ async def get_category(
 async def update_category(
         category_id: int,
         category_data: CategoryUpdate,
-        current_user: User = Depends(get_current_active_user),
-        db: Session = Depends(get_db)
+        current_user: UserPrincipal = Depends(get_current_active_user),
+        db: AsyncSession = Depends(get_db)
 ):
     """Обновить категорию"""
     category = await CategoryService.update_category(
@@ -113,8 +114,8 @@ async def update_category(
 @router.delete("/{category_id}")
 async def delete_category(
         category_id: int,
-        current_user: User = Depends(get_current_active_user),
-        db: Session = Depends(get_db)
+        current_user: UserPrincipal = Depends(get_current_active_user),
+        db: AsyncSession = Depends(get_db)
 ):
     """Удалить категорию"""
     await CategoryService.delete_category(category_id, current_user.id, db)
@@ -0,0 +1,76 @@
+# app/api/v1/internal.py
+from fastapi import APIRouter, Depends
+from app.database import async_engine, primary_pool_metrics, replica_engines, replica_pool_metrics
+from app.utils.category_cache import category_cache
+from app.utils.dependencies import verify_internal_token
+from app.utils.principal_cache import principal_cache
+from app.utils.token_cache import token_cache
+
+router = APIRouter(
+    prefix="/internal",
+    tags=["Internal"],
+    dependencies=[Depends(verify_internal_token)]
+)
+
+
+@router.get("/db/pool")
+async def get_pool_metrics(reset: bool = False):
+    """
+    Состояние пулов соединений (основная БД и реплики) и накопленные счетчики.
+
+    checked_out/overflow — занятые соединения сейчас, peak_* — максимум с
+    момента сброса, checkout_wait — время получения соединения (гистограмма
+    в мс), timeouts — запросы, не дождавшиеся соединения. reset=true
+    сбрасывает накопленные счетчики после снятия значений.
+    """
+    engines = [(primary_pool_metrics, async_engine), *zip(replica_pool_metrics, replica_engines)]
+    pools = {
+        metrics.name: metrics.snapshot(pool_engine.sync_engine.pool)
+        for metrics, pool_engine in engines
+    }
+    if reset:
+        for metrics, _ in engines:
+            metrics.reset()
+
+    return {"pools": pools}
+
+
+@router.get("/auth/principal-cache")
+async def get_principal_cache_metrics(reset: bool = False):
+    """
+    Кэш принципалов get_current_user: бэкенд, попадания и промахи этого
+    воркера, сбросы. reset=true сбрасывает счетчики после снятия значений.
+    """
+    metrics = principal_cache.snapshot()
+    if reset:
+        principal_cache.reset()
+
+    return metrics
+
+
+@router.get("/auth/token-cache")
+async def get_token_cache_metrics(reset: bool = False):
+    """
+    Кэш проверенных JWT в этом воркере: размер, число отозванных токенов,
+    попадания, промахи, вытеснения и истечения. reset=true сбрасывает
+    счетчики после снятия значений.
+    """
+    metrics = token_cache.snapshot()
+    if reset:
+        token_cache.reset()
+
+    return metrics
+
+
+@router.get("/categories/cache")
+async def get_category_cache_metrics(reset: bool = False):
+    """
+    Кэш карт категорий в этом воркере: число пользователей, попадания,
+    промахи, вытеснения и сбросы версией. reset=true сбрасывает счетчики
+    после снятия значений.
+    """
+    metrics = category_cache.snapshot()
+    if reset:
+        category_cache.reset()
+
+    return metrics
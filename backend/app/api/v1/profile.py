@@ -1,6 +1,6 @@
 # app/api/v1/profile.py
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from datetime import datetime, timedelta
 from app.database import get_db
@@ -11,8 +11,8 @@ from app.schemas.profile import (
     FullProfileResponse
 )
 from app.services.profile import ProfileService
-from app.utils.dependencies import get_current_active_user
-from app.models.user import User
+from app.utils.dependencies import etag_by_data_version, get_current_active_user
+from app.utils.principal_cache import UserPrincipal
 from app.models.financial import SubscriptionTypeEnum
 
 router = APIRouter(
@@ -23,8 +23,8 @@ router = APIRouter(
 
 @router.get("/", response_model=ProfileWithFinancialData)
 async def get_profile(
-        current_user: User = Depends(get_current_active_user),
-        db: Session = Depends(get_db)
+        current_user: UserPrincipal = Depends(get_current_active_user),
+        db: AsyncSession = Depends(get_db)
 ):
     """Получить профиль текущего пользователя с финансовыми данными"""
     # Получаем профиль
@@ -40,8 +40,8 @@ async def get_profile(
 @router.put("/", response_model=ProfileResponse)
 async def update_profile(
         profile_data: ProfileUpdate,
-        current_user: User = Depends(get_current_active_user),
-        db: Session = Depends(get_db)
+        current_user: UserPrincipal = Depends(get_current_active_user),
+        db: AsyncSession = Depends(get_db)
 ):
     """Обновить профиль пользователя"""
     # Получаем профиль
@@ -59,8 +59,8 @@ async def update_profile(
 @router.post("/subscription/{subscription_type}", response_model=ProfileResponse)
 async def update_subscription(
         subscription_type: SubscriptionTypeEnum,
-        current_user: User = Depends(get_current_active_user),
-        db: Session = Depends(get_db)
+        current_user: UserPrincipal = Depends(get_current_active_user),
+        db: AsyncSession = Depends(get_db)
 ):
     """Обновить тип подписки пользователя"""
     # Вычисляем дату истечения подписки (например, месяц)
@@ -80,8 +80,8 @@ async def update_subscription(
 
 @router.get("/financial", response_model=FinancialDataResponse)
 async def get_financial_data(
-        current_user: User = Depends(get_current_active_user),
-        db: Session = Depends(get_db)
+        current_user: UserPrincipal = Depends(get_current_active_user),
+        db: AsyncSession = Depends(get_db)
 ):
     """Получить финансовые данные пользователя"""
     # Получаем профиль
@@ -108,8 +108,8 @@ async def get_financial_data(
 @router.put("/financial", response_model=FinancialDataResponse)
 async def update_financial_data(
         financial_data: FinancialDataUpdate,
-        current_user: User = Depends(get_current_active_user),
-        db: Session = Depends(get_db)
+        current_user: UserPrincipal = Depends(get_current_active_user),
+        db: AsyncSession = Depends(get_db)
 ):
     """Обновить финансовые данные пользователя"""
     # Получаем профиль
@@ -137,8 +137,8 @@ async def update_financial_data(
 
 @router.get("/accounts", response_model=List[BankAccountResponse])
 async def get_bank_accounts(
-        current_user: User = Depends(get_current_active_user),
-        db: Session = Depends(get_db)
+        current_user: UserPrincipal = Depends(get_current_active_user),
+        db: AsyncSession = Depends(get_db)
 ):
     """Получить список банковских счетов пользователя"""
     # Получаем профиль и финансовые данные
@@ -164,8 +164,8 @@ async def get_bank_accounts(
 @router.post("/accounts", response_model=BankAccountResponse, status_code=status.HTTP_201_CREATED)
 async def create_bank_account(
         account_data: BankAccountCreate,
-        current_user: User = Depends(get_current_active_user),
-        db: Session = Depends(get_db)
+        current_user: UserPrincipal = Depends(get_current_active_user),
+        db: AsyncSession = Depends(get_db)
 ):
     """Создать новый банковский счет"""
     # Получаем профиль и финансовые данные
@@ -192,8 +192,8 @@ async def create_bank_account(
 async def update_bank_account(
         account_id: int,
         account_data: BankAccountUpdate,
-        current_user: User = Depends(get_current_active_user),
-        db: Session = Depends(get_db)
+        current_user: UserPrincipal = Depends(get_current_active_user),
+        db: AsyncSession = Depends(get_db)
 ):
     """Обновить банковский счет"""
     # Получаем профиль и финансовые данные для проверки
@@ -229,8 +229,8 @@ async def update_bank_account(
 @router.delete("/accounts/{account_id}")
 async def delete_bank_account(
         account_id: int,
-        current_user: User = Depends(get_current_active_user),
-        db: Session = Depends(get_db)
+        current_user: UserPrincipal = Depends(get_current_active_user),
+        db: AsyncSession = Depends(get_db)
 ):
     """Удалить банковский счет"""
     # Получаем профиль и финансовые данные для проверки
@@ -263,10 +263,10 @@ async def delete_bank_account(
     return {"message": "Bank account successfully deleted"}
 
 
-@router.get("/full", response_model=FullProfileResponse)
+@router.get("/full", response_model=FullProfileResponse, dependencies=[Depends(etag_by_data_version)])
 async def get_full_profile(
-        current_user: User = Depends(get_current_active_user),
-        db: Session = Depends(get_db)
+        current_user: UserPrincipal = Depends(get_current_active_user),
+        db: AsyncSession = Depends(get_db)
 ):
     """Получить полный профиль пользователя с финансовыми данными и банковскими счетами"""
     # Получаем профиль
@@ -289,7 +289,7 @@ async def get_full_profile(
 
     # Соединяем все данные в одну модель
     full_profile = FullProfileResponse(
-        **profile.__dict__,
+        **ProfileResponse.model_validate(profile).model_dump(),
         financial_data=financial_data,
         bank_accounts=accounts
     )
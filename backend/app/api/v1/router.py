@@ -1,6 +1,6 @@
 # app/api/v1/router.py
 from fastapi import APIRouter
-from app.api.v1 import auth, users, profile, settings, categories, transactions
+from app.api.v1 import auth, users, profile, settings, categories, transactions, internal
 
 api_router = APIRouter()
 
@@ -10,4 +10,5 @@ api_router.include_router(users.router)
 api_router.include_router(profile.router)
 api_router.include_router(settings.router)
 api_router.include_router(categories.router)
-api_router.include_router(transactions.router)
\ No newline at end of file
+api_router.include_router(transactions.router)
+api_router.include_router(internal.router)
\ No newline at end of file
@@ -1,8 +1,8 @@
 # app/api/v1/settings.py
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import get_db
-from app.models.user import User
+from app.utils.principal_cache import UserPrincipal
 from app.models.financial import CurrencyEnum, LanguageEnum
 from app.utils.dependencies import get_current_active_user
 from app.services.profile import ProfileService
@@ -23,8 +23,8 @@ async def get_available_currencies():
 @router.put("/currency/{currency_code}")
 async def update_currency(
         currency_code: CurrencyEnum,
-        current_user: User = Depends(get_current_active_user),
-        db: Session = Depends(get_db)
+        current_user: UserPrincipal = Depends(get_current_active_user),
+        db: AsyncSession = Depends(get_db)
 ):
     """Обновить предпочитаемую валюту пользователя"""
     # Получаем профиль
@@ -48,8 +48,8 @@ async def get_available_languages():
 @router.put("/language/{language_code}")
 async def update_language(
         language_code: LanguageEnum,
-        current_user: User = Depends(get_current_active_user),
-        db: Session = Depends(get_db)
+        current_user: UserPrincipal = Depends(get_current_active_user),
+        db: AsyncSession = Depends(get_db)
 ):
     """Обновить предпочитаемый язык пользователя"""
     # Получаем профиль
@@ -69,8 +69,8 @@ async def update_notifications(
         email_notifications: bool = True,
         push_notifications: bool = True,
         transaction_alerts: bool = True,
-        current_user: User = Depends(get_current_active_user),
-        db: Session = Depends(get_db)
+        current_user: UserPrincipal = Depends(get_current_active_user),
+        db: AsyncSession = Depends(get_db)
 ):
     """Обновить настройки уведомлений"""
     # Получаем профиль
@@ -1,38 +1,120 @@
 # app/api/v1/transactions.py
 from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File, Form
-from sqlalchemy.orm import Session
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from typing import List, Optional
 from datetime import datetime, date
-from app.database import get_db
-from app.models.user import User
-from app.utils.dependencies import get_current_active_user
+from app.database import get_db, get_session_factory
+from app.utils.principal_cache import UserPrincipal
+from app.models.category import CategoryTypeEnum
+from app.utils.dependencies import etag_by_data_version, get_current_active_user
 from app.services.transaction import TransactionService
+from app.services.balance import BalanceService
 from app.schemas.transaction import (
-    TransactionCreate, TransactionUpdate, TransactionResponse,
-    TransactionWithCategory, TransactionFilters, TransactionListResponse
+    TransactionCreate, TransactionUpdate, TransactionResponse, TransactionBatchCreate, TransactionBatchResponse,
+    TransactionBulkSelection, TransactionBulkUpdate, TransactionBulkResult,
+    TransactionWithCategory, TransactionFilters, TransactionListResponse, BalanceResponse,
+    CategoryStatsResponse, TransactionSeriesResponse, TransactionSummary, GroupedTransactionsResponse,
+    TransactionSection
 )
+from app.services.pydantic_helpers import model_to_dict
+from app.utils.json_response import RawJSONResponse
 
 router = APIRouter(
     prefix="/transactions",
-    tags=["Transactions"]
+    tags=["Transactions"],
+    dependencies=[Depends(etag_by_data_version)]
 )
 
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+def _transaction_list_response(transactions: List[dict], summary: Optional[TransactionSummary],
+                               next_cursor: Optional[str]) -> RawJSONResponse:
+    """
+    Ответ в формате TransactionListResponse без повторной валидации.
+
+    Строки ленты уже собраны из колонок БД, поэтому сериализуются сразу
+    в JSON-байты; response_model у эндпоинтов остается для документации.
+    """
+    return RawJSONResponse({
+        "transactions": transactions,
+        "summary": model_to_dict(summary) if summary else None,
+        "next_cursor": next_cursor
+    })
+
 
 @router.post("/", response_model=TransactionResponse, status_code=status.HTTP_201_CREATED)
 async def create_transaction(
         transaction_data: TransactionCreate,
-        current_user: User = Depends(get_current_active_user),
-        db: Session = Depends(get_db)
+        current_user: UserPrincipal = Depends(get_current_active_user),
+        db: AsyncSession = Depends(get_db)
 ):
     """Создать новую транзакцию"""
     transaction = await TransactionService.create_transaction(current_user.id, transaction_data, db)
     return transaction
 
 
+@router.post("/batch", response_model=TransactionBatchResponse, status_code=status.HTTP_201_CREATED)
+async def create_transactions_batch(
+        batch: TransactionBatchCreate,
+        current_user: UserPrincipal = Depends(get_current_active_user),
+        db: AsyncSession = Depends(get_db)
+):
+    """
+    Создать пакет транзакций (офлайн-очередь, импорт).
+
+    mode=atomic: при ошибке в любом элементе не создается ничего (400 со
+    списком ошибок). mode=partial: создаются корректные элементы, для
+    остальных в results возвращается ошибка. Ошибки схемы (например,
+    неположительная сумма) отклоняют запрос целиком с кодом 422.
+    """
+    results = await TransactionService.create_transactions_batch(
+        current_user.id, batch.transactions, db, batch.mode
+    )
+    created = sum(1 for result in results if result["status"] == "created")
+    return RawJSONResponse({
+        "created": created,
+        "failed": len(results) - created,
+        "results": results
+    }, status_code=status.HTTP_201_CREATED)
+
+
+@router.post("/bulk-update", response_model=TransactionBulkResult)
+async def bulk_update_transactions(
+        bulk: TransactionBulkUpdate,
+        current_user: UserPrincipal = Depends(get_current_active_user),
+        db: AsyncSession = Depends(get_db)
+):
+    """
+    Массово изменить транзакции, выбранные по списку id и/или фильтрам.
+
+    Например, перенести все транзакции категории A за период в категорию B:
+    filters={category_ids: [A], start_date, end_date}, changes={category_id: B}.
+    """
+    affected = await TransactionService.bulk_update_transactions(current_user.id, bulk, db)
+    return TransactionBulkResult(affected=affected)
+
+
+@router.post("/bulk-delete", response_model=TransactionBulkResult)
+async def bulk_delete_transactions(
+        selection: TransactionBulkSelection,
+        current_user: UserPrincipal = Depends(get_current_active_user),
+        db: AsyncSession = Depends(get_db)
+):
+    """Массово удалить транзакции, выбранные по списку id и/или фильтрам"""
+    affected = await TransactionService.bulk_delete_transactions(current_user.id, selection, db)
+    return TransactionBulkResult(affected=affected)
+
+
 @router.get("/", response_model=TransactionListResponse)
 async def get_transactions(
-        skip: int = 0,
-        limit: int = 100,
+        skip: int = Query(0, ge=0),
+        limit: int = Query(100, ge=1, le=1000),
+        cursor: Optional[str] = None,
         start_date: Optional[date] = None,
         end_date: Optional[date] = None,
         transaction_type: Optional[str] = None,
@@ -40,10 +122,17 @@ async def get_transactions(
         min_amount: Optional[float] = None,
         max_amount: Optional[float] = None,
         payment_method: Optional[str] = None,
-        current_user: User = Depends(get_current_active_user),
-        db: Session = Depends(get_db)
+        include_summary: bool = True,
+        current_user: UserPrincipal = Depends(get_current_active_user),
+        db: AsyncSession = Depends(get_db)
 ):
-    """Получить список транзакций с фильтрацией"""
+    """
+    Получить список транзакций с фильтрацией.
+
+    Для постраничного обхода передавайте next_cursor из предыдущего ответа в cursor:
+    в отличие от skip, стоимость страницы не зависит от ее глубины.
+    Итоги считаются по тем же фильтрам; include_summary=false отключает их подсчет.
+    """
     filters = TransactionFilters(
         start_date=start_date,
         end_date=end_date,
@@ -54,61 +143,157 @@ async def get_transactions(
         payment_method=payment_method
     )
 
-    transactions, summary = await TransactionService.get_transactions(
-        current_user.id, filters, skip, limit, db
+    transactions, summary, next_cursor = await TransactionService.get_transactions(
+        current_user.id, filters, skip, limit, db, cursor=cursor, include_summary=include_summary
     )
 
-    return TransactionListResponse(
-        transactions=transactions,
-        summary=summary
-    )
+    return _transaction_list_response(transactions, summary, next_cursor)
 
 
 @router.get("/period/{period}", response_model=TransactionListResponse)
 async def get_transactions_by_period(
         period: str,
         date: Optional[date] = None,
-        current_user: User = Depends(get_current_active_user),
-        db: Session = Depends(get_db)
+        limit: int = Query(100, ge=1, le=1000),
+        cursor: Optional[str] = None,
+        current_user: UserPrincipal = Depends(get_current_active_user),
+        db: AsyncSession = Depends(get_db)
 ):
-    """Получить транзакции за определенный период (day, week, month, year)"""
+    """
+    Получить транзакции за определенный период (day, week, month, year, all).
+
+    Период отдается страницами по limit записей; для продолжения передайте
+    next_cursor из предыдущего ответа. Итоги за весь период приходят только
+    на первой странице.
+    """
     if period not in ["day", "week", "month", "year", "all"]:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid period. Must be one of: day, week, month, year, all"
         )
 
-    transactions, summary = await TransactionService.get_transactions_by_period(
-        current_user.id, period, date, db
+    transactions, summary, next_cursor = await TransactionService.get_transactions_by_period(
+        current_user.id, period, date, db, limit=limit, cursor=cursor
     )
 
-    return TransactionListResponse(
-        transactions=transactions,
-        summary=summary
-    )
+    return _transaction_list_response(transactions, summary, next_cursor)
 
 
-@router.get("/grouped", response_model=List[dict])
+@router.get("/grouped", response_model=List[TransactionSection])
 async def get_transactions_grouped(
-        skip: int = 0,
-        limit: int = 100,
-        current_user: User = Depends(get_current_active_user),
-        db: Session = Depends(get_db)
-):
-    """Получить транзакции, сгруппированные по датам (для SectionList)"""
-    transactions, _ = await TransactionService.get_transactions(
-        current_user.id, None, skip, limit, db
+        skip: int = Query(0, ge=0),
+        limit: int = Query(100, ge=1, le=1000),
+        current_user: UserPrincipal = Depends(get_current_active_user),
+        db: AsyncSession = Depends(get_db)
+):
+    """
+    Получить транзакции, сгруппированные по датам (для SectionList), страницами по skip/limit.
+
+    Постраничная загрузка по курсору — /transactions/sections.
+    """
+    sections, _ = await TransactionService.get_transactions_grouped(
+        current_user.id, limit, None, db, skip=skip
     )
 
-    sections = await TransactionService.group_transactions_by_date(transactions)
-    return sections
+    return RawJSONResponse(sections)
+
+
+@router.get("/sections", response_model=GroupedTransactionsResponse)
+async def get_transaction_sections(
+        limit: int = Query(100, ge=1, le=1000),
+        cursor: Optional[str] = None,
+        current_user: UserPrincipal = Depends(get_current_active_user),
+        db: AsyncSession = Depends(get_db)
+):
+    """
+    Получить транзакции, сгруппированные по датам (для SectionList), страницами по курсору.
+
+    Следующая порция запрашивается по next_cursor; если первая секция новой
+    порции имеет тот же key, что и последняя загруженная, ее строки дописываются
+    в эту секцию.
+    """
+    sections, next_cursor = await TransactionService.get_transactions_grouped(
+        current_user.id, limit, cursor, db
+    )
+
+    return RawJSONResponse({"sections": sections, "next_cursor": next_cursor})
+
+
+@router.get("/export")
+async def export_transactions(
+        export_format: str = Query("ndjson", alias="format"),
+        current_user: UserPrincipal = Depends(get_current_active_user),
+        session_factory: async_sessionmaker = Depends(get_session_factory)
+):
+    """Выгрузить всю историю транзакций потоком (ndjson или csv)"""
+    if export_format not in EXPORT_MEDIA_TYPES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid format. Must be one of: ndjson, csv"
+        )
+
+    return StreamingResponse(
+        TransactionService.export_transactions(current_user.id, export_format, session_factory),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="transactions.{export_format}"'}
+    )
+
+
+@router.get("/balance", response_model=BalanceResponse)
+async def get_balance(
+        current_user: UserPrincipal = Depends(get_current_active_user),
+        db: AsyncSession = Depends(get_db)
+):
+    """Получить итоговый баланс пользователя (из агрегата, без обхода транзакций)"""
+    return await BalanceService.get_balance(current_user.id, db)
+
+
+@router.get("/stats/by-category", response_model=CategoryStatsResponse)
+async def get_category_stats(
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        transaction_type: CategoryTypeEnum = CategoryTypeEnum.EXPENSE,
+        current_user: UserPrincipal = Depends(get_current_active_user),
+        db: AsyncSession = Depends(get_db)
+):
+    """Получить суммы, количество и долю транзакций по категориям за период"""
+    filters = TransactionFilters(
+        start_date=start_date,
+        end_date=end_date,
+        transaction_type=transaction_type
+    )
+    return await TransactionService.get_category_stats(current_user.id, filters, db)
+
+
+@router.get("/stats/series", response_model=TransactionSeriesResponse)
+async def get_transactions_series(
+        bucket: str,
+        date_from: date = Query(..., alias="from"),
+        date_to: date = Query(..., alias="to"),
+        current_user: UserPrincipal = Depends(get_current_active_user),
+        db: AsyncSession = Depends(get_db)
+):
+    """Получить доходы, расходы и баланс по интервалам (day, week, month, year)"""
+    if bucket not in ["day", "week", "month", "year"]:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid bucket. Must be one of: day, week, month, year"
+        )
+
+    if date_from > date_to:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="'from' must not be later than 'to'"
+        )
+
+    return await TransactionService.get_transactions_series(current_user.id, bucket, date_from, date_to, db)
 
 
 @router.get("/{transaction_id}", response_model=TransactionWithCategory)
 async def get_transaction(
         transaction_id: int,
-        current_user: User = Depends(get_current_active_user),
-        db: Session = Depends(get_db)
+        current_user: UserPrincipal = Depends(get_current_active_user),
+        db: AsyncSession = Depends(get_db)
 ):
     """Получить транзакцию по ID"""
     transaction = await TransactionService.get_transaction(transaction_id, current_user.id, db)
@@ -125,8 +310,8 @@ async def get_transaction(
 async def update_transaction(
         transaction_id: int,
         transaction_data: TransactionUpdate,
-        current_user: User = Depends(get_current_active_user),
-        db: Session = Depends(get_db)
+        current_user: UserPrincipal = Depends(get_current_active_user),
+        db: AsyncSession = Depends(get_db)
 ):
     """Обновить транзакцию"""
     transaction = await TransactionService.update_transaction(
@@ -138,8 +323,8 @@ async def update_transaction(
 @router.delete("/{transaction_id}")
 async def delete_transaction(
         transaction_id: int,
-        current_user: User = Depends(get_current_active_user),
-        db: Session = Depends(get_db)
+        current_user: UserPrincipal = Depends(get_current_active_user),
+        db: AsyncSession = Depends(get_db)
 ):
     """Удалить транзакцию"""
     await TransactionService.delete_transaction(transaction_id, current_user.id, db)
@@ -150,8 +335,8 @@ async def delete_transaction(
 async def upload_receipt_photo(
         transaction_id: int,
         file: UploadFile = File(...),
-        current_user: User = Depends(get_current_active_user),
-        db: Session = Depends(get_db)
+        current_user: UserPrincipal = Depends(get_current_active_user),
+        db: AsyncSession = Depends(get_db)
 ):
     """Загрузить фото чека"""
     photo_url = await TransactionService.upload_receipt_photo(
@@ -1,10 +1,10 @@
 # app/api/v1/users.py
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import get_db
 from app.schemas.user import UserProfile, UserUpdate, UserPersonalInfo
 from app.utils.dependencies import get_current_active_user, get_current_verified_user
-from app.models.user import User
+from app.utils.principal_cache import UserPrincipal
 from app.services.user import UserService
 from typing import Optional
 
@@ -16,17 +16,18 @@ router = APIRouter(
 
 @router.get("/me", response_model=UserProfile)
 async def get_current_user_profile(
-        current_user: User = Depends(get_current_active_user)
+        current_user: UserPrincipal = Depends(get_current_active_user),
+        db: AsyncSession = Depends(get_db)
 ):
     """Получить профиль текущего пользователя"""
-    return current_user
+    return await UserService.get_user_by_id(current_user.id, db)
 
 
 @router.put("/me", response_model=UserProfile)
 async def update_current_user(
         user_update: UserUpdate,
-        current_user: User = Depends(get_current_active_user),
-        db: Session = Depends(get_db)
+        current_user: UserPrincipal = Depends(get_current_active_user),
+        db: AsyncSession = Depends(get_db)
 ):
     """Обновить профиль текущего пользователя"""
     updated_user = await UserService.update_user(current_user.id, user_update, db)
@@ -35,8 +36,8 @@ async def update_current_user(
 
 @router.delete("/me")
 async def delete_current_user(
-        current_user: User = Depends(get_current_verified_user),
-        db: Session = Depends(get_db)
+        current_user: UserPrincipal = Depends(get_current_verified_user),
+        db: AsyncSession = Depends(get_db)
 ):
     """Удалить аккаунт текущего пользователя"""
     await UserService.delete_user(current_user.id, db)
@@ -46,7 +47,7 @@ async def delete_current_user(
 @router.post("/verify-email")
 async def verify_email(
         token: str,
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_db)
 ):
     """Подтвердить email адрес"""
     await UserService.verify_email(token, db)
@@ -57,8 +58,8 @@ async def verify_email(
 async def change_password(
         current_password: str,
         new_password: str,
-        current_user: User = Depends(get_current_active_user),
-        db: Session = Depends(get_db)
+        current_user: UserPrincipal = Depends(get_current_active_user),
+        db: AsyncSession = Depends(get_db)
 ):
     """Изменить пароль"""
     await UserService.change_password(
@@ -73,8 +74,8 @@ async def change_password(
 # Новые эндпоинты для персональной информации
 @router.get("/me/personal", response_model=UserPersonalInfo)
 async def get_personal_info(
-        current_user: User = Depends(get_current_active_user),
-        db: Session = Depends(get_db)
+        current_user: UserPrincipal = Depends(get_current_active_user),
+        db: AsyncSession = Depends(get_db)
 ):
     """Получить персональную информацию пользователя"""
     return await UserService.get_personal_info(current_user.id, db)
@@ -83,8 +84,8 @@ async def get_personal_info(
 @router.put("/me/personal", response_model=UserPersonalInfo)
 async def update_personal_info(
         user_info: UserUpdate,
-        current_user: User = Depends(get_current_active_user),
-        db: Session = Depends(get_db)
+        current_user: UserPrincipal = Depends(get_current_active_user),
+        db: AsyncSession = Depends(get_db)
 ):
     """Обновить персональную информацию пользователя"""
     updated_user = await UserService.update_user(current_user.id, user_info, db)
@@ -101,8 +102,8 @@ async def update_personal_info(
 @router.post("/me/photo")
 async def upload_profile_photo(
         file: UploadFile = File(...),
-        current_user: User = Depends(get_current_active_user),
-        db: Session = Depends(get_db)
+        current_user: UserPrincipal = Depends(get_current_active_user),
+        db: AsyncSession = Depends(get_db)
 ):
     """Загрузить фото профиля"""
     # Здесь нужно добавить логику сохранения фото
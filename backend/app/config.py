@@ -20,9 +20,63 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
 
+    # Кэш принципала пользователя в get_current_user (в бэкенде кэша); 0 отключает кэш
+    AUTH_PRINCIPAL_CACHE_TTL: float = 30.0  # секунд
+    # Кэш проверенных JWT до их exp (записей; 0 отключает кэш)
+    AUTH_TOKEN_CACHE_SIZE: int = 10_000
+
     # База данных
     DATABASE_URL: str
 
+    # Пул соединений (для SQLite не применяется)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0  # секунд ожидания свободного соединения
+    DB_POOL_RECYCLE: int = 1800  # секунд до переоткрытия соединения (-1 — без ограничения)
+    DB_POOL_PRE_PING: bool = True
+
+    # Реплики для чтения (JSON-список URL). GET-запросы читают с реплик, кроме
+    # окна DB_REPLICA_STICKY_SECONDS после записи пользователя в основную БД
+    DB_REPLICA_URLS: List[str] = []
+    DB_REPLICA_STICKY_SECONDS: float = 5.0
+
+    # Помесячное секционирование transactions (только PostgreSQL). Таблица
+    # переводится скриптом scripts/partition_transactions.py; при запуске
+    # приложение создает секции на DB_PARTITION_MONTHS_AHEAD месяцев вперед
+    DB_PARTITION_TRANSACTIONS: bool = False
+    DB_PARTITION_MONTHS_AHEAD: int = 3
+
+    # Архив старых транзакций (transactions_archive). Транзакции старше
+    # TRANSACTION_ARCHIVE_AFTER_DAYS дней переносит scripts/archive_transactions.py;
+    # None — архив не используется и при чтении не запрашивается
+    TRANSACTION_ARCHIVE_AFTER_DAYS: Optional[int] = None
+    TRANSACTION_ARCHIVE_BATCH_SIZE: int = 5000
+
+    # Бэкенд кэша (см. app/utils/cache_backend.py): memory — LRU в памяти
+    # процесса, redis — общий сервер с протоколом Redis, через который
+    # воркеры также рассылают инвалидации своих кэшей
+    CACHE_BACKEND: str = "memory"
+    CACHE_REDIS_URL: Optional[str] = None  # redis://[:password@]host:6379/0
+    CACHE_REDIS_TIMEOUT: float = 1.0  # секунд на подключение и ответ
+    CACHE_REDIS_POOL_SIZE: int = 4  # соединений для команд на воркер
+    CACHE_MEMORY_MAX_ITEMS: int = 100_000
+    CACHE_KEY_PREFIX: str = "finapp:"
+
+    # Кэш категорий пользователей в памяти воркера (см. app/utils/category_cache.py);
+    # 0 в любом из параметров отключает кэш
+    CATEGORY_CACHE_TTL: float = 300.0  # секунд
+    CATEGORY_CACHE_SIZE: int = 10_000  # пользователей
+
+    # Условные GET: ETag по версии данных пользователя и 304 на If-None-Match.
+    # Версии хранятся в памяти воркера, их изменения рассылаются через общий
+    # бэкенд кэша; None — включено только при общем бэкенде (CACHE_BACKEND=redis)
+    DATA_VERSION_ETAGS: Optional[bool] = None
+    DATA_VERSION_MAX_USERS: int = 100_000
+
+    # Служебные эндпоинты (/internal) доступны только с этим токеном в X-Internal-Token;
+    # без токена они отключены (404)
+    INTERNAL_API_TOKEN: Optional[str] = None
+
     # CORS
     BACKEND_CORS_ORIGINS: List[str] = [
         "http://localhost:3000",
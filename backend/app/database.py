@@ -1,39 +1,284 @@
 # app/database.py
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
-from app.config import settings
+import random
 import re
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Dict, Optional, Sequence, Union
+
+from fastapi import Request
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from app.config import settings
+from app.utils.pool_metrics import PoolMetrics, metered_pool_class
 
 # Определяем, какая БД используется
 is_sqlite = re.search(r'^sqlite:', settings.DATABASE_URL) is not None
 
-# Создание движка БД с корректными параметрами для каждого типа БД
+# Асинхронные драйверы для каждого типа БД
+ASYNC_DRIVERS = {
+    "sqlite": "aiosqlite",
+    "postgresql": "asyncpg",
+}
+
+# Методы HTTP, запросы которых могут читать с реплик
+READ_ONLY_METHODS = frozenset({"GET", "HEAD"})
+
+
+def get_async_database_url(database_url: str) -> str:
+    """URL БД с асинхронным драйвером (sqlite → aiosqlite, postgresql → asyncpg)"""
+    url = make_url(database_url)
+    backend = url.get_backend_name()
+    if backend in ASYNC_DRIVERS:
+        url = url.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}")
+    return url.render_as_string(hide_password=False)
+
+
+def get_pool_options() -> dict:
+    """Параметры пула соединений из настроек"""
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
+def create_async_db_engine(database_url: str, metrics: PoolMetrics) -> AsyncEngine:
+    """Асинхронный движок с параметрами пула из настроек и сбором метрик пула"""
+    if make_url(database_url).get_backend_name() == "sqlite":
+        # SQLite не поддерживает pool_size и max_overflow
+        async_db_engine = create_async_engine(get_async_database_url(database_url))
+    else:
+        # PostgreSQL и другие поддерживают расширенные настройки пула
+        async_db_engine = create_async_engine(
+            get_async_database_url(database_url),
+            poolclass=metered_pool_class(AsyncAdaptedQueuePool, metrics),
+            **get_pool_options()
+        )
+    metrics.listen(async_db_engine.sync_engine)
+    return async_db_engine
+
+
+class ReplicaStickiness:
+    """
+    Окна read-your-writes: после записи пользователь в течение
+    window_seconds читает с основной БД, пока реплики ее догоняют.
+
+    Окна хранятся в памяти процесса, то есть действуют в пределах
+    воркера, выполнившего запись.
+    """
+
+    # Порог размера, после которого при записи удаляются истекшие окна
+    PRUNE_THRESHOLD = 1024
+
+    def __init__(self, window_seconds: float):
+        self.window_seconds = window_seconds
+        self._lock = threading.Lock()
+        self._until: Dict[int, float] = {}
+
+    def mark(self, user_id: int) -> None:
+        """Открыть окно чтения с основной БД для пользователя"""
+        now = time.monotonic()
+        with self._lock:
+            if len(self._until) >= self.PRUNE_THRESHOLD:
+                self._until = {key: until for key, until in self._until.items() if until > now}
+            self._until[user_id] = now + self.window_seconds
+
+    def is_sticky(self, user_id: Optional[int]) -> bool:
+        """Читает ли пользователь сейчас с основной БД"""
+        if user_id is None:
+            return False
+        return self._until.get(user_id, 0.0) > time.monotonic()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._until.clear()
+
+
+class RoutingSession(Session):
+    """
+    Синхронная сессия под AsyncSession, выбирающая БД для каждого запроса.
+
+    Запись (flush и INSERT/UPDATE/DELETE) всегда идет в основную БД. Чтение
+    уходит на реплику, только если сессия открыта для запроса без записи
+    (info["read_only"]), сама еще ничего не записала и пользователь
+    (info["user_id"]) не находится в окне после собственной записи.
+    Реплика выбирается один раз на сессию, чтобы запрос видел один снимок.
+    Чтение, которому нужна основная БД (например, загрузка в кэш),
+    передает bind_arguments={"primary": True}.
+    """
+
+    def __init__(self, *args, replicas: Sequence[Engine] = (),
+                 stickiness: Optional[ReplicaStickiness] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.replicas = list(replicas)
+        self.stickiness = stickiness
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if self._flushing or getattr(clause, "is_dml", False):
+            self.info["wrote"] = True
+        elif not kwargs.get("primary") and self._reads_from_replica():
+            if "replica" not in self.info:
+                self.info["replica"] = random.choice(self.replicas)
+            return self.info["replica"]
+        return super().get_bind(mapper, clause=clause, **kwargs)
+
+    def _reads_from_replica(self) -> bool:
+        if not self.replicas or not self.info.get("read_only") or self.info.get("wrote"):
+            return False
+        return self.stickiness is None or not self.stickiness.is_sticky(self.info.get("user_id"))
+
+
+def reads_from_replica(db: AsyncSession) -> bool:
+    """Пойдет ли следующее чтение сессии на реплику"""
+    session = db.sync_session
+    return isinstance(session, RoutingSession) and session._reads_from_replica()
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _open_stickiness_window(session: RoutingSession) -> None:
+    """После записи пользователь читает с основной БД, пока реплики не догонят ее"""
+    user_id = session.info.get("user_id")
+    if session.info.pop("wrote", False) and session.stickiness is not None and user_id is not None:
+        session.stickiness.mark(user_id)
+
+
+def create_session_factory(primary: AsyncEngine, replicas: Sequence[AsyncEngine] = (),
+                           stickiness: Optional[ReplicaStickiness] = None) -> async_sessionmaker:
+    """Фабрика асинхронных сессий с маршрутизацией между основной БД и репликами"""
+    # expire_on_commit=False: после коммита атрибуты не перечитываются неявно
+    # (ленивая загрузка в асинхронной сессии невозможна)
+    return async_sessionmaker(
+        primary,
+        class_=AsyncSession,
+        sync_session_class=RoutingSession,
+        autoflush=False,
+        expire_on_commit=False,
+        replicas=[replica.sync_engine for replica in replicas],
+        stickiness=stickiness,
+    )
+
+
+def run_after_commit(db: Union[AsyncSession, Session], callback: Callable[[], None]) -> None:
+    """
+    Вызов callback после коммита сессии db (при откате — не вызывается).
+
+    Нужен кэшам в памяти: запись сбрасывается сразу при изменении и еще
+    раз после коммита, чтобы параллельный запрос не закэшировал данные,
+    прочитанные до коммита.
+    """
+    db.info.setdefault("after_commit", []).append(callback)
+
+
+@event.listens_for(Session, "after_commit")
+def _run_after_commit_callbacks(session: Session) -> None:
+    for callback in session.info.pop("after_commit", ()):
+        callback()
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_after_commit_callbacks(session: Session) -> None:
+    session.info.pop("after_commit", None)
+
+
+def bind_session_user(db: AsyncSession, user_id: int) -> None:
+    """Привязка сессии к пользователю: его чтение и запись учитываются окном read-your-writes"""
+    db.info["user_id"] = user_id
+
+
+# Создание движков БД с корректными параметрами для каждого типа БД.
+# Приложение работает через асинхронный движок; синхронный остается
+# для вспомогательных скриптов (инициализация тестовых данных и т.п.)
 if is_sqlite:
-    # SQLite не поддерживает pool_size и max_overflow
     engine = create_engine(
         settings.DATABASE_URL,
         connect_args={"check_same_thread": False},  # Только для SQLite
     )
 else:
-    # PostgreSQL и другие поддерживают расширенные настройки пула
     engine = create_engine(
         settings.DATABASE_URL,
-        pool_pre_ping=True,
-        pool_size=5,
-        max_overflow=10
+        **get_pool_options()
     )
 
-# Создание сессии
+# Метрики пулов основной БД и реплик (см. /internal/db/pool)
+primary_pool_metrics = PoolMetrics("primary")
+replica_pool_metrics = [PoolMetrics(f"replica-{index}") for index in range(len(settings.DB_REPLICA_URLS))]
+
+async_engine = create_async_db_engine(settings.DATABASE_URL, primary_pool_metrics)
+replica_engines = [
+    create_async_db_engine(url, metrics)
+    for url, metrics in zip(settings.DB_REPLICA_URLS, replica_pool_metrics)
+]
+replica_stickiness = ReplicaStickiness(settings.DB_REPLICA_STICKY_SECONDS)
+
+# Создание сессий
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+AsyncSessionLocal = create_session_factory(async_engine, replica_engines, replica_stickiness)
+
+class _ModelDefaults:
+    # Значения, которые генерирует БД (created_at, updated_at с onupdate),
+    # возвращаются тем же INSERT/UPDATE ... RETURNING, без повторного SELECT
+    __mapper_args__ = {"eager_defaults": True}
+
 
 # Базовый класс для моделей
-Base = declarative_base()
+Base = declarative_base(cls=_ModelDefaults)
+
+
+@event.listens_for(Base, "before_insert", propagate=True)
+def _insert_empty_onupdate_columns(mapper, connection, target) -> None:
+    """
+    Колонки только с onupdate (updated_at) при вставке явно получают NULL.
+
+    Иначе при eager_defaults SQLAlchemy догружает их после INSERT
+    отдельным SELECT, хотя значение заведомо пустое.
+    """
+    for prop in mapper.column_attrs:
+        column = prop.columns[0]
+        if (column.onupdate is not None and column.default is None
+                and column.server_default is None and prop.key not in target.__dict__):
+            setattr(target, prop.key, None)
+
+
+@asynccontextmanager
+async def unit_of_work(session_factory: Optional[async_sessionmaker] = None) -> AsyncIterator[AsyncSession]:
+    """
+    Единица работы: сессия, изменения которой фиксируются одним коммитом.
+
+    Сервисы только добавляют объекты и делают flush (когда нужны id или
+    проверка ограничений), коммит выполняется один раз при успешном выходе.
+    Исключение откатывает все изменения, так что многошаговые операции
+    (регистрация, транзакция вместе с балансом) атомарны.
+    """
+    async with (session_factory or AsyncSessionLocal)() as db:
+        try:
+            yield db
+        except BaseException:
+            await db.rollback()
+            raise
+        if db.in_transaction():
+            await db.commit()
+
+
+def session_dependency(session_factory: async_sessionmaker):
+    """Зависимость FastAPI: единица работы на запрос; GET и HEAD могут читать с реплик"""
+    async def get_session(request: Request):
+        async with unit_of_work(session_factory) as db:
+            db.info["read_only"] = request.method in READ_ONLY_METHODS
+            yield db
+
+    return get_session
 
 
 # Зависимость для получения сессии БД
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
\ No newline at end of file
+get_db = session_dependency(AsyncSessionLocal)
+
+
+def get_session_factory() -> async_sessionmaker:
+    """Зависимость FastAPI: фабрика сессий для работы, продолжающейся после выхода из get_db (потоковые ответы)"""
+    return AsyncSessionLocal
@@ -3,7 +3,11 @@ from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.config import settings
+from app.database import async_engine, replica_engines, is_sqlite
 from app.api.v1.router import api_router
+from app.utils.cache_backend import cache_backend
+from app.utils.data_version import ETagMiddleware
+from app.utils.partitioning import ensure_partitions
 
 
 # Лайфспан событие (замена для on_event)
@@ -12,15 +16,28 @@ async def lifespan(app: FastAPI):
     # Действия при запуске
     print(f"Starting {settings.PROJECT_NAME} v{settings.VERSION}...")
 
+    # Секции transactions на ближайшие месяцы
+    if settings.DB_PARTITION_TRANSACTIONS and not is_sqlite:
+        async with async_engine.begin() as connection:
+            created = await connection.run_sync(ensure_partitions, settings.DB_PARTITION_MONTHS_AHEAD)
+        if created:
+            print(f"Created transaction partitions: {', '.join(created)}")
+
+    # Подписка на инвалидации кэшей от других воркеров
+    await cache_backend.start()
+
     # Здесь можно добавить:
     # - Создание таблиц БД
-    # - Инициализация кеша
     # - Подключение к внешним сервисам
 
     yield  # Здесь приложение работает
 
     # Действия при остановке
     print("Shutting down...")
+    await cache_backend.close()
+    await async_engine.dispose()
+    for replica_engine in replica_engines:
+        await replica_engine.dispose()
 
     # Здесь можно добавить:
     # - Закрытие соединений
@@ -47,6 +64,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# ETag для эндпоинтов с зависимостью etag_by_data_version
+app.add_middleware(ETagMiddleware)
+
 # Подключение роутеров
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
@@ -2,6 +2,7 @@
 from app.models.user import User
 from app.models.financial import UserProfile, FinancialData, BankAccount
 from app.models.category import BudgetCategory
-from app.models.transaction import Transaction
+from app.models.transaction import Transaction, TransactionArchive
+from app.models.balance import UserBalance
 
-__all__ = ["User", "UserProfile", "FinancialData", "BankAccount", "BudgetCategory", "Transaction"]
\ No newline at end of file
+__all__ = ["User", "UserProfile", "FinancialData", "BankAccount", "BudgetCategory", "Transaction", "TransactionArchive", "UserBalance"]
\ No newline at end of file
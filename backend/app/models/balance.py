@@ -0,0 +1,26 @@
+# app/models/balance.py
+from sqlalchemy import Column, DateTime, Integer, ForeignKey
+from sqlalchemy.sql import func
+from app.database import Base
+from app.utils.money import MinorUnits
+
+
+class UserBalance(Base):
+    """
+    Агрегированный баланс пользователя.
+
+    Поддерживается инкрементально при каждом изменении транзакций, чтобы
+    итоговый баланс отдавался одной строкой, без обхода всей истории.
+    """
+    __tablename__ = "user_balances"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), unique=True, nullable=False)
+
+    # Агрегаты по транзакциям (точные суммы в минорных единицах)
+    total_income = Column(MinorUnits(), nullable=False, default=0)
+    total_expense = Column(MinorUnits(), nullable=False, default=0)
+    transaction_count = Column(Integer, nullable=False, default=0)
+
+    # Время последнего изменения баланса
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
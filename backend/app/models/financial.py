@@ -1,8 +1,9 @@
 # app/models/financial.py
-from sqlalchemy import Column, String, Boolean, DateTime, Integer, Float, ForeignKey, Enum
+from sqlalchemy import Column, String, Boolean, DateTime, Integer, ForeignKey, Enum
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.database import Base
+from app.utils.money import MinorUnits
 import enum
 
 
@@ -63,8 +64,8 @@ class FinancialData(Base):
     profile_id = Column(Integer, ForeignKey("user_profiles.id"), unique=True, nullable=False)
 
     # Финансовые показатели
-    balance = Column(Float, default=0.0)
-    savings = Column(Float, default=0.0)
+    balance = Column(MinorUnits(), default=0)
+    savings = Column(MinorUnits(), default=0)
     credit_score = Column(Integer, default=0)
 
     # Связи с другими таблицами
@@ -1,9 +1,10 @@
 # app/models/transaction.py
-from sqlalchemy import Column, String, Boolean, DateTime, Integer, Float, ForeignKey, Text, Enum
+from sqlalchemy import Column, String, Boolean, DateTime, Integer, ForeignKey, Text, Enum, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.database import Base
 from app.models.category import CategoryTypeEnum
+from app.utils.money import MinorUnits
 import enum
 
 
@@ -21,7 +22,7 @@ class Transaction(Base):
     category_id = Column(Integer, ForeignKey("budget_categories.id"), nullable=True)
 
     # Основная информация
-    amount = Column(Float, nullable=False)
+    amount = Column(MinorUnits(), nullable=False)  # Decimal, в БД — минорные единицы
     transaction_type = Column(Enum(CategoryTypeEnum), nullable=False)
     description = Column(Text, nullable=True)
     transaction_date = Column(DateTime(timezone=True), nullable=False)
@@ -38,4 +39,49 @@ class Transaction(Base):
 
     # Служебные поля
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
\ No newline at end of file
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+
+# Составные индексы под горячие запросы: все они фильтруют по user_id
+# и сортируют или ограничивают диапазон по дате.
+# Лента транзакций и keyset-пагинация: ORDER BY transaction_date DESC, id DESC
+Index("ix_transactions_user_date_id",
+      Transaction.user_id, Transaction.transaction_date.desc(), Transaction.id.desc())
+# Фильтр по типу (итоги, статистика расходов/доходов) в диапазоне дат
+Index("ix_transactions_user_type_date",
+      Transaction.user_id, Transaction.transaction_type, Transaction.transaction_date)
+# Фильтр по категориям в диапазоне дат и проверка связанных транзакций при удалении категории
+Index("ix_transactions_user_category_date",
+      Transaction.user_id, Transaction.category_id, Transaction.transaction_date)
+
+
+class TransactionArchive(Base):
+    """
+    Архив старых транзакций (холодное хранение).
+
+    Колонки те же, что у Transaction, id сохраняется исходный. Индексов
+    меньше: архив читается только лентой и агрегатами по диапазону дат.
+    """
+    __tablename__ = "transactions_archive"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    category_id = Column(Integer, ForeignKey("budget_categories.id"), nullable=True)
+
+    amount = Column(MinorUnits(), nullable=False)
+    transaction_type = Column(Enum(CategoryTypeEnum), nullable=False)
+    description = Column(Text, nullable=True)
+    transaction_date = Column(DateTime(timezone=True), nullable=False)
+
+    payment_method = Column(Enum(PaymentMethodEnum), nullable=True)
+    is_recurring = Column(Boolean, default=False)
+    receipt_photo_url = Column(String, nullable=True)
+    note = Column(Text, nullable=True)
+
+    created_at = Column(DateTime(timezone=True))
+    updated_at = Column(DateTime(timezone=True))
+
+
+# Единственный индекс архива: история пользователя по дате (лента, агрегаты, граница архива)
+Index("ix_transactions_archive_user_date_id",
+      TransactionArchive.user_id, TransactionArchive.transaction_date.desc(), TransactionArchive.id.desc())
@@ -3,6 +3,7 @@ from pydantic import BaseModel
 from typing import Optional, List
 from datetime import datetime
 from app.models.financial import CurrencyEnum, LanguageEnum, SubscriptionTypeEnum
+from app.utils.money import Money
 
 
 # Схемы для профиля пользователя
@@ -36,8 +37,8 @@ class ProfileResponse(ProfileBase):
 
 # Схемы для финансовых данных
 class FinancialDataBase(BaseModel):
-    balance: float
-    savings: float
+    balance: Money
+    savings: Money
     credit_score: int
 
 
@@ -46,8 +47,8 @@ class FinancialDataCreate(FinancialDataBase):
 
 
 class FinancialDataUpdate(BaseModel):
-    balance: Optional[float] = None
-    savings: Optional[float] = None
+    balance: Optional[Money] = None
+    savings: Optional[Money] = None
     credit_score: Optional[int] = None
 
 
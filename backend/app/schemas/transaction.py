@@ -1,13 +1,16 @@
 # app/schemas/transaction.py
-from pydantic import BaseModel, validator
+from pydantic import BaseModel, Field, validator
 from typing import Optional, List
 from datetime import datetime, date
+from decimal import Decimal
+import enum
 from app.models.category import CategoryTypeEnum
 from app.models.transaction import PaymentMethodEnum
+from app.utils.money import Money
 
 
 class TransactionBase(BaseModel):
-    amount: float
+    amount: Money
     transaction_type: CategoryTypeEnum
     description: Optional[str] = None
     transaction_date: datetime
@@ -25,8 +28,22 @@ class TransactionCreate(TransactionBase):
         return v
 
 
+# Максимальное количество транзакций в одном запросе /transactions/batch
+MAX_BATCH_SIZE = 5000
+
+
+class BatchModeEnum(str, enum.Enum):
+    ATOMIC = "atomic"  # Ошибка в любом элементе отменяет весь пакет
+    PARTIAL = "partial"  # Корректные элементы создаются, ошибочные возвращаются с описанием
+
+
+class TransactionBatchCreate(BaseModel):
+    transactions: List[TransactionCreate] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE)
+    mode: BatchModeEnum = BatchModeEnum.ATOMIC
+
+
 class TransactionUpdate(BaseModel):
-    amount: Optional[float] = None
+    amount: Optional[Money] = None
     transaction_type: Optional[CategoryTypeEnum] = None
     description: Optional[str] = None
     transaction_date: Optional[datetime] = None
@@ -47,6 +64,19 @@ class TransactionResponse(TransactionBase):
         from_attributes = True
 
 
+class TransactionBatchItemResult(BaseModel):
+    index: int  # Позиция элемента в запросе
+    status: str  # created или failed
+    transaction: Optional[TransactionResponse] = None
+    error: Optional[str] = None
+
+
+class TransactionBatchResponse(BaseModel):
+    created: int
+    failed: int
+    results: List[TransactionBatchItemResult]
+
+
 class TransactionWithCategory(TransactionResponse):
     category_name: Optional[str] = None
     category_icon: Optional[str] = None
@@ -57,9 +87,50 @@ class TransactionWithCategory(TransactionResponse):
 
 
 class TransactionSummary(BaseModel):
-    total_income: float = 0.0
-    total_expense: float = 0.0
-    net_balance: float = 0.0
+    total_income: Money = Decimal(0)
+    total_expense: Money = Decimal(0)
+    net_balance: Money = Decimal(0)
+    transaction_count: int = 0
+
+
+class BalanceResponse(BaseModel):
+    total_income: Money = Decimal(0)
+    total_expense: Money = Decimal(0)
+    net_balance: Money = Decimal(0)
+    transaction_count: int = 0
+    updated_at: Optional[datetime] = None
+
+
+class CategoryStat(BaseModel):
+    category_id: Optional[int] = None  # None — транзакции без категории
+    category_name: Optional[str] = None
+    category_icon: Optional[str] = None
+    category_color: Optional[str] = None
+    total_amount: Money = Decimal(0)
+    transaction_count: int = 0
+    share: float = 0.0  # Доля от общей суммы (0..1)
+
+
+class CategoryStatsResponse(BaseModel):
+    transaction_type: CategoryTypeEnum
+    total_amount: Money = Decimal(0)
+    transaction_count: int = 0
+    categories: List[CategoryStat] = []
+
+
+class SeriesPoint(BaseModel):
+    bucket_start: date  # Первый день интервала
+    total_income: Money = Decimal(0)
+    total_expense: Money = Decimal(0)
+    net_balance: Money = Decimal(0)
+    transaction_count: int = 0
+
+
+class TransactionSeriesResponse(BaseModel):
+    bucket: str
+    start_date: date
+    end_date: date
+    points: List[SeriesPoint] = []
 
 
 class TransactionFilters(BaseModel):
@@ -72,9 +143,54 @@ class TransactionFilters(BaseModel):
     payment_method: Optional[PaymentMethodEnum] = None
 
 
+class TransactionBulkSelection(BaseModel):
+    """Выбор транзакций для массовой операции: явный список id и/или фильтры"""
+    ids: Optional[List[int]] = Field(None, min_length=1, max_length=MAX_BATCH_SIZE)
+    filters: Optional[TransactionFilters] = None
+
+    @validator('filters', always=True)
+    def selection_must_not_be_empty(cls, v, values):
+        # Пустой выбор затронул бы всю историю пользователя; пустой список
+        # category_ids _apply_filters пропускает, поэтому он не считается фильтром
+        has_filters = v is not None and any(value not in (None, []) for value in v.model_dump().values())
+        if not values.get('ids') and not has_filters:
+            raise ValueError('Either ids or at least one filter must be provided')
+        return v
+
+
+class TransactionBulkChanges(BaseModel):
+    # Сумма и тип массово не меняются: от них зависят баланс и допустимые категории
+    category_id: Optional[int] = None  # null — снять категорию
+    payment_method: Optional[PaymentMethodEnum] = None
+    is_recurring: Optional[bool] = None
+    description: Optional[str] = None
+    note: Optional[str] = None
+
+
+class TransactionBulkUpdate(TransactionBulkSelection):
+    changes: TransactionBulkChanges
+
+
+class TransactionBulkResult(BaseModel):
+    affected: int  # Количество измененных или удаленных транзакций
+
+
 class TransactionListResponse(BaseModel):
     transactions: List[TransactionWithCategory]
-    summary: TransactionSummary
+    summary: Optional[TransactionSummary] = None  # None, если итоги не запрашивались
+    next_cursor: Optional[str] = None  # Курсор следующей страницы (None — страниц больше нет)
+
+
+class TransactionSection(BaseModel):
+    key: str  # today, yesterday, earlier_this_week, this_month или YYYY-MM
+    title: str
+    data: List[TransactionWithCategory]
+
+
+class GroupedTransactionsResponse(BaseModel):
+    # Секция, продолжающаяся на следующей странице, приходит с тем же key
+    sections: List[TransactionSection]
+    next_cursor: Optional[str] = None
 
 
 class ReceiptPhotoUpload(BaseModel):
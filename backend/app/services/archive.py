@@ -0,0 +1,105 @@
+# app/services/archive.py
+from typing import Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, insert, delete, func, union_all
+from sqlalchemy.orm import aliased
+from datetime import datetime, date, time, timedelta
+from app.config import settings
+from app.models.transaction import Transaction, TransactionArchive
+
+# Колонки переносятся по имени: у архива тот же набор колонок
+TRANSACTION_COLUMN_NAMES = tuple(column.name for column in Transaction.__table__.columns)
+
+# Все транзакции (рабочая таблица и архив) как одна сущность с атрибутами Transaction:
+# запросы, написанные для Transaction, строятся над ней без изменений.
+# Условия по user_id и дате PostgreSQL и SQLite переносят внутрь UNION ALL
+TransactionWithArchive = aliased(Transaction, union_all(
+    select(*(Transaction.__table__.c[name] for name in TRANSACTION_COLUMN_NAMES)),
+    select(*(TransactionArchive.__table__.c[name] for name in TRANSACTION_COLUMN_NAMES))
+).subquery("transactions_all"))
+
+
+class ArchiveService:
+    @staticmethod
+    def is_enabled() -> bool:
+        return settings.TRANSACTION_ARCHIVE_AFTER_DAYS is not None
+
+    @staticmethod
+    async def get_archived_until(user_id: int, db: AsyncSession) -> Optional[datetime]:
+        """
+        Дата самой новой архивной транзакции пользователя (None, если архива нет).
+
+        Одна проба индекса архива; результат запоминается в сессии, чтобы
+        лента и итоги одного запроса не повторяли ее.
+        """
+        if not ArchiveService.is_enabled():
+            return None
+
+        cached = db.info.setdefault("archived_until", {})
+        if user_id not in cached:
+            cached[user_id] = await db.scalar(select(func.max(TransactionArchive.transaction_date)).where(
+                TransactionArchive.user_id == user_id
+            ))
+        return cached[user_id]
+
+    @staticmethod
+    async def reaches_archive(user_id: int, start_date: Optional[date], db: AsyncSession) -> bool:
+        """Доходит ли диапазон, начинающийся со start_date (None — вся история), до архива пользователя"""
+        archived_until = await ArchiveService.get_archived_until(user_id, db)
+        if archived_until is None:
+            return False
+        # Запас в сутки: дата фильтра и дата в БД могут быть в разных часовых поясах
+        return start_date is None or start_date <= archived_until.date() + timedelta(days=1)
+
+    @staticmethod
+    async def get_source(user_id: int, start_date: Optional[date], db: AsyncSession):
+        """Сущность для чтения транзакций: Transaction или TransactionWithArchive, если нужен архив"""
+        if await ArchiveService.reaches_archive(user_id, start_date, db):
+            return TransactionWithArchive
+        return Transaction
+
+    @staticmethod
+    async def archive_batch(older_than: date, batch_size: int, db: AsyncSession) -> int:
+        """
+        Перенос в архив до batch_size транзакций с датой раньше older_than.
+
+        DELETE ... RETURNING возвращает именно удаленные строки, и они же
+        вставляются в архив в той же транзакции БД: строка всегда видна
+        ровно в одном из хранилищ. Баланс не меняется: архивные транзакции
+        продолжают в нем учитываться. Возвращает количество перенесенных
+        строк; коммит выполняет вызывающий.
+        """
+        cutoff = datetime.combine(older_than, time.min)
+        batch = select(Transaction.id).where(Transaction.transaction_date < cutoff).limit(batch_size)
+        return await ArchiveService._move(Transaction, TransactionArchive, batch, db)
+
+    @staticmethod
+    async def restore_batch(batch_size: int, db: AsyncSession, user_id: Optional[int] = None) -> int:
+        """Возврат до batch_size архивных транзакций в рабочую таблицу (перед отключением архива)"""
+        batch = select(TransactionArchive.id).limit(batch_size)
+        if user_id is not None:
+            batch = batch.where(TransactionArchive.user_id == user_id)
+        return await ArchiveService._move(TransactionArchive, Transaction, batch, db)
+
+    @staticmethod
+    async def restore(ids, db: AsyncSession) -> int:
+        """
+        Возврат в рабочую таблицу архивных транзакций с id из запроса ids
+        (SELECT по TransactionArchive.id): перед их изменением или удалением.
+        """
+        return await ArchiveService._move(TransactionArchive, Transaction, ids, db)
+
+    @staticmethod
+    async def _move(source, target, batch, db: AsyncSession) -> int:
+        """Перенос строк source с id из batch в target с сохранением всех колонок, включая id"""
+        rows = (await db.execute(
+            delete(source).where(source.id.in_(batch.scalar_subquery()))
+            .returning(*(source.__table__.c[name] for name in TRANSACTION_COLUMN_NAMES))
+            .execution_options(synchronize_session=False)
+        )).all()
+        if not rows:
+            return 0
+
+        db.info.pop("archived_until", None)
+        await db.execute(insert(target), [dict(zip(TRANSACTION_COLUMN_NAMES, row)) for row in rows])
+        return len(rows)
@@ -3,14 +3,17 @@
 from datetime import datetime, timedelta
 from typing import Optional
 
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException, status
 
 from app.models.user import User
 from app.schemas.auth import Token, OAuthLoginRequest, PasswordResetRequest, PasswordResetConfirm
 from app.schemas.user import UserCreate, UserOAuthCreate
+from app.utils.principal_cache import invalidate_principal
 from app.utils.security import SecurityUtils
 from app.config import settings
+from app.database import bind_session_user
 
 from app.services.profile import ProfileService
 from app.schemas.profile import ProfileCreate, FinancialDataCreate
@@ -27,9 +30,9 @@ from app.utils.mailer import send_reset_email
 
 class AuthService:
     @staticmethod
-    async def register_user(user_data: UserCreate, db: Session) -> User:
+    async def register_user(user_data: UserCreate, db: AsyncSession) -> User:
         """Регистрация нового пользователя"""
-        existing_user = db.query(User).filter(User.email == user_data.email).first()
+        existing_user = await db.scalar(select(User).where(User.email == user_data.email))
         if existing_user:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -51,8 +54,9 @@ class AuthService:
         )
 
         db.add(user)
-        db.commit()
-        db.refresh(user)
+        await db.flush()
+        # Первые запросы нового пользователя читают с основной БД
+        bind_session_user(db, user.id)
 
         # Создаём профиль и финансовые данные
         profile = await ProfileService.create_profile(user.id, ProfileCreate(), db)
@@ -72,9 +76,9 @@ class AuthService:
         return user
 
     @staticmethod
-    async def login_user(email: str, password: str, db: Session) -> Token:
+    async def login_user(email: str, password: str, db: AsyncSession) -> Token:
         """Вход пользователя"""
-        user = db.query(User).filter(User.email == email).first()
+        user = await db.scalar(select(User).where(User.email == email))
         if not user or not user.hashed_password:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -99,7 +103,7 @@ class AuthService:
         return Token(access_token=access_token, refresh_token=refresh_token)
 
     @staticmethod
-    async def refresh_token(refresh_token: str, db: Session) -> Token:
+    async def refresh_token(refresh_token: str, db: AsyncSession) -> Token:
         """Обновление токенов"""
         payload = SecurityUtils.decode_token(refresh_token)
         if not payload or payload.get("type") != "refresh":
@@ -109,7 +113,13 @@ class AuthService:
             )
 
         user_id = payload.get("sub")
-        user = db.query(User).filter(User.id == user_id).first()
+        if user_id is None or not str(user_id).isdigit():
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid refresh token"
+            )
+
+        user = await db.scalar(select(User).where(User.id == int(user_id)))
         if not user or not user.is_active:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -122,7 +132,7 @@ class AuthService:
         return Token(access_token=access_token, refresh_token=new_refresh_token)
 
     @staticmethod
-    async def oauth_login(oauth_data: OAuthLoginRequest, db: Session) -> Token:
+    async def oauth_login(oauth_data: OAuthLoginRequest, db: AsyncSession) -> Token:
         """OAuth вход/регистрация"""
         if oauth_data.provider == "google":
             user_info = await AuthService._verify_google_token(oauth_data.id_token)
@@ -140,7 +150,7 @@ class AuthService:
                 detail="Invalid OAuth token"
             )
 
-        user = db.query(User).filter(User.email == user_info["email"]).first()
+        user = await db.scalar(select(User).where(User.email == user_info["email"]))
         if not user:
             user = User(
                 email=user_info["email"],
@@ -150,13 +160,14 @@ class AuthService:
                 is_verified=True
             )
             db.add(user)
-            db.commit()
-            db.refresh(user)
+            await db.flush()
+            bind_session_user(db, user.id)
         else:
             if not user.oauth_provider:
                 user.oauth_provider = oauth_data.provider
                 user.oauth_id = user_info["sub"]
-                db.commit()
+                bind_session_user(db, user.id)
+                await db.flush()
 
         access_token = SecurityUtils.create_access_token(data={"sub": str(user.id)})
         refresh_token = SecurityUtils.create_refresh_token(data={"sub": str(user.id)})
@@ -187,9 +198,9 @@ class AuthService:
         return None
 
     @staticmethod
-    async def request_password_reset(email: str, db: Session) -> None:
+    async def request_password_reset(email: str, db: AsyncSession) -> None:
         """Запрос на сброс пароля"""
-        user = db.query(User).filter(User.email == email).first()
+        user = await db.scalar(select(User).where(User.email == email))
         if not user:
             return  # безопасность: не даём знать, есть ли такая учётка
 
@@ -199,7 +210,9 @@ class AuthService:
         user.reset_password_token_expires = (
             datetime.utcnow() + timedelta(hours=settings.PASSWORD_RESET_TOKEN_EXPIRE_HOURS)
         )
-        db.commit()
+        # Письмо уходит только после фиксации токена, поэтому коммит здесь,
+        # а не в конце запроса
+        await db.commit()
 
         # Отправка письма
         try:
@@ -209,12 +222,12 @@ class AuthService:
             print(f"[WARNING] Could not send reset email: {e}")
 
     @staticmethod
-    async def reset_password(token: str, new_password: str, db: Session) -> None:
+    async def reset_password(token: str, new_password: str, db: AsyncSession) -> None:
         """Подтверждение сброса пароля"""
-        user = db.query(User).filter(
+        user = await db.scalar(select(User).where(
             User.reset_password_token == token,
             User.reset_password_token_expires > datetime.utcnow()
-        ).first()
+        ))
 
         if not user:
             raise HTTPException(
@@ -232,4 +245,5 @@ class AuthService:
         user.hashed_password = SecurityUtils.get_password_hash(new_password)
         user.reset_password_token = None
         user.reset_password_token_expires = None
-        db.commit()
\ No newline at end of file
+        invalidate_principal(db, user.id)
+        await db.flush()
\ No newline at end of file
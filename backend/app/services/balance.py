@@ -0,0 +1,171 @@
+# app/services/balance.py
+from decimal import Decimal
+from typing import Optional, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, case, select, insert, update, delete
+from sqlalchemy.exc import IntegrityError
+from app.models.balance import UserBalance
+from app.models.transaction import Transaction
+from app.models.category import CategoryTypeEnum
+from app.schemas.transaction import BalanceResponse
+from app.services.archive import ArchiveService, TransactionWithArchive
+
+# Вклад транзакции в баланс: (тип, сумма)
+TransactionContribution = Tuple[CategoryTypeEnum, Decimal]
+
+
+def _income_sum(source=Transaction):
+    return func.coalesce(func.sum(case(
+        (source.transaction_type == CategoryTypeEnum.INCOME, source.amount),
+        else_=0
+    )), 0)
+
+
+def _expense_sum(source=Transaction):
+    return func.coalesce(func.sum(case(
+        (source.transaction_type == CategoryTypeEnum.EXPENSE, source.amount),
+        else_=0
+    )), 0)
+
+
+class BalanceService:
+    @staticmethod
+    async def apply_transaction_change(user_id: int, db: AsyncSession,
+                                       old: Optional[TransactionContribution] = None,
+                                       new: Optional[TransactionContribution] = None) -> None:
+        """
+        Учет изменения транзакции в балансе пользователя.
+
+        old — вклад транзакции до изменения (None для создания),
+        new — после изменения (None для удаления). Коммит не выполняется:
+        баланс обновляется в той же транзакции БД, что и сама запись.
+        """
+        income_delta = Decimal(0)
+        expense_delta = Decimal(0)
+        for contribution, sign in ((old, -1), (new, 1)):
+            if contribution is None:
+                continue
+            transaction_type, amount = contribution
+            if transaction_type == CategoryTypeEnum.INCOME:
+                income_delta += sign * amount
+            else:
+                expense_delta += sign * amount
+        count_delta = (new is not None) - (old is not None)
+
+        await BalanceService.apply_delta(user_id, income_delta, expense_delta, count_delta, db)
+
+    @staticmethod
+    async def apply_delta(user_id: int, income_delta: Decimal, expense_delta: Decimal, count_delta: int,
+                          db: AsyncSession) -> None:
+        """
+        Изменение агрегата баланса на суммарную разницу.
+
+        Используется для пакетных изменений: одна транзакция БД, одно
+        обновление строки баланса на весь пакет. Коммит не выполняется.
+        """
+        # Изменения транзакций должны попасть в БД до пересчета
+        await db.flush()
+
+        if await BalanceService._increment(user_id, income_delta, expense_delta, count_delta, db):
+            return
+
+        # Строки баланса еще нет (новый пользователь или история до появления
+        # таблицы) — считаем ее по сырым строкам, уже включая текущее изменение
+        total_income, total_expense, transaction_count = await BalanceService._aggregate(user_id, db)
+        try:
+            async with db.begin_nested():
+                db.add(UserBalance(
+                    user_id=user_id,
+                    total_income=total_income,
+                    total_expense=total_expense,
+                    transaction_count=transaction_count
+                ))
+        except IntegrityError:
+            # Параллельный запрос успел создать строку без нашего изменения
+            await BalanceService._increment(user_id, income_delta, expense_delta, count_delta, db)
+
+    @staticmethod
+    async def get_balance(user_id: int, db: AsyncSession) -> BalanceResponse:
+        """
+        Получение баланса пользователя из агрегата.
+
+        Только чтение (запрос может идти на реплику): если строки баланса
+        еще нет, он считается по сырым транзакциям, а строку создаст
+        следующая запись (apply_delta).
+        """
+        balance = await db.scalar(select(UserBalance).where(UserBalance.user_id == user_id))
+        if not balance:
+            total_income, total_expense, transaction_count = await BalanceService._aggregate(user_id, db)
+            return BalanceResponse(
+                total_income=total_income,
+                total_expense=total_expense,
+                net_balance=total_income - total_expense,
+                transaction_count=transaction_count
+            )
+
+        return BalanceResponse(
+            total_income=balance.total_income,
+            total_expense=balance.total_expense,
+            net_balance=balance.total_income - balance.total_expense,
+            transaction_count=balance.transaction_count,
+            updated_at=balance.updated_at
+        )
+
+    @staticmethod
+    async def rebuild(db: AsyncSession, user_id: Optional[int] = None) -> int:
+        """
+        Пересчет балансов по сырым транзакциям (для восстановления агрегата).
+
+        Без user_id пересчитываются все пользователи одним GROUP BY.
+        Архивные транзакции учитываются наравне с рабочими.
+        Возвращает количество записанных строк баланса. Коммит не выполняется.
+        """
+        if user_id is not None:
+            await db.execute(delete(UserBalance).where(UserBalance.user_id == user_id))
+            total_income, total_expense, transaction_count = await BalanceService._aggregate(user_id, db)
+            db.add(UserBalance(
+                user_id=user_id,
+                total_income=total_income,
+                total_expense=total_expense,
+                transaction_count=transaction_count
+            ))
+            await db.flush()
+            return 1
+
+        await db.execute(delete(UserBalance))
+        source = TransactionWithArchive if ArchiveService.is_enabled() else Transaction
+        aggregates = select(
+            source.user_id,
+            _income_sum(source),
+            _expense_sum(source),
+            func.count(source.id)
+        ).group_by(source.user_id)
+        result = await db.execute(insert(UserBalance).from_select(
+            ["user_id", "total_income", "total_expense", "transaction_count"],
+            aggregates
+        ))
+        return result.rowcount
+
+    @staticmethod
+    async def _increment(user_id: int, income_delta: Decimal, expense_delta: Decimal, count_delta: int,
+                         db: AsyncSession) -> bool:
+        """Атомарное приращение агрегатов; False, если строки баланса нет"""
+        result = await db.execute(update(UserBalance).where(UserBalance.user_id == user_id).values({
+            UserBalance.total_income: UserBalance.total_income + income_delta,
+            UserBalance.total_expense: UserBalance.total_expense + expense_delta,
+            UserBalance.transaction_count: UserBalance.transaction_count + count_delta,
+            UserBalance.updated_at: func.now()
+        }).execution_options(synchronize_session=False))
+        return result.rowcount > 0
+
+    @staticmethod
+    async def _aggregate(user_id: int, db: AsyncSession) -> Tuple[Decimal, Decimal, int]:
+        """Агрегаты пользователя, посчитанные по сырым транзакциям (вместе с архивом)"""
+        source = await ArchiveService.get_source(user_id, None, db)
+        return (await db.execute(select(
+            _income_sum(source),
+            _expense_sum(source),
+            func.count(source.id)
+        ).where(
+            source.user_id == user_id
+        ))).one()
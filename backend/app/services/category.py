@@ -1,25 +1,33 @@
 # app/services/category.py
-from typing import List, Optional, Dict
-from sqlalchemy.orm import Session
+from typing import Iterable, List, Optional, Dict
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException, status
 from app.models.category import BudgetCategory, CategoryTypeEnum
 from app.schemas.category import CategoryCreate, CategoryUpdate
+from app.services.archive import ArchiveService
 from app.services.pydantic_helpers import model_to_dict
+from app.utils.cache_backend import cache_backend
+from app.utils.category_cache import (
+    CategoryEntry, CategoryMap, category_cache, category_map, invalidate_categories, pending_category_writes
+)
+
+# Колонки категории для карты в кэше (поля CategoryEntry)
+CATEGORY_ENTRY_COLUMNS = tuple(BudgetCategory.__table__.c[name] for name in CategoryEntry.__dataclass_fields__)
 
 
 class CategoryService:
     @staticmethod
-    async def create_category(user_id: int, category_data: CategoryCreate, db: Session) -> BudgetCategory:
+    async def create_category(user_id: int, category_data: CategoryCreate, db: AsyncSession) -> BudgetCategory:
         """Создание новой категории бюджета с проверкой уникальности имени"""
 
         # Проверка на дубликат имени категории для данного пользователя и типа
-        existing = db.query(BudgetCategory).filter(
+        duplicate = await db.scalar(select(BudgetCategory.id).where(
             BudgetCategory.user_id == user_id,
             BudgetCategory.name == category_data.name,
             BudgetCategory.category_type == category_data.category_type
-        ).first()
-
-        if existing:
+        ).limit(1))
+        if duplicate is not None:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Категория с названием '{category_data.name}' уже существует"
@@ -30,46 +38,86 @@ class CategoryService:
         category = BudgetCategory(user_id=user_id, **category_dict)
 
         db.add(category)
-        db.commit()
-        db.refresh(category)
+        invalidate_categories(db, user_id)
+        await db.flush()
 
         return category
 
     @staticmethod
-    async def get_categories_by_type(user_id: int, category_type: CategoryTypeEnum, db: Session) -> List[
-        BudgetCategory]:
+    async def get_category_map(user_id: int, db: AsyncSession) -> CategoryMap:
+        """
+        Все категории пользователя {id: CategoryEntry} в порядке (position, name).
+
+        Карта берется из кэша категорий; при промахе загружается одним
+        запросом и сохраняется, если версия категорий за это время не менялась.
+        Загрузка идет из основной БД: отстающая реплика не должна попасть
+        в кэш под новой версией. Сессия с незакоммиченными изменениями
+        категорий пользователя читает их мимо кэша и карту не сохраняет.
+        """
+        pending = pending_category_writes(db, user_id)
+        categories = None if pending else category_cache.get(user_id)
+        if categories is None:
+            version = category_cache.version(user_id)
+            rows = await db.execute(select(*CATEGORY_ENTRY_COLUMNS).where(
+                BudgetCategory.user_id == user_id
+            ).order_by(BudgetCategory.position, BudgetCategory.name), bind_arguments={"primary": True})
+            entries = map(CategoryEntry.from_row, rows)
+            categories = category_map(entries) if pending else category_cache.put(user_id, version, entries)
+        return categories
+
+    @staticmethod
+    async def find_categories(user_id: int, category_ids: Iterable[int], db: AsyncSession) -> CategoryMap:
+        """
+        Карта категорий пользователя для проверки category_ids.
+
+        Без общего бэкенда кэша инвалидация из другого воркера не приходит,
+        и карта в памяти может не знать категорию, созданную там. Поэтому
+        id, которых нет в карте, дочитываются из основной БД; если они
+        нашлись, карта устарела и ее версия сбрасывается в этом воркере.
+        """
+        categories = await CategoryService.get_category_map(user_id, db)
+        missing = set(category_ids) - categories.keys()
+        if not missing or cache_backend.shared:
+            return categories
+        rows = await db.execute(select(*CATEGORY_ENTRY_COLUMNS).where(
+            BudgetCategory.user_id == user_id, BudgetCategory.id.in_(missing)
+        ), bind_arguments={"primary": True})
+        found = [CategoryEntry.from_row(row) for row in rows]
+        if not found:
+            return categories
+        category_cache.bump(user_id)
+        return category_map([*categories.values(), *found])
+
+    @staticmethod
+    async def get_categories_by_type(user_id: int, category_type: CategoryTypeEnum, db: AsyncSession) -> List[
+        CategoryEntry]:
         """Получение категорий определенного типа"""
-        return db.query(BudgetCategory).filter(
-            BudgetCategory.user_id == user_id,
-            BudgetCategory.category_type == category_type
-        ).order_by(BudgetCategory.position, BudgetCategory.name).all()
+        categories = await CategoryService.get_category_map(user_id, db)
+        return [category for category in categories.values() if category.category_type == category_type]
 
     @staticmethod
-    async def get_categories(user_id: int, db: Session) -> Dict[str, List[BudgetCategory]]:
+    async def get_categories(user_id: int, db: AsyncSession) -> Dict[str, List[CategoryEntry]]:
         """Получение всех категорий пользователя разделенных по типу"""
-        expense_categories = await CategoryService.get_categories_by_type(
-            user_id, CategoryTypeEnum.EXPENSE, db
-        )
-        income_categories = await CategoryService.get_categories_by_type(
-            user_id, CategoryTypeEnum.INCOME, db
-        )
+        categories = await CategoryService.get_category_map(user_id, db)
 
         return {
-            "expense_categories": expense_categories,
-            "income_categories": income_categories
+            "expense_categories": [category for category in categories.values()
+                                   if category.category_type == CategoryTypeEnum.EXPENSE],
+            "income_categories": [category for category in categories.values()
+                                  if category.category_type == CategoryTypeEnum.INCOME]
         }
 
     @staticmethod
-    async def get_category(category_id: int, user_id: int, db: Session) -> Optional[BudgetCategory]:
+    async def get_category(category_id: int, user_id: int, db: AsyncSession) -> Optional[BudgetCategory]:
         """Получение категории по ID"""
-        return db.query(BudgetCategory).filter(
+        return await db.scalar(select(BudgetCategory).where(
             BudgetCategory.id == category_id,
             BudgetCategory.user_id == user_id
-        ).first()
+        ))
 
     @staticmethod
     async def update_category(category_id: int, user_id: int, category_data: CategoryUpdate,
-                              db: Session) -> BudgetCategory:
+                              db: AsyncSession) -> BudgetCategory:
         """Обновление категории"""
         category = await CategoryService.get_category(category_id, user_id, db)
         if not category:
@@ -90,12 +138,12 @@ class CategoryService:
         for field, value in update_data.items():
             setattr(category, field, value)
 
-        db.commit()
-        db.refresh(category)
+        invalidate_categories(db, user_id)
+        await db.flush()
         return category
 
     @staticmethod
-    async def delete_category(category_id: int, user_id: int, db: Session) -> None:
+    async def delete_category(category_id: int, user_id: int, db: AsyncSession) -> None:
         """Удаление категории"""
         category = await CategoryService.get_category(category_id, user_id, db)
         if not category:
@@ -111,11 +159,12 @@ class CategoryService:
                 detail="Cannot delete system category"
             )
 
-        # Проверка транзакций с этой категорией
-        from app.models.transaction import Transaction
-        transactions_count = db.query(Transaction).filter(
-            Transaction.category_id == category_id
-        ).count()
+        # Проверка транзакций с этой категорией (включая архивные)
+        source = await ArchiveService.get_source(user_id, None, db)
+        transactions_count = await db.scalar(select(func.count(source.id)).where(
+            source.user_id == user_id,
+            source.category_id == category_id
+        ))
 
         if transactions_count > 0:
             raise HTTPException(
@@ -124,11 +173,12 @@ class CategoryService:
             )
 
         # Удаляем категорию
-        db.delete(category)
-        db.commit()
+        await db.delete(category)
+        invalidate_categories(db, user_id)
+        await db.flush()
 
     @staticmethod
-    async def create_default_categories(user_id: int, db: Session) -> Dict[str, List[BudgetCategory]]:
+    async def create_default_categories(user_id: int, db: AsyncSession) -> Dict[str, List[BudgetCategory]]:
         """Создание стандартных категорий для нового пользователя"""
         # Создаем категории доходов
         income_categories = [
@@ -248,11 +298,8 @@ class CategoryService:
 
         # Добавляем все категории в БД
         db.add_all(income_categories + expense_categories)
-        db.commit()
-
-        # Обновляем объекты из БД
-        for category in income_categories + expense_categories:
-            db.refresh(category)
+        invalidate_categories(db, user_id)
+        await db.flush()
 
         return {
             "income_categories": income_categories,
@@ -260,21 +307,15 @@ class CategoryService:
         }
 
     @staticmethod
-    async def get_system_categories(user_id: int, db: Session) -> Dict[str, List[BudgetCategory]]:
+    async def get_system_categories(user_id: int, db: AsyncSession) -> Dict[str, List[CategoryEntry]]:
         """Получение системных категорий пользователя"""
-        # Получаем системные категории дохода
-        income_categories = db.query(BudgetCategory).filter(
-            BudgetCategory.user_id == user_id,
-            BudgetCategory.is_system == True,
-            BudgetCategory.category_type == CategoryTypeEnum.INCOME
-        ).order_by(BudgetCategory.position, BudgetCategory.name).all()
+        categories = await CategoryService.get_category_map(user_id, db)
+        system_categories = [category for category in categories.values() if category.is_system]
 
-        # Получаем системные категории расхода
-        expense_categories = db.query(BudgetCategory).filter(
-            BudgetCategory.user_id == user_id,
-            BudgetCategory.is_system == True,
-            BudgetCategory.category_type == CategoryTypeEnum.EXPENSE
-        ).order_by(BudgetCategory.position, BudgetCategory.name).all()
+        income_categories = [category for category in system_categories
+                             if category.category_type == CategoryTypeEnum.INCOME]
+        expense_categories = [category for category in system_categories
+                              if category.category_type == CategoryTypeEnum.EXPENSE]
 
         return {
             "income_categories": income_categories,
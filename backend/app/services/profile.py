@@ -1,6 +1,8 @@
 # app/services/profile.py
 from typing import Optional, List
-from sqlalchemy.orm import Session
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 from fastapi import HTTPException, status
 from app.models.user import User
 from app.models.financial import UserProfile, FinancialData, BankAccount, SubscriptionTypeEnum
@@ -11,10 +13,10 @@ from app.services.pydantic_helpers import model_to_dict
 
 class ProfileService:
     @staticmethod
-    async def create_profile(user_id: int, profile_data: Optional[ProfileCreate], db: Session) -> UserProfile:
+    async def create_profile(user_id: int, profile_data: Optional[ProfileCreate], db: AsyncSession) -> UserProfile:
         """Создание профиля пользователя"""
         # Проверяем, существует ли пользователь
-        user = db.query(User).filter(User.id == user_id).first()
+        user = await db.scalar(select(User).where(User.id == user_id))
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -22,7 +24,7 @@ class ProfileService:
             )
 
         # Проверяем, существует ли уже профиль
-        existing_profile = db.query(UserProfile).filter(UserProfile.user_id == user_id).first()
+        existing_profile = await db.scalar(select(UserProfile).where(UserProfile.user_id == user_id))
         if existing_profile:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -38,23 +40,32 @@ class ProfileService:
         else:
             profile = UserProfile(user_id=user_id)
 
+        # У нового профиля финансовых данных еще нет: связь задается явно,
+        # чтобы обращение к ней после flush не требовало запроса к БД
+        profile.financial_data = None
+
         db.add(profile)
-        db.commit()
-        db.refresh(profile)
+        await db.flush()
 
         return profile
 
     @staticmethod
-    async def get_profile(user_id: int, db: Session) -> Optional[UserProfile]:
+    async def get_profile(user_id: int, db: AsyncSession) -> Optional[UserProfile]:
         """Получение профиля пользователя"""
-        profile = db.query(UserProfile).filter(UserProfile.user_id == user_id).first()
+        # Финансовые данные входят в ответ профиля, а ленивая загрузка
+        # в асинхронной сессии недоступна — загружаем их сразу
+        profile = await db.scalar(
+            select(UserProfile).options(
+                selectinload(UserProfile.financial_data)
+            ).where(UserProfile.user_id == user_id)
+        )
         if not profile:
             return None
 
         return profile
 
     @staticmethod
-    async def update_profile(user_id: int, profile_data: ProfileUpdate, db: Session) -> UserProfile:
+    async def update_profile(user_id: int, profile_data: ProfileUpdate, db: AsyncSession) -> UserProfile:
         """Обновление профиля пользователя"""
         profile = await ProfileService.get_profile(user_id, db)
         if not profile:
@@ -68,13 +79,12 @@ class ProfileService:
         for field, value in update_data.items():
             setattr(profile, field, value)
 
-        db.commit()
-        db.refresh(profile)
+        await db.flush()
         return profile
 
     @staticmethod
     async def update_subscription(user_id: int, subscription_type: SubscriptionTypeEnum, expires_at,
-                                  db: Session) -> UserProfile:
+                                  db: AsyncSession) -> UserProfile:
         """Обновление типа подписки пользователя"""
         profile = await ProfileService.get_profile(user_id, db)
         if not profile:
@@ -86,15 +96,14 @@ class ProfileService:
         profile.subscription_type = subscription_type
         profile.subscription_expires = expires_at
 
-        db.commit()
-        db.refresh(profile)
+        await db.flush()
         return profile
 
     @staticmethod
-    async def create_financial_data(profile_id: int, financial_data: FinancialDataCreate, db: Session) -> FinancialData:
+    async def create_financial_data(profile_id: int, financial_data: FinancialDataCreate, db: AsyncSession) -> FinancialData:
         """Создание финансовых данных для профиля"""
         # Проверяем существование профиля
-        profile = db.query(UserProfile).filter(UserProfile.id == profile_id).first()
+        profile = await db.scalar(select(UserProfile).where(UserProfile.id == profile_id))
         if not profile:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -102,7 +111,7 @@ class ProfileService:
             )
 
         # Проверяем, существуют ли уже финансовые данные
-        existing_data = db.query(FinancialData).filter(FinancialData.profile_id == profile_id).first()
+        existing_data = await db.scalar(select(FinancialData).where(FinancialData.profile_id == profile_id))
         if existing_data:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -116,19 +125,18 @@ class ProfileService:
         )
 
         db.add(data)
-        db.commit()
-        db.refresh(data)
+        await db.flush()
 
         return data
 
     @staticmethod
-    async def get_financial_data(profile_id: int, db: Session) -> Optional[FinancialData]:
+    async def get_financial_data(profile_id: int, db: AsyncSession) -> Optional[FinancialData]:
         """Получение финансовых данных"""
-        financial_data = db.query(FinancialData).filter(FinancialData.profile_id == profile_id).first()
+        financial_data = await db.scalar(select(FinancialData).where(FinancialData.profile_id == profile_id))
         return financial_data
 
     @staticmethod
-    async def update_financial_data(profile_id: int, financial_data: FinancialDataUpdate, db: Session) -> FinancialData:
+    async def update_financial_data(profile_id: int, financial_data: FinancialDataUpdate, db: AsyncSession) -> FinancialData:
         """Обновление финансовых данных"""
         data = await ProfileService.get_financial_data(profile_id, db)
         if not data:
@@ -142,21 +150,20 @@ class ProfileService:
         for field, value in update_data.items():
             setattr(data, field, value)
 
-        db.commit()
-        db.refresh(data)
+        await db.flush()
         return data
 
     @staticmethod
-    async def get_bank_accounts(financial_data_id: int, db: Session) -> List[BankAccount]:
+    async def get_bank_accounts(financial_data_id: int, db: AsyncSession) -> List[BankAccount]:
         """Получение списка банковских счетов"""
-        accounts = db.query(BankAccount).filter(BankAccount.financial_data_id == financial_data_id).all()
-        return accounts
+        accounts = await db.scalars(select(BankAccount).where(BankAccount.financial_data_id == financial_data_id))
+        return list(accounts)
 
     @staticmethod
-    async def create_bank_account(financial_data_id: int, account_data: BankAccountCreate, db: Session) -> BankAccount:
+    async def create_bank_account(financial_data_id: int, account_data: BankAccountCreate, db: AsyncSession) -> BankAccount:
         """Создание банковского счета"""
         # Проверяем существование финансовых данных
-        financial_data = db.query(FinancialData).filter(FinancialData.id == financial_data_id).first()
+        financial_data = await db.scalar(select(FinancialData).where(FinancialData.id == financial_data_id))
         if not financial_data:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -165,10 +172,10 @@ class ProfileService:
 
         # Если новый счет помечен как основной, сбрасываем признак у остальных счетов
         if account_data.is_primary:
-            db.query(BankAccount).filter(
+            await db.execute(update(BankAccount).where(
                 BankAccount.financial_data_id == financial_data_id,
                 BankAccount.is_primary == True
-            ).update({"is_primary": False})
+            ).values(is_primary=False))
 
         # Создаем счет
         account = BankAccount(
@@ -177,15 +184,14 @@ class ProfileService:
         )
 
         db.add(account)
-        db.commit()
-        db.refresh(account)
+        await db.flush()
 
         return account
 
     @staticmethod
-    async def update_bank_account(account_id: int, account_data: BankAccountUpdate, db: Session) -> BankAccount:
+    async def update_bank_account(account_id: int, account_data: BankAccountUpdate, db: AsyncSession) -> BankAccount:
         """Обновление банковского счета"""
-        account = db.query(BankAccount).filter(BankAccount.id == account_id).first()
+        account = await db.scalar(select(BankAccount).where(BankAccount.id == account_id))
         if not account:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -194,30 +200,29 @@ class ProfileService:
 
         # Если счет помечается как основной, сбрасываем признак у остальных счетов
         if account_data.is_primary:
-            db.query(BankAccount).filter(
+            await db.execute(update(BankAccount).where(
                 BankAccount.financial_data_id == account.financial_data_id,
                 BankAccount.id != account_id,
                 BankAccount.is_primary == True
-            ).update({"is_primary": False})
+            ).values(is_primary=False))
 
         # Обновляем только переданные поля
         update_data = model_to_dict(account_data, exclude_unset=True)
         for field, value in update_data.items():
             setattr(account, field, value)
 
-        db.commit()
-        db.refresh(account)
+        await db.flush()
         return account
 
     @staticmethod
-    async def delete_bank_account(account_id: int, db: Session) -> None:
+    async def delete_bank_account(account_id: int, db: AsyncSession) -> None:
         """Удаление банковского счета"""
-        account = db.query(BankAccount).filter(BankAccount.id == account_id).first()
+        account = await db.scalar(select(BankAccount).where(BankAccount.id == account_id))
         if not account:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Bank account not found"
             )
 
-        db.delete(account)
-        db.commit()
\ No newline at end of file
+        await db.delete(account)
+        await db.flush()
\ No newline at end of file
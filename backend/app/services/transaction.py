@@ -1,29 +1,103 @@
 # app/services/transaction.py
-from typing import List, Optional, Dict, Tuple
-from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, or_
+from typing import List, Optional, Dict, Tuple, AsyncIterator
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy import select, insert, update, delete, func, and_, or_, case, cast, literal_column, Date
 from fastapi import HTTPException, status, UploadFile
-from datetime import datetime, date, timedelta
+from datetime import datetime, date, time, timedelta
+from decimal import Decimal
+from itertools import groupby
 import calendar
-from app.models.transaction import Transaction, PaymentMethodEnum
+from app.models.transaction import Transaction, TransactionArchive, PaymentMethodEnum
 from app.models.category import BudgetCategory, CategoryTypeEnum
-from app.schemas.transaction import TransactionCreate, TransactionUpdate, TransactionFilters, TransactionSummary
+from app.schemas.transaction import (
+    TransactionCreate, TransactionUpdate, TransactionFilters, TransactionSummary, BatchModeEnum,
+    TransactionBulkSelection, TransactionBulkUpdate,
+    CategoryStat, CategoryStatsResponse, SeriesPoint, TransactionSeriesResponse
+)
+import csv
+import enum
+import io
 import os
 import uuid
 from app.config import settings
+from app.database import bind_session_user
 from app.services.pydantic_helpers import model_to_dict
+from app.services.balance import BalanceService
+from app.services.archive import ArchiveService
+from app.services.category import CategoryService
+from app.utils.pagination import encode_cursor, decode_cursor
+from app.utils.json_response import dump_json
+from app.utils.money import from_minor, rollup, to_minor
+
+# Максимальное количество интервалов в ответе /transactions/stats/series
+MAX_SERIES_BUCKETS = 1000
+
+# Колонки ленты транзакций (поля TransactionWithCategory)
+TRANSACTION_LIST_KEYS = (
+    "id",
+    "user_id",
+    "amount",
+    "transaction_type",
+    "description",
+    "transaction_date",
+    "payment_method",
+    "is_recurring",
+    "note",
+    "category_id",
+    "category_name",
+    "category_icon",
+    "category_color",
+    "receipt_photo_url",
+    "created_at",
+    "updated_at",
+)
+# Колонки категории в ленте; остальные берутся из источника транзакций
+CATEGORY_LIST_COLUMNS = {
+    "category_name": BudgetCategory.name,
+    "category_icon": BudgetCategory.icon,
+    "category_color": BudgetCategory.color,
+}
+
+
+def _list_columns(source=Transaction) -> tuple:
+    """Колонки ленты для источника транзакций (Transaction или TransactionWithArchive)"""
+    return tuple(
+        CATEGORY_LIST_COLUMNS[key].label(key) if key in CATEGORY_LIST_COLUMNS else getattr(source, key)
+        for key in TRANSACTION_LIST_KEYS
+    )
+
+
+# Заголовки относительных секций ленты; остальные секции — по месяцам ("March 2024")
+SECTION_TITLES = {
+    "today": "Today",
+    "yesterday": "Yesterday",
+    "earlier_this_week": "Earlier This Week",
+    "this_month": "This Month",
+}
+
+# Размер порции строк при потоковой выгрузке
+EXPORT_BATCH_SIZE = 500
+
+
+def _csv_value(value):
+    """Значение колонки для CSV: перечисления — значением, даты — в ISO 8601, суммы — как в JSON"""
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
 
 
 class TransactionService:
     @staticmethod
-    async def create_transaction(user_id: int, transaction_data: TransactionCreate, db: Session) -> Transaction:
+    async def create_transaction(user_id: int, transaction_data: TransactionCreate, db: AsyncSession) -> Transaction:
         """Создание новой транзакции"""
         # Проверка существования категории, если она указана
         if transaction_data.category_id:
-            category = db.query(BudgetCategory).filter(
-                BudgetCategory.id == transaction_data.category_id,
-                BudgetCategory.user_id == user_id
-            ).first()
+            categories = await CategoryService.find_categories(user_id, [transaction_data.category_id], db)
+            category = categories.get(transaction_data.category_id)
 
             if not category:
                 raise HTTPException(
@@ -43,24 +117,114 @@ class TransactionService:
         transaction = Transaction(user_id=user_id, **transaction_dict)
 
         db.add(transaction)
-        db.commit()
-        db.refresh(transaction)
+        await BalanceService.apply_transaction_change(
+            user_id, db, new=(transaction.transaction_type, transaction.amount)
+        )
+        await db.flush()
 
         return transaction
 
     @staticmethod
-    async def get_transaction(transaction_id: int, user_id: int, db: Session) -> Optional[Transaction]:
-        """Получение транзакции по ID"""
-        return db.query(Transaction).filter(
-            Transaction.id == transaction_id,
-            Transaction.user_id == user_id
-        ).first()
+    async def create_transactions_batch(user_id: int, items: List[TransactionCreate], db: AsyncSession,
+                                        mode: BatchModeEnum = BatchModeEnum.ATOMIC) -> List[Dict]:
+        """
+        Пакетное создание транзакций.
+
+        Категории всех элементов проверяются по карте категорий, строки
+        вставляются одним многострочным INSERT ... RETURNING, баланс
+        обновляется один раз на пакет. Возвращает результат для каждого
+        элемента в порядке запроса. В режиме atomic любая ошибка отменяет
+        пакет целиком (HTTP 400 со списком ошибок).
+        """
+        categories = {}
+        category_ids = {item.category_id for item in items if item.category_id}
+        if category_ids:
+            categories = await CategoryService.find_categories(user_id, category_ids, db)
+
+        results = []
+        rows = []
+        for index, item in enumerate(items):
+            error = None
+            if item.category_id:
+                category = categories.get(item.category_id)
+                if category is None:
+                    error = "Category not found"
+                elif category.category_type != item.transaction_type:
+                    error = f"Cannot use {category.category_type} category for {item.transaction_type} transaction"
+
+            if error:
+                results.append({"index": index, "status": "failed", "transaction": None, "error": error})
+            else:
+                row = {"user_id": user_id, **model_to_dict(item)}
+                rows.append(row)
+                results.append({"index": index, "status": "created", "transaction": row, "error": None})
+
+        failed = [result for result in results if result["status"] == "failed"]
+        if failed and mode == BatchModeEnum.ATOMIC:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail={
+                    "message": "Batch rejected, no transactions were created",
+                    "errors": [{"index": result["index"], "error": result["error"]} for result in failed]
+                }
+            )
+
+        if not rows:
+            return results
+
+        # Строки RETURNING сопоставляются с элементами пакета по порядку.
+        # PostgreSQL гарантирует его через sort_by_parameter_order. Для SQLite
+        # SQLAlchemy в этом режиме вставляет по одной строке, поэтому там пакет
+        # вставляется многострочным INSERT, а порядок восстанавливается по id:
+        # rowid выдаются по возрастанию в порядке строк VALUES
+        ordered_returning = db.get_bind().dialect.name != "sqlite"
+        created = (await db.execute(
+            insert(Transaction).returning(
+                Transaction.id, Transaction.created_at, sort_by_parameter_order=ordered_returning
+            ),
+            rows
+        )).all()
+        if not ordered_returning:
+            created.sort(key=lambda returned: returned.id)
+
+        for row, (transaction_id, created_at) in zip(rows, created):
+            # Строки ответа дополняются значениями, которые вернул INSERT
+            row.update(id=transaction_id, created_at=created_at, updated_at=None, receipt_photo_url=None)
+
+        income_delta, expense_delta = TransactionService._type_totals(
+            [(row["transaction_type"], row["amount"]) for row in rows]
+        )
+        await BalanceService.apply_delta(user_id, income_delta, expense_delta, len(rows), db)
+
+        return results
+
+    @staticmethod
+    async def get_transaction(transaction_id: int, user_id: int, db: AsyncSession) -> Optional[Transaction]:
+        """Получение транзакции по ID (включая архивные, только для чтения)"""
+        source = await ArchiveService.get_source(user_id, None, db)
+        return await db.scalar(select(source).where(
+            source.id == transaction_id,
+            source.user_id == user_id
+        ))
+
+    @staticmethod
+    async def _get_for_change(transaction_id: int, user_id: int, db: AsyncSession) -> Optional[Transaction]:
+        """Транзакция для изменения: архивная сначала возвращается в рабочую таблицу"""
+        query = select(Transaction).where(Transaction.id == transaction_id, Transaction.user_id == user_id)
+        transaction = await db.scalar(query)
+        if transaction is None and await ArchiveService.reaches_archive(user_id, None, db):
+            if await ArchiveService.restore(select(TransactionArchive.id).where(
+                TransactionArchive.id == transaction_id,
+                TransactionArchive.user_id == user_id
+            ), db):
+                transaction = await db.scalar(query)
+        return transaction
 
     @staticmethod
     async def update_transaction(transaction_id: int, user_id: int, transaction_data: TransactionUpdate,
-                                 db: Session) -> Transaction:
+                                 db: AsyncSession) -> Transaction:
         """Обновление транзакции"""
-        transaction = await TransactionService.get_transaction(transaction_id, user_id, db)
+        transaction = await TransactionService._get_for_change(transaction_id, user_id, db)
         if not transaction:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -70,10 +234,8 @@ class TransactionService:
         # Проверка категории, если она обновляется
         if transaction_data.category_id is not None:
             if transaction_data.category_id > 0:
-                category = db.query(BudgetCategory).filter(
-                    BudgetCategory.id == transaction_data.category_id,
-                    BudgetCategory.user_id == user_id
-                ).first()
+                categories = await CategoryService.find_categories(user_id, [transaction_data.category_id], db)
+                category = categories.get(transaction_data.category_id)
 
                 if not category:
                     raise HTTPException(
@@ -90,160 +252,492 @@ class TransactionService:
                     )
 
         # Обновляем только переданные поля
+        old_contribution = (transaction.transaction_type, transaction.amount)
         update_data = model_to_dict(transaction_data, exclude_unset=True)
         for field, value in update_data.items():
             setattr(transaction, field, value)
 
-        db.commit()
-        db.refresh(transaction)
+        await BalanceService.apply_transaction_change(
+            user_id, db, old=old_contribution, new=(transaction.transaction_type, transaction.amount)
+        )
+        await db.flush()
         return transaction
 
     @staticmethod
-    async def delete_transaction(transaction_id: int, user_id: int, db: Session) -> None:
+    async def delete_transaction(transaction_id: int, user_id: int, db: AsyncSession) -> None:
         """Удаление транзакции"""
-        transaction = await TransactionService.get_transaction(transaction_id, user_id, db)
+        transaction = await TransactionService._get_for_change(transaction_id, user_id, db)
         if not transaction:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Transaction not found"
             )
 
-        db.delete(transaction)
-        db.commit()
+        await db.delete(transaction)
+        await BalanceService.apply_transaction_change(
+            user_id, db, old=(transaction.transaction_type, transaction.amount)
+        )
+        await db.flush()
+
+    @staticmethod
+    async def bulk_update_transactions(user_id: int, bulk: TransactionBulkUpdate, db: AsyncSession) -> int:
+        """
+        Массовое изменение транзакций одним UPDATE по выбору (id и/или фильтры).
+
+        Сумма и тип не меняются, поэтому баланс остается прежним. Новая
+        категория должна подходить по типу всем выбранным транзакциям.
+        Выбранные архивные транзакции возвращаются в рабочую таблицу.
+        Возвращает количество измененных строк.
+        """
+        changes = model_to_dict(bulk.changes, exclude_unset=True)
+        if not changes:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="No changes provided"
+            )
+        await TransactionService._restore_selection(user_id, bulk, db)
+
+        category_id = changes.get("category_id")
+        if category_id is not None:
+            categories = await CategoryService.find_categories(user_id, [category_id], db)
+            category = categories.get(category_id)
+            if not category:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Category not found"
+                )
+
+            mismatched = await db.scalar(TransactionService._bulk_scope(
+                select(func.count()).select_from(Transaction), user_id, bulk
+            ).where(Transaction.transaction_type != category.category_type))
+            if mismatched:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Cannot use {category.category_type} category for {mismatched} selected "
+                           f"transaction(s) of another type"
+                )
+
+        result = await db.execute(
+            TransactionService._bulk_scope(update(Transaction), user_id, bulk)
+            .values(**changes)
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount
+
+    @staticmethod
+    async def bulk_delete_transactions(user_id: int, selection: TransactionBulkSelection, db: AsyncSession) -> int:
+        """
+        Массовое удаление транзакций одним DELETE по выбору (id и/или фильтры).
+
+        DELETE ... RETURNING возвращает тип и сумму именно удаленных строк,
+        по ним баланс уменьшается одним обновлением. Выбранные архивные
+        транзакции удаляются вместе с рабочими. Возвращает количество
+        удаленных строк.
+        """
+        await TransactionService._restore_selection(user_id, selection, db)
+        deleted = (await db.execute(
+            TransactionService._bulk_scope(delete(Transaction), user_id, selection)
+            .returning(Transaction.transaction_type, Transaction.amount)
+            .execution_options(synchronize_session=False)
+        )).all()
+        if not deleted:
+            return 0
+
+        income_total, expense_total = TransactionService._type_totals(deleted)
+        await BalanceService.apply_delta(user_id, -income_total, -expense_total, -len(deleted), db)
+
+        return len(deleted)
+
+    @staticmethod
+    def _type_totals(contributions: List[Tuple[CategoryTypeEnum, Decimal]]) -> Tuple[Decimal, Decimal]:
+        """Точные суммы доходов и расходов пакета (целыми минорными единицами)"""
+        totals = rollup(
+            [transaction_type == CategoryTypeEnum.INCOME for transaction_type, _ in contributions],
+            [to_minor(amount) for _, amount in contributions]
+        )
+        return from_minor(totals.get(True, 0)), from_minor(totals.get(False, 0))
+
+    @staticmethod
+    def _bulk_scope(statement, user_id: int, selection: TransactionBulkSelection, source=Transaction):
+        """Ограничение запроса (SELECT/UPDATE/DELETE) транзакциями пользователя из выбора"""
+        statement = statement.where(source.user_id == user_id)
+        if selection.ids:
+            statement = statement.where(source.id.in_(selection.ids))
+        return TransactionService._apply_filters(statement, selection.filters, source)
+
+    @staticmethod
+    async def _restore_selection(user_id: int, selection: TransactionBulkSelection, db: AsyncSession) -> None:
+        """Возврат архивных транзакций из выбора в рабочую таблицу перед массовой операцией"""
+        start_date = selection.filters.start_date if selection.filters else None
+        if await ArchiveService.reaches_archive(user_id, start_date, db):
+            await ArchiveService.restore(TransactionService._bulk_scope(
+                select(TransactionArchive.id), user_id, selection, TransactionArchive
+            ), db)
 
     @staticmethod
     async def get_transactions(user_id: int, filters: Optional[TransactionFilters] = None,
-                               skip: int = 0, limit: int = 100, db: Session = None) -> Tuple[
-        List[Dict], TransactionSummary]:
-        """Получение списка транзакций с применением фильтров"""
-        # Базовый запрос для транзакций
-        query = db.query(
-            Transaction,
-            BudgetCategory.name.label("category_name"),
-            BudgetCategory.icon.label("category_icon"),
-            BudgetCategory.color.label("category_color")
+                               skip: int = 0, limit: int = 100, db: AsyncSession = None,
+                               cursor: Optional[str] = None, include_summary: bool = True) -> Tuple[
+        List[Dict], Optional[TransactionSummary], Optional[str]]:
+        """
+        Получение списка транзакций с применением фильтров.
+
+        Если передан cursor, страница выбирается по ключу (transaction_date, id)
+        после позиции курсора, а skip игнорируется. Третьим элементом
+        возвращается курсор следующей страницы (None, если записей больше нет).
+        При include_summary=False итоги не считаются и вместо них возвращается None.
+        Архив читается, только если диапазон фильтров до него доходит.
+        """
+        source = await ArchiveService.get_source(user_id, filters.start_date if filters else None, db)
+        query = TransactionService._list_query(user_id, filters, cursor, source=source)
+
+        # Применение пагинации: берем на одну запись больше, чтобы понять, есть ли следующая страница
+        if not cursor and skip:
+            query = query.offset(skip)
+        results = (await db.execute(query.limit(limit + 1))).all()
+
+        next_cursor = None
+        if len(results) > limit:
+            results = results[:limit]
+            last_row = results[-1]
+            next_cursor = encode_cursor(last_row.transaction_date, last_row.id)
+
+        # Кортежи сразу превращаются в словари по именам колонок
+        transactions = [dict(zip(TRANSACTION_LIST_KEYS, row)) for row in results]
+
+        # Статистика по тем же фильтрам (без учета пагинации)
+        summary = None
+        if include_summary:
+            summary = await TransactionService.get_transactions_summary(user_id, filters, db)
+
+        return transactions, summary, next_cursor
+
+    @staticmethod
+    def _list_query(user_id: int, filters: Optional[TransactionFilters], cursor: Optional[str], *extra_columns,
+                    source=Transaction):
+        """Запрос ленты: колонки, фильтры, keyset-условие по курсору и сортировка"""
+        # Базовый запрос: только нужные колонки, без создания ORM-объектов
+        query = select(
+            *_list_columns(source), *extra_columns
         ).outerjoin(
-            BudgetCategory, Transaction.category_id == BudgetCategory.id
+            BudgetCategory, source.category_id == BudgetCategory.id
         ).filter(
-            Transaction.user_id == user_id
+            source.user_id == user_id
         )
 
         # Применение фильтров
-        if filters:
-            if filters.start_date:
-                start_date = datetime.combine(filters.start_date, datetime.min.time())
-                query = query.filter(Transaction.transaction_date >= start_date)
-
-            if filters.end_date:
-                end_date = datetime.combine(filters.end_date, datetime.max.time())
-                query = query.filter(Transaction.transaction_date <= end_date)
-
-            if filters.transaction_type:
-                query = query.filter(Transaction.transaction_type == filters.transaction_type)
-
-            if filters.category_ids:
-                query = query.filter(Transaction.category_id.in_(filters.category_ids))
-
-            if filters.min_amount is not None:
-                query = query.filter(Transaction.amount >= filters.min_amount)
-
-            if filters.max_amount is not None:
-                query = query.filter(Transaction.amount <= filters.max_amount)
-
-            if filters.payment_method:
-                query = query.filter(Transaction.payment_method == filters.payment_method)
-
-        # Сортировка по дате (новые сначала)
-        query = query.order_by(Transaction.transaction_date.desc())
-
-        # Получение итогов для статистики
-        total_income = db.query(func.sum(Transaction.amount)).filter(
-            Transaction.user_id == user_id,
-            Transaction.transaction_type == CategoryTypeEnum.INCOME
-        ).scalar() or 0.0
-
-        total_expense = db.query(func.sum(Transaction.amount)).filter(
-            Transaction.user_id == user_id,
-            Transaction.transaction_type == CategoryTypeEnum.EXPENSE
-        ).scalar() or 0.0
-
-        # Применение пагинации
-        results = query.offset(skip).limit(limit).all()
-
-        # Форматирование результатов в словари
-        transactions = []
-        for transaction, category_name, category_icon, category_color in results:
-            transaction_dict = {
-                "id": transaction.id,
-                "user_id": transaction.user_id,
-                "amount": transaction.amount,
-                "transaction_type": transaction.transaction_type,
-                "description": transaction.description,
-                "transaction_date": transaction.transaction_date,
-                "payment_method": transaction.payment_method,
-                "is_recurring": transaction.is_recurring,
-                "note": transaction.note,
-                "category_id": transaction.category_id,
-                "category_name": category_name,
-                "category_icon": category_icon,
-                "category_color": category_color,
-                "receipt_photo_url": transaction.receipt_photo_url,
-                "created_at": transaction.created_at,
-                "updated_at": transaction.updated_at
-            }
-            transactions.append(transaction_dict)
-
-        # Создание объекта со статистикой
-        summary = TransactionSummary(
+        query = TransactionService._apply_filters(query, filters, source)
+
+        # Keyset-условие: строго после позиции курсора в порядке (дата, id) по убыванию
+        if cursor:
+            cursor_date, cursor_id = decode_cursor(cursor)
+            query = query.filter(or_(
+                source.transaction_date < cursor_date,
+                and_(source.transaction_date == cursor_date, source.id < cursor_id)
+            ))
+
+        # Сортировка по дате (новые сначала), id — для стабильного порядка при равных датах
+        return query.order_by(source.transaction_date.desc(), source.id.desc())
+
+    @staticmethod
+    async def get_transactions_summary(user_id: int, filters: Optional[TransactionFilters],
+                                       db: AsyncSession) -> TransactionSummary:
+        """Итоги по транзакциям с учетом фильтров одним запросом с условной агрегацией"""
+        source = await ArchiveService.get_source(user_id, filters.start_date if filters else None, db)
+        query = select(
+            func.coalesce(func.sum(case(
+                (source.transaction_type == CategoryTypeEnum.INCOME, source.amount),
+                else_=0
+            )), 0),
+            func.coalesce(func.sum(case(
+                (source.transaction_type == CategoryTypeEnum.EXPENSE, source.amount),
+                else_=0
+            )), 0),
+            func.count(source.id)
+        ).filter(
+            source.user_id == user_id
+        )
+        query = TransactionService._apply_filters(query, filters, source)
+
+        total_income, total_expense, transaction_count = (await db.execute(query)).one()
+
+        return TransactionSummary(
             total_income=total_income,
             total_expense=total_expense,
-            net_balance=total_income - total_expense
+            net_balance=total_income - total_expense,
+            transaction_count=transaction_count
+        )
+
+    @staticmethod
+    async def get_category_stats(user_id: int, filters: TransactionFilters, db: AsyncSession) -> CategoryStatsResponse:
+        """Суммы и количество транзакций по категориям одним GROUP BY (для графиков)"""
+        source = await ArchiveService.get_source(user_id, filters.start_date, db)
+        total_amount = func.sum(source.amount)
+        query = select(
+            source.category_id,
+            BudgetCategory.name,
+            BudgetCategory.icon,
+            BudgetCategory.color,
+            total_amount,
+            func.count(source.id)
+        ).outerjoin(
+            BudgetCategory, source.category_id == BudgetCategory.id
+        ).filter(
+            source.user_id == user_id
+        )
+        query = TransactionService._apply_filters(query, filters, source)
+        rows = (await db.execute(query.group_by(
+            source.category_id,
+            BudgetCategory.name,
+            BudgetCategory.icon,
+            BudgetCategory.color
+        ).order_by(total_amount.desc()))).all()
+
+        grand_total = sum(row[4] for row in rows)
+        categories = [
+            CategoryStat(
+                category_id=category_id,
+                category_name=name,
+                category_icon=icon,
+                category_color=color,
+                total_amount=amount,
+                transaction_count=count,
+                share=float(amount / grand_total) if grand_total else 0.0
+            )
+            for category_id, name, icon, color, amount, count in rows
+        ]
+
+        return CategoryStatsResponse(
+            transaction_type=filters.transaction_type,
+            total_amount=grand_total,
+            transaction_count=sum(category.transaction_count for category in categories),
+            categories=categories
         )
 
-        return transactions, summary
+    @staticmethod
+    def _apply_filters(query, filters: Optional[TransactionFilters], source=Transaction):
+        """Применение TransactionFilters к запросу по транзакциям (source — Transaction, TransactionWithArchive или TransactionArchive)"""
+        if not filters:
+            return query
+
+        if filters.start_date:
+            start_date = datetime.combine(filters.start_date, datetime.min.time())
+            query = query.filter(source.transaction_date >= start_date)
+
+        if filters.end_date:
+            end_date = datetime.combine(filters.end_date, datetime.max.time())
+            query = query.filter(source.transaction_date <= end_date)
+
+        if filters.transaction_type:
+            query = query.filter(source.transaction_type == filters.transaction_type)
+
+        if filters.category_ids:
+            query = query.filter(source.category_id.in_(filters.category_ids))
+
+        if filters.min_amount is not None:
+            query = query.filter(source.amount >= filters.min_amount)
+
+        if filters.max_amount is not None:
+            query = query.filter(source.amount <= filters.max_amount)
+
+        if filters.payment_method:
+            query = query.filter(source.payment_method == filters.payment_method)
+
+        return query
+
+    @staticmethod
+    async def export_transactions(user_id: int, export_format: str,
+                                  session_factory: async_sessionmaker) -> AsyncIterator[bytes]:
+        """
+        Потоковая выгрузка всей истории транзакций в NDJSON или CSV.
+
+        Строки читаются курсором на стороне сервера порциями по
+        EXPORT_BATCH_SIZE и отдаются по мере чтения, поэтому память не растет
+        с размером истории. Зависимость get_db закрывает сессию запроса до
+        начала отправки тела, поэтому генератор открывает собственную сессию
+        из session_factory (только для чтения) и закрывает ее в конце или при
+        обрыве. Выгружается вся история, вместе с архивом.
+        """
+        if export_format == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+
+            def encode(rows):
+                writer.writerows([_csv_value(value) for value in row] for row in rows)
+                chunk = buffer.getvalue().encode("utf-8")
+                buffer.seek(0)
+                buffer.truncate()
+                return chunk
+
+            # Заголовок уходит клиенту до выполнения запроса
+            yield encode([TRANSACTION_LIST_KEYS])
+        else:
+            def encode(rows):
+                return b"".join(dump_json(dict(zip(TRANSACTION_LIST_KEYS, row))) + b"\n" for row in rows)
+
+        db = session_factory()
+        try:
+            db.info["read_only"] = True
+            bind_session_user(db, user_id)
+            source = await ArchiveService.get_source(user_id, None, db)
+            query = select(
+                *_list_columns(source)
+            ).outerjoin(
+                BudgetCategory, source.category_id == BudgetCategory.id
+            ).filter(
+                source.user_id == user_id
+            ).order_by(
+                source.transaction_date.desc(), source.id.desc()
+            ).execution_options(yield_per=EXPORT_BATCH_SIZE)
+
+            result = await db.stream(query)
+            async for batch in result.partitions():
+                yield encode(batch)
+        finally:
+            await db.close()
 
     @staticmethod
     async def get_transactions_by_period(user_id: int, period: str, date_param: Optional[date] = None,
-                                         db: Session = None) -> Tuple[List[Dict], TransactionSummary]:
-        """Получение транзакций за определенный период (день/неделя/месяц/год)"""
-        today = date_param or date.today()
+                                         db: AsyncSession = None, limit: int = 100,
+                                         cursor: Optional[str] = None) -> Tuple[
+        List[Dict], Optional[TransactionSummary], Optional[str]]:
+        """
+        Получение транзакций за определенный период (день/неделя/месяц/год/все).
+
+        Период отдается постранично: следующая страница запрашивается по
+        курсору из предыдущего ответа. Итоги за весь период считаются
+        агрегатом только для первой страницы; на страницах продолжения
+        вместо них возвращается None.
+        """
+        filters = None
+        bounds = TransactionService._period_bounds(period, date_param or date.today())
+        if bounds is not None:
+            # Создаем фильтр на основе периода (для "all" — все транзакции)
+            start_date, end_date = bounds
+            filters = TransactionFilters(
+                start_date=start_date,
+                end_date=end_date
+            )
 
-        # Определение начальной и конечной даты периода
+        return await TransactionService.get_transactions(
+            user_id, filters, 0, limit, db, cursor=cursor, include_summary=cursor is None
+        )
+
+    @staticmethod
+    def _period_bounds(period: str, today: date) -> Optional[Tuple[date, date]]:
+        """Первый и последний день периода (день/неделя/месяц/год), содержащего дату; None для прочих"""
         if period == "day":
-            start_date = today
-            end_date = today
-        elif period == "week":
-            # Начало недели (понедельник)
+            return today, today
+        if period == "week":
+            # Начало недели (понедельник), конец недели (воскресенье)
             start_date = today - timedelta(days=today.weekday())
-            # Конец недели (воскресенье)
-            end_date = start_date + timedelta(days=6)
-        elif period == "month":
-            # Первый день месяца
-            start_date = date(today.year, today.month, 1)
-            # Последний день месяца
+            return start_date, start_date + timedelta(days=6)
+        if period == "month":
+            # Первый и последний день месяца
             last_day = calendar.monthrange(today.year, today.month)[1]
-            end_date = date(today.year, today.month, last_day)
-        elif period == "year":
-            # Первый день года
-            start_date = date(today.year, 1, 1)
-            # Последний день года
-            end_date = date(today.year, 12, 31)
-        else:
-            # По умолчанию все транзакции
-            return await TransactionService.get_transactions(user_id, None, 0, 1000, db)
+            return date(today.year, today.month, 1), date(today.year, today.month, last_day)
+        if period == "year":
+            # Первый и последний день года
+            return date(today.year, 1, 1), date(today.year, 12, 31)
+        return None
+
+    @staticmethod
+    async def get_transactions_series(user_id: int, bucket: str, date_from: date, date_to: date,
+                                      db: AsyncSession) -> TransactionSeriesResponse:
+        """
+        Доходы, расходы и баланс по интервалам (день/неделя/месяц/год) одним GROUP BY.
+
+        Границы интервалов совпадают с get_transactions_by_period: неделя
+        начинается с понедельника, месяц и год — с первого числа. Диапазон
+        расширяется до целых интервалов, пустые интервалы заполняются нулями.
+        """
+        start_date = TransactionService._period_bounds(bucket, date_from)[0]
+        end_date = TransactionService._period_bounds(bucket, date_to)[1]
+
+        bucket_starts = []
+        bucket_start = start_date
+        while bucket_start <= end_date:
+            bucket_starts.append(bucket_start)
+            if len(bucket_starts) > MAX_SERIES_BUCKETS:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Too many buckets in range, maximum is {MAX_SERIES_BUCKETS}"
+                )
+            bucket_start = TransactionService._period_bounds(bucket, bucket_start)[1] + timedelta(days=1)
 
-        # Создаем фильтр на основе периода
-        filters = TransactionFilters(
+        source = await ArchiveService.get_source(user_id, start_date, db)
+        bucket_key = TransactionService._bucket_start_expression(
+            bucket, db.get_bind().dialect.name, source.transaction_date
+        )
+        query = select(
+            bucket_key,
+            func.coalesce(func.sum(case(
+                (source.transaction_type == CategoryTypeEnum.INCOME, source.amount),
+                else_=0
+            )), 0),
+            func.coalesce(func.sum(case(
+                (source.transaction_type == CategoryTypeEnum.EXPENSE, source.amount),
+                else_=0
+            )), 0),
+            func.count(source.id)
+        ).filter(
+            source.user_id == user_id
+        )
+        query = TransactionService._apply_filters(
+            query, TransactionFilters(start_date=start_date, end_date=end_date), source
+        )
+
+        totals = {}
+        for key, income, expense, count in (await db.execute(query.group_by(bucket_key))).all():
+            # SQLite возвращает дату строкой, PostgreSQL — объектом date
+            if isinstance(key, str):
+                key = date.fromisoformat(key)
+            totals[key] = (income, expense, count)
+
+        points = []
+        for bucket_start in bucket_starts:
+            income, expense, count = totals.get(bucket_start, (Decimal(0), Decimal(0), 0))
+            points.append(SeriesPoint(
+                bucket_start=bucket_start,
+                total_income=income,
+                total_expense=expense,
+                net_balance=income - expense,
+                transaction_count=count
+            ))
+
+        return TransactionSeriesResponse(
+            bucket=bucket,
             start_date=start_date,
-            end_date=end_date
+            end_date=end_date,
+            points=points
         )
 
-        return await TransactionService.get_transactions(user_id, filters, 0, 1000, db)
+    @staticmethod
+    def _bucket_start_expression(bucket: str, dialect_name: str, transaction_date=Transaction.transaction_date):
+        """
+        SQL-выражение начала интервала для даты транзакции.
+
+        Аргументы передаются литералами, а не параметрами: иначе PostgreSQL
+        не сопоставит выражение в SELECT с тем же выражением в GROUP BY.
+        """
+        if dialect_name == "sqlite":
+            modifiers = {
+                "day": (),
+                # Назад на 6 дней и вперед до ближайшего понедельника
+                "week": ("'-6 days'", "'weekday 1'"),
+                "month": ("'start of month'",),
+                "year": ("'start of year'",),
+            }[bucket]
+            return func.date(transaction_date, *map(literal_column, modifiers))
+
+        # PostgreSQL: date_trunc('week') тоже начинает неделю с понедельника
+        field = {"day": "'day'", "week": "'week'", "month": "'month'", "year": "'year'"}[bucket]
+        return cast(func.date_trunc(literal_column(field), transaction_date), Date)
 
     @staticmethod
-    async def upload_receipt_photo(transaction_id: int, user_id: int, file: UploadFile, db: Session) -> str:
+    async def upload_receipt_photo(transaction_id: int, user_id: int, file: UploadFile, db: AsyncSession) -> str:
         """Загрузка фото чека для транзакции"""
-        transaction = await TransactionService.get_transaction(transaction_id, user_id, db)
+        transaction = await TransactionService._get_for_change(transaction_id, user_id, db)
         if not transaction:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -269,48 +763,72 @@ class TransactionService:
 
         # Обновляем информацию о транзакции
         transaction.receipt_photo_url = relative_path
-        db.commit()
+        await db.flush()
 
         return relative_path
 
     @staticmethod
-    async def group_transactions_by_date(transactions: List[Dict]) -> List[Dict]:
-        """Группировка транзакций по дате для вывода в формате секций"""
-        result = {}
-
-        for transaction in transactions:
-            # Форматируем дату
-            transaction_date = transaction["transaction_date"]
-            today = datetime.now().date()
-
-            if transaction_date.date() == today:
-                date_key = "Today"
-            elif transaction_date.date() == today - timedelta(days=1):
-                date_key = "Yesterday"
-            elif transaction_date.date() >= today - timedelta(days=7):
-                date_key = "Earlier This Week"
-            elif transaction_date.date().month == today.month:
-                date_key = "This Month"
-            else:
-                # Форматируем дату как "Месяц Год"
-                date_key = transaction_date.strftime("%B %Y")
-
-            # Добавляем в соответствующую секцию
-            if date_key not in result:
-                result[date_key] = []
-
-            result[date_key].append(transaction)
-
-        # Преобразуем в формат секций для SectionList
+    async def get_transactions_grouped(user_id: int, limit: int = 100, cursor: Optional[str] = None,
+                                       db: AsyncSession = None, today: Optional[date] = None,
+                                       skip: int = 0) -> Tuple[
+        List[Dict], Optional[str]]:
+        """
+        Страница ленты, разбитая на секции по датам (для SectionList).
+
+        Ключ секции вычисляется в запросе относительно одного "сегодня" на весь
+        запрос: today, yesterday, earlier_this_week (последние 7 дней),
+        this_month (с начала текущего месяца текущего года), иначе YYYY-MM.
+        Страницы идут по курсору (или по смещению skip для старого контракта
+        /grouped); секция, не поместившаяся в страницу, продолжается на
+        следующей с тем же key.
+        """
+        source = await ArchiveService.get_source(user_id, None, db)
+        section_key = TransactionService._section_key_expression(
+            today or date.today(), db.get_bind().dialect.name, source.transaction_date
+        ).label("section_key")
+        query = TransactionService._list_query(user_id, None, cursor, section_key, source=source)
+
+        results = (await db.execute(query.offset(skip).limit(limit + 1))).all()
+
+        next_cursor = None
+        if len(results) > limit:
+            results = results[:limit]
+            last_row = results[-1]
+            next_cursor = encode_cursor(last_row.transaction_date, last_row.id)
+
+        # Строки уже упорядочены по дате, поэтому каждая секция — непрерывный отрезок
         sections = []
-        for title, data in result.items():
+        for key, rows in groupby(results, key=lambda row: row.section_key):
             sections.append({
-                "title": title,
-                "data": data
+                "key": key,
+                "title": TransactionService._section_title(key),
+                "data": [dict(zip(TRANSACTION_LIST_KEYS, row)) for row in rows]
             })
 
-        # Сортируем секции в порядке: Today, Yesterday, Earlier This Week, This Month, и затем по убыванию даты
-        section_order = {"Today": 0, "Yesterday": 1, "Earlier This Week": 2, "This Month": 3}
-        sections.sort(key=lambda x: section_order.get(x["title"], 4))
+        return sections, next_cursor
 
-        return sections
\ No newline at end of file
+    @staticmethod
+    def _section_key_expression(today: date, dialect_name: str, transaction_date=Transaction.transaction_date):
+        """SQL-выражение ключа секции для транзакции относительно даты today"""
+        today_start = datetime.combine(today, time.min)
+        if dialect_name == "sqlite":
+            month_key = func.strftime("%Y-%m", transaction_date)
+        else:
+            month_key = func.to_char(transaction_date, "YYYY-MM")
+
+        # Будущие даты попадают в "today", как ближайшую секцию
+        return case(
+            (transaction_date >= today_start, "today"),
+            (transaction_date >= today_start - timedelta(days=1), "yesterday"),
+            (transaction_date >= today_start - timedelta(days=7), "earlier_this_week"),
+            (transaction_date >= today_start.replace(day=1), "this_month"),
+            else_=month_key
+        )
+
+    @staticmethod
+    def _section_title(key: str) -> str:
+        """Заголовок секции по ее ключу"""
+        if key in SECTION_TITLES:
+            return SECTION_TITLES[key]
+        # Форматируем ключ YYYY-MM как "Месяц Год"
+        return datetime.strptime(key, "%Y-%m").strftime("%B %Y")
@@ -1,26 +1,28 @@
 # app/services/user.py
 from typing import Optional
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException, status
 from app.models.user import User
 from app.schemas.user import UserUpdate, UserPersonalInfo
+from app.utils.principal_cache import invalidate_principal
 from app.utils.security import SecurityUtils
 from datetime import datetime
 
 
 class UserService:
     @staticmethod
-    async def get_user_by_id(user_id: int, db: Session) -> Optional[User]:
+    async def get_user_by_id(user_id: int, db: AsyncSession) -> Optional[User]:
         """Получить пользователя по ID"""
-        return db.query(User).filter(User.id == user_id).first()
+        return await db.scalar(select(User).where(User.id == user_id))
 
     @staticmethod
-    async def get_user_by_email(email: str, db: Session) -> Optional[User]:
+    async def get_user_by_email(email: str, db: AsyncSession) -> Optional[User]:
         """Получить пользователя по email"""
-        return db.query(User).filter(User.email == email).first()
+        return await db.scalar(select(User).where(User.email == email))
 
     @staticmethod
-    async def get_personal_info(user_id: int, db: Session) -> UserPersonalInfo:
+    async def get_personal_info(user_id: int, db: AsyncSession) -> UserPersonalInfo:
         """Получить персональную информацию пользователя"""
         user = await UserService.get_user_by_id(user_id, db)
         if not user:
@@ -39,7 +41,7 @@ class UserService:
         )
 
     @staticmethod
-    async def update_user(user_id: int, user_update: UserUpdate, db: Session) -> User:
+    async def update_user(user_id: int, user_update: UserUpdate, db: AsyncSession) -> User:
         """Обновить данные пользователя"""
         user = await UserService.get_user_by_id(user_id, db)
         if not user:
@@ -56,12 +58,12 @@ class UserService:
         # Обновляем время изменения
         user.updated_at = datetime.utcnow()
 
-        db.commit()
-        db.refresh(user)
+        invalidate_principal(db, user_id)
+        await db.flush()
         return user
 
     @staticmethod
-    async def delete_user(user_id: int, db: Session) -> None:
+    async def delete_user(user_id: int, db: AsyncSession) -> None:
         """Удалить пользователя"""
         user = await UserService.get_user_by_id(user_id, db)
         if not user:
@@ -72,10 +74,11 @@ class UserService:
 
         # Мягкое удаление - деактивация аккаунта
         user.is_active = False
-        db.commit()
+        invalidate_principal(db, user_id)
+        await db.flush()
 
     @staticmethod
-    async def verify_email(token: str, db: Session) -> None:
+    async def verify_email(token: str, db: AsyncSession) -> None:
         """Подтвердить email пользователя"""
         # Здесь должна быть логика проверки токена верификации
         pass
@@ -85,7 +88,7 @@ class UserService:
             user_id: int,
             current_password: str,
             new_password: str,
-            db: Session
+            db: AsyncSession
     ) -> None:
         """Изменить пароль пользователя"""
         user = await UserService.get_user_by_id(user_id, db)
@@ -119,4 +122,5 @@ class UserService:
 
         # Обновляем пароль
         user.hashed_password = SecurityUtils.get_password_hash(new_password)
-        db.commit()
\ No newline at end of file
+        invalidate_principal(db, user_id)
+        await db.flush()
\ No newline at end of file
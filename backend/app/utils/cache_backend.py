@@ -0,0 +1,420 @@
+# app/utils/cache_backend.py
+"""
+Бэкенд кэша, общий для воркеров, и шина инвалидации.
+
+CACHE_BACKEND выбирает реализацию:
+  memory — LRU-словарь с TTL в памяти процесса (по умолчанию; при одном
+           воркере или в тестах);
+  redis  — сервер с протоколом Redis (RESP) по CACHE_REDIS_URL: значения
+           общие для всех воркеров, инвалидации рассылаются через PUBLISH.
+
+Бэкенд хранит байтовые значения с TTL (get/set/delete) и пересылает
+сообщения каналов (publish/subscribe). Ошибки сети не прерывают запрос:
+чтение считается промахом, запись и рассылка пропускаются (в лог), а
+устаревшие записи живут не дольше своего TTL.
+
+Кэши, которые читаются на каждом запросе и должны оставаться в памяти
+воркера (проверенные JWT, карты категорий, версии данных), сообщают об
+изменениях через invalidation_bus: каждый воркер применяет сообщение
+к своей копии, собственные сообщения пропускаются.
+"""
+import asyncio
+import logging
+import secrets
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+from urllib.parse import unquote, urlparse
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+MessageHandler = Callable[[str], None]
+
+
+class CacheBackend(ABC):
+    """Интерфейс бэкенда: значения с TTL и каналы сообщений"""
+
+    # Видят ли значения и сообщения другие процессы
+    shared = False
+
+    def __init__(self):
+        self._handlers: Dict[str, List[MessageHandler]] = {}
+        self._tasks = set()
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[bytes]:
+        """Значение ключа или None (нет, истек TTL, бэкенд недоступен)"""
+
+    @abstractmethod
+    async def set(self, key: str, value: bytes, ttl_seconds: float) -> None:
+        """Значение ключа на ttl_seconds секунд"""
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        """Удаление ключа"""
+
+    @abstractmethod
+    async def publish(self, channel: str, message: str) -> None:
+        """Сообщение подписчикам канала"""
+
+    def subscribe(self, channel: str, handler: MessageHandler) -> None:
+        """Обработчик сообщений канала (вызывается в цикле событий воркера)"""
+        self._handlers.setdefault(channel, []).append(handler)
+
+    async def start(self) -> None:
+        """Подключение подписок (при запуске приложения)"""
+
+    async def close(self) -> None:
+        """Отключение (при остановке приложения)"""
+
+    def delete_nowait(self, key: str) -> None:
+        """delete из синхронного кода (обработчиков событий сессии)"""
+        self.spawn(self.delete(key))
+
+    def publish_nowait(self, channel: str, message: str) -> None:
+        """publish из синхронного кода (обработчиков событий сессии)"""
+        self.spawn(self.publish(channel, message))
+
+    def spawn(self, operation: Awaitable) -> None:
+        """Запуск операции бэкенда из синхронного кода без ожидания (вне цикла событий — пропуск)"""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Вне цикла событий (скрипты, синхронные тесты) общих кэшей нет
+            operation.close()
+            return
+        task = loop.create_task(operation)
+        # Ссылка нужна, чтобы задачу не собрал сборщик мусора до завершения
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _deliver(self, channel: str, message: str) -> None:
+        for handler in self._handlers.get(channel, ()):
+            try:
+                handler(message)
+            except Exception:
+                logger.exception("Cache message handler failed for %s", channel)
+
+
+class InProcessBackend(CacheBackend):
+    """LRU-словарь с TTL в памяти процесса; сообщения доставляются подписчикам этого процесса"""
+
+    def __init__(self, max_items: int):
+        super().__init__()
+        self.max_items = max_items
+        self._entries: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self.evictions = 0
+
+    async def get(self, key: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    async def set(self, key: str, value: bytes, ttl_seconds: float) -> None:
+        if self.max_items <= 0:
+            return
+        self._entries[key] = (time.monotonic() + ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_items:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    async def publish(self, channel: str, message: str) -> None:
+        self._deliver(channel, message)
+
+    # Словарь меняется сразу, без задачи в цикле событий
+    def delete_nowait(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    def publish_nowait(self, channel: str, message: str) -> None:
+        self._deliver(channel, message)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class RedisError(Exception):
+    """Ответ-ошибка сервера Redis"""
+
+
+class RedisBackend(CacheBackend):
+    """
+    Клиент протокола Redis (RESP2) на asyncio без сторонних зависимостей.
+
+    Команды идут по пулу из pool_size соединений (каждое занято одной
+    командой до ответа), подписки — по отдельному соединению, которое после
+    обрыва переподключается с растущей паузой. Соединения принадлежат циклу
+    событий, в котором открыты. После ошибки команды бэкенд FAILURE_BACKOFF
+    секунд считается недоступным: команды сразу дают промах, не ожидая
+    таймаута подключения.
+
+    Удаление, не дошедшее до сервера (во время паузы или из-за ошибки),
+    не теряется: ключ остается в очереди удалений, повторяется после паузы
+    (перед следующей командой и фоновой задачей), а до тех пор get по нему
+    дает промах. Иначе отозванная запись продолжала бы читаться из Redis.
+    """
+
+    shared = True
+
+    # Пауза перед переподключением подписки, секунд (удваивается до максимума)
+    RECONNECT_DELAY = 0.5
+    RECONNECT_DELAY_MAX = 5.0
+    # Пауза после ошибки команды, секунд
+    FAILURE_BACKOFF = 1.0
+
+    def __init__(self, url: str, timeout: float = 1.0, pool_size: int = 4):
+        super().__init__()
+        parsed = urlparse(url)
+        if parsed.scheme != "redis":
+            raise ValueError(f"Unsupported cache URL scheme: {parsed.scheme}")
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.password = unquote(parsed.password) if parsed.password else None
+        self.username = unquote(parsed.username) if parsed.username else None
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self._idle: List[Tuple[asyncio.StreamReader, asyncio.StreamWriter]] = []
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._subscriber: Optional[asyncio.Task] = None
+        self._unavailable_until = 0.0
+        # Ключи, удаление которых еще не подтверждено сервером
+        self._pending_deletes: Set[str] = set()
+        self._delete_retry: Optional[asyncio.Task] = None
+
+    async def get(self, key: str) -> Optional[bytes]:
+        await self._flush_deletes()
+        if key in self._pending_deletes:
+            return None
+        return await self._safe_command(b"GET", key)
+
+    async def set(self, key: str, value: bytes, ttl_seconds: float) -> None:
+        await self._flush_deletes()
+        await self._safe_command(b"SET", key, value, b"PX", int(ttl_seconds * 1000))
+
+    async def delete(self, key: str) -> None:
+        self._pending_deletes.add(key)
+        await self._flush_deletes()
+        if self._pending_deletes and self._delete_retry is None:
+            self._delete_retry = asyncio.get_running_loop().create_task(self._retry_deletes())
+
+    async def publish(self, channel: str, message: str) -> None:
+        await self._safe_command(b"PUBLISH", channel, message)
+
+    async def start(self) -> None:
+        if self._handlers and self._subscriber is None:
+            self._subscriber = asyncio.get_running_loop().create_task(self._listen())
+
+    async def close(self) -> None:
+        if self._subscriber is not None:
+            self._subscriber.cancel()
+            try:
+                await self._subscriber
+            except asyncio.CancelledError:
+                pass
+            self._subscriber = None
+        if self._delete_retry is not None:
+            self._delete_retry.cancel()
+            self._delete_retry = None
+        while self._idle:
+            self._idle.pop()[1].close()
+
+    async def command(self, *args):
+        """Команда по свободному соединению пула; недостающие соединения открываются заново"""
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.pool_size)
+        async with self._slots:
+            connection = self._idle.pop() if self._idle else await self._connect()
+            reader, writer = connection
+            try:
+                writer.write(encode_command(*args))
+                reply = await asyncio.wait_for(read_reply(reader), self.timeout)
+            except RedisError:
+                # Ответ-ошибка прочитан целиком, соединение исправно
+                self._idle.append(connection)
+                raise
+            except BaseException:
+                # В том числе отмена задачи: непрочитанный ответ остался бы в
+                # сокете и достался бы следующей команде
+                writer.close()
+                raise
+            self._idle.append(connection)
+            return reply
+
+    async def _safe_command(self, *args):
+        if time.monotonic() < self._unavailable_until:
+            return None
+        try:
+            return await self.command(*args)
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, RedisError) as error:
+            self._unavailable_until = time.monotonic() + self.FAILURE_BACKOFF
+            logger.warning("Cache command %s failed: %r", args[0].decode(), error)
+            return None
+
+    async def _flush_deletes(self) -> None:
+        """Повтор неподтвержденных удалений одной командой DEL (вне паузы)"""
+        if not self._pending_deletes or time.monotonic() < self._unavailable_until:
+            return
+        keys = list(self._pending_deletes)
+        if await self._safe_command(b"DEL", *keys) is not None:
+            self._pending_deletes.difference_update(keys)
+
+    async def _retry_deletes(self) -> None:
+        """Повтор удалений после паузы, даже если команд больше не будет"""
+        try:
+            while self._pending_deletes:
+                await asyncio.sleep(max(self._unavailable_until - time.monotonic(), 0.0))
+                await self._flush_deletes()
+        finally:
+            self._delete_retry = None
+
+    async def _connect(self) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(self.host, self.port), self.timeout)
+        try:
+            if self.password is not None:
+                credentials = (self.username, self.password) if self.username else (self.password,)
+                writer.write(encode_command(b"AUTH", *credentials))
+                await asyncio.wait_for(read_reply(reader), self.timeout)
+            if self.db:
+                writer.write(encode_command(b"SELECT", self.db))
+                await asyncio.wait_for(read_reply(reader), self.timeout)
+        except BaseException:
+            writer.close()
+            raise
+        return reader, writer
+
+    async def _listen(self) -> None:
+        """Подписка на каналы обработчиков с переподключением после обрыва"""
+        delay = self.RECONNECT_DELAY
+        while True:
+            try:
+                reader, writer = await self._connect()
+                try:
+                    writer.write(encode_command(b"SUBSCRIBE", *self._handlers))
+                    while True:
+                        reply = await read_reply(reader)
+                        delay = self.RECONNECT_DELAY
+                        if isinstance(reply, list) and reply[0] == b"message":
+                            self._deliver(reply[1].decode(), reply[2].decode())
+                finally:
+                    writer.close()
+            except asyncio.CancelledError:
+                raise
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, RedisError) as error:
+                logger.warning("Cache subscription lost: %r; reconnecting in %.1fs", error, delay)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.RECONNECT_DELAY_MAX)
+
+
+def encode_command(*args) -> bytes:
+    """Команда в формате RESP: массив строк"""
+    parts = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        if isinstance(arg, str):
+            arg = arg.encode()
+        elif isinstance(arg, int):
+            arg = str(arg).encode()
+        parts.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+    return b"".join(parts)
+
+
+async def read_reply(reader: asyncio.StreamReader):
+    """Ответ в формате RESP2"""
+    line = await reader.readuntil(b"\r\n")
+    kind, payload = line[:1], line[1:-2]
+    if kind == b"+":
+        return payload
+    if kind == b"-":
+        raise RedisError(payload.decode())
+    if kind == b":":
+        return int(payload)
+    if kind == b"$":
+        length = int(payload)
+        if length < 0:
+            return None
+        return (await reader.readexactly(length + 2))[:-2]
+    if kind == b"*":
+        length = int(payload)
+        if length < 0:
+            return None
+        return [await read_reply(reader) for _ in range(length)]
+    raise RedisError(f"Unexpected reply: {line!r}")
+
+
+class InvalidationBus:
+    """
+    Рассылка инвалидаций кэшей, живущих в памяти воркеров.
+
+    Сообщение «воркер|вид|ключ» публикуется в канал CHANNEL; каждый воркер
+    передает ключ обработчику вида, свои сообщения пропускает (их действие
+    уже применено на месте).
+    """
+
+    CHANNEL = "cache-invalidation"
+
+    def __init__(self, backend: CacheBackend):
+        self.backend = backend
+        self.worker_id = secrets.token_hex(6)
+        self._handlers: Dict[str, MessageHandler] = {}
+        backend.subscribe(self._channel, self._dispatch)
+
+    @property
+    def _channel(self) -> str:
+        return settings.CACHE_KEY_PREFIX + self.CHANNEL
+
+    def on(self, kind: str, handler: MessageHandler) -> None:
+        """Обработчик инвалидаций вида kind из других воркеров"""
+        self._handlers[kind] = handler
+
+    def broadcast(self, kind: str, key) -> None:
+        """Сообщение другим воркерам (из синхронного кода, без ожидания)"""
+        if self.backend.shared:
+            self.backend.publish_nowait(self._channel, self._message(kind, key))
+
+    async def publish(self, kind: str, key) -> None:
+        """Сообщение другим воркерам с ожиданием отправки (скрипты вне приложения)"""
+        if self.backend.shared:
+            await self.backend.publish(self._channel, self._message(kind, key))
+
+    def _message(self, kind: str, key) -> str:
+        return f"{self.worker_id}|{kind}|{key}"
+
+    def _dispatch(self, message: str) -> None:
+        origin, kind, key = message.split("|", 2)
+        handler = self._handlers.get(kind)
+        if origin != self.worker_id and handler is not None:
+            handler(key)
+
+
+def create_cache_backend() -> CacheBackend:
+    """Бэкенд из настроек (CACHE_BACKEND)"""
+    if settings.CACHE_BACKEND == "redis":
+        if not settings.CACHE_REDIS_URL:
+            raise ValueError("CACHE_REDIS_URL is required for the redis cache backend")
+        return RedisBackend(settings.CACHE_REDIS_URL, settings.CACHE_REDIS_TIMEOUT, settings.CACHE_REDIS_POOL_SIZE)
+    if settings.CACHE_BACKEND == "memory":
+        return InProcessBackend(settings.CACHE_MEMORY_MAX_ITEMS)
+    raise ValueError(f"Unknown cache backend: {settings.CACHE_BACKEND}")
+
+
+cache_backend = create_cache_backend()
+invalidation_bus = InvalidationBus(cache_backend)
+
+
+def cache_key(*parts) -> str:
+    """Ключ в бэкенде с префиксом приложения"""
+    return settings.CACHE_KEY_PREFIX + ":".join(str(part) for part in parts)
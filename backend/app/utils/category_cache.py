@@ -0,0 +1,198 @@
+# app/utils/category_cache.py
+"""
+Кэш категорий пользователя.
+
+Категорий у пользователя немного, меняются они редко, а читаются при
+каждой проверке транзакции и каждом открытии списков. Поэтому в памяти
+процесса хранится карта всех категорий пользователя {id: CategoryEntry}
+в порядке (position, name), как ее отдала БД.
+
+Актуальность определяется версией пользователя: изменение категорий
+увеличивает ее (invalidate_categories — сразу и после коммита), а карта,
+загруженная при старой версии, не сохраняется и не отдается. Смена
+версии рассылается остальным воркерам через шину инвалидации (при общем
+бэкенде кэша); CATEGORY_CACHE_TTL ограничивает срок жизни карты, если
+сообщение потеряется. Хранится не больше CATEGORY_CACHE_SIZE
+пользователей (вытесняются давно не использованные).
+
+Сессия, изменившая категории пользователя, до коммита или отката читает
+их мимо кэша: карта с ее незакоммиченными изменениями не должна
+сохраниться, а карта из кэша их не содержит (pending_category_writes).
+"""
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from types import MappingProxyType
+from typing import Dict, Iterable, Mapping, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import run_after_commit
+from app.utils.cache_backend import invalidation_bus
+from app.models.category import CategoryTypeEnum
+
+# Карта категорий пользователя только для чтения: она общая для всех запросов
+CategoryMap = Mapping[int, "CategoryEntry"]
+
+
+@dataclass(frozen=True)
+class CategoryEntry:
+    """Неизменяемая копия строки категории: поля CategoryResponse"""
+    id: int
+    user_id: int
+    name: str
+    description: Optional[str]
+    icon: Optional[str]
+    color: Optional[str]
+    category_type: CategoryTypeEnum
+    is_system: bool
+    position: Optional[int]
+    created_at: datetime
+    updated_at: Optional[datetime]
+
+    @classmethod
+    def from_row(cls, row) -> "CategoryEntry":
+        return cls(**{name: getattr(row, name) for name in cls.__dataclass_fields__})
+
+
+def category_map(entries: Iterable[CategoryEntry]) -> CategoryMap:
+    """Карта {id: CategoryEntry} только для чтения в порядке entries"""
+    return MappingProxyType({entry.id: entry for entry in entries})
+
+
+class CategoryCache:
+    """Карты категорий по пользователям с версионной инвалидацией, TTL и LRU"""
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        # Версии выдаются из общего возрастающего счетчика. Версия пользователя
+        # без записи — _floor; он сдвигается при удалении версий, чтобы карта,
+        # загруженная до этого, не совпала ни с одной новой версией
+        self._generation = 0
+        self._floor = 0
+        self._versions: Dict[int, int] = {}
+        self._maps: "OrderedDict[int, Tuple[int, float, CategoryMap]]" = OrderedDict()
+        self.reset()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0 and self.ttl_seconds > 0
+
+    def reset(self) -> None:
+        """Сброс счетчиков (записи сохраняются)"""
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+            self.invalidations = 0
+
+    def version(self, user_id: int) -> int:
+        """Текущая версия категорий пользователя (берется до загрузки карты)"""
+        return self._versions.get(user_id, self._floor)
+
+    def get(self, user_id: int) -> Optional[CategoryMap]:
+        """Карта категорий текущей версии или None"""
+        with self._lock:
+            entry = self._maps.get(user_id)
+            if entry is not None and (entry[0] != self.version(user_id) or entry[1] <= time.monotonic()):
+                del self._maps[user_id]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._maps.move_to_end(user_id)
+            self.hits += 1
+            return entry[2]
+
+    def put(self, user_id: int, version: int, entries: Iterable[CategoryEntry]) -> CategoryMap:
+        """
+        Сохраняет карту, загруженную при версии version, и возвращает ее.
+
+        Если версия за время загрузки изменилась, карта возвращается
+        вызывающему, но не сохраняется.
+        """
+        categories = category_map(entries)
+        if not self.enabled:
+            return categories
+        with self._lock:
+            if self.version(user_id) == version:
+                self._maps[user_id] = (version, time.monotonic() + self.ttl_seconds, categories)
+                self._maps.move_to_end(user_id)
+                while len(self._maps) > self.max_size:
+                    self._maps.popitem(last=False)
+                    self.evictions += 1
+                if len(self._versions) > self.max_size:
+                    self._drop_versions()
+        return categories
+
+    def bump(self, user_id: int) -> None:
+        """Новая версия категорий пользователя: сохраненная карта больше не отдается"""
+        with self._lock:
+            self._generation += 1
+            self._versions[user_id] = self._generation
+            if self._maps.pop(user_id, None) is not None:
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._maps.clear()
+            self._drop_versions()
+
+    def _drop_versions(self) -> None:
+        # Актуальные карты переходят на новый _floor, устаревшие удаляются
+        current = [(user_id, entry) for user_id, entry in self._maps.items() if entry[0] == self.version(user_id)]
+        self._generation += 1
+        self._floor = self._generation
+        self._versions.clear()
+        self._maps = OrderedDict((user_id, (self._floor, *entry[1:])) for user_id, entry in current)
+
+    def snapshot(self) -> Dict:
+        """Размер, настройки и накопленные счетчики"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "users": len(self._maps),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+category_cache = CategoryCache(settings.CATEGORY_CACHE_SIZE, settings.CATEGORY_CACHE_TTL)
+
+
+def _bump_everywhere(user_id: int) -> None:
+    category_cache.bump(user_id)
+    invalidation_bus.broadcast("categories", user_id)
+
+
+def invalidate_categories(db: AsyncSession, user_id: int) -> None:
+    """Новая версия категорий пользователя сейчас и после коммита сессии db, во всех воркерах"""
+    db.info.setdefault("category_writes", set()).add(user_id)
+    _bump_everywhere(user_id)
+    run_after_commit(db, lambda: _bump_everywhere(user_id))
+
+
+def pending_category_writes(db: AsyncSession, user_id: int) -> bool:
+    """Есть ли в сессии db незакоммиченные изменения категорий пользователя"""
+    return user_id in db.info.get("category_writes", ())
+
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def _end_category_writes(session: Session) -> None:
+    session.info.pop("category_writes", None)
+
+
+invalidation_bus.on("categories", lambda user_id: category_cache.bump(int(user_id)))
@@ -0,0 +1,259 @@
+# app/utils/data_version.py
+"""
+Версия данных пользователя для условных GET (ETag / If-None-Match).
+
+Версия пользователя меняется при каждой записи в сессии,
+привязанной к нему (bind_session_user — это делает get_current_user):
+после flush, DML-запроса и еще раз после коммита, чтобы ответ, собранный
+параллельным запросом до коммита, не получил новую версию. Так версию
+меняют все сервисы (транзакции, категории, профиль и остальные) без
+явных вызовов.
+
+ETag ответа строится из версии до чтения данных: если данные изменятся
+во время запроса, следующий запрос просто получит полный ответ. Версия —
+случайная метка, поэтому ETag разных процессов и запусков не совпадают
+случайно; в ETag входит и текущая дата (ответы вроде «этот месяц»
+зависят от нее).
+
+Без общего бэкенда кэша версии живут только в памяти процесса, и ETag
+одного воркера другим не принимается; поэтому по умолчанию ETag включены
+только с общим бэкендом (CACHE_BACKEND=redis). С ним версия пользователя
+хранится и в бэкенде (вместе с общей эпохой, которую меняет
+publish_data_changed() для всех пользователей), а новая версия
+рассылается остальным воркерам через шину инвалидации: все воркеры
+выдают один ETag. Ответы, прочитанные с реплики, ETag не получают:
+реплика может отставать от версии. Записи вне приложения (скрипты)
+меняют версии через publish_data_changed.
+"""
+import asyncio
+import secrets
+import threading
+from datetime import date
+from typing import Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import ORMExecuteState, Session
+
+from app.config import settings
+from app.database import run_after_commit
+from app.utils.cache_backend import CacheBackend, cache_backend, cache_key, invalidation_bus
+
+# Ключ сообщения шины: версии всех пользователей
+ALL_USERS = "*"
+
+
+def etags_enabled() -> bool:
+    """Включены ли ETag: явно настройкой или по наличию общего бэкенда кэша"""
+    if settings.DATA_VERSION_ETAGS is None:
+        return cache_backend.shared
+    return settings.DATA_VERSION_ETAGS
+
+
+def new_version() -> str:
+    return secrets.token_hex(6)
+
+
+class DataVersions:
+    """
+    Версии данных пользователей: в памяти процесса, а при общем бэкенде
+    кэша — и в нем, под общей эпохой (запись «эпоха:версия»).
+
+    Версия, созданная при чтении, в память не записывается: при
+    одновременном создании другим воркером в памяти окажется та, что
+    сохранилась в бэкенде (ее прочитает следующий запрос).
+    """
+
+    # Срок хранения версии и эпохи в общем бэкенде, секунд
+    SHARED_TTL = 7 * 24 * 3600
+
+    def __init__(self, max_users: int, backend: CacheBackend = cache_backend):
+        self.max_users = max_users
+        self.backend = backend
+        self._lock = threading.Lock()
+        self._versions: Dict[int, str] = {}
+        # Версия пользователя без записи (без общего бэкенда); меняется при очистке
+        self._floor = new_version()
+        # Эпоха общего бэкенда, прочитанная из него
+        self._epoch: Optional[str] = None
+        # Сохранения версий идут по очереди: ранняя версия не должна перезаписать позднюю
+        self._store_lock: Optional[asyncio.Lock] = None
+
+    def get(self, user_id: int) -> Optional[str]:
+        """Версия из памяти процесса (при общем бэкенде None — не загружена)"""
+        return self._versions.get(user_id, None if self.backend.shared else self._floor)
+
+    def bump(self, user_id: int, version: Optional[str] = None) -> str:
+        """Новая версия пользователя в памяти процесса (version — пришедшая от другого воркера)"""
+        version = version or new_version()
+        with self._lock:
+            if user_id not in self._versions and len(self._versions) >= self.max_users:
+                # Все версии сразу меняются (или перечитываются из бэкенда):
+                # лишние полные ответы вместо неверных 304
+                self._floor = new_version()
+                self._versions.clear()
+            self._versions[user_id] = version
+        return version
+
+    async def etag(self, user_id: int) -> str:
+        """Сильный ETag данных пользователя"""
+        version = self.get(user_id)
+        if version is None:
+            version = await self._load(user_id)
+        return f'"{user_id}-{version}-{date.today():%Y%m%d}"'
+
+    async def store(self, user_id: int, version: str) -> None:
+        """Сохранение версии в общем бэкенде"""
+        if self._store_lock is None:
+            self._store_lock = asyncio.Lock()
+        async with self._store_lock:
+            epoch = await self._load_epoch()
+            key = cache_key("data-version", user_id)
+            # Удаление повторяется после сбоя бэкенда: прежняя версия не переживет запись
+            await self.backend.delete(key)
+            await self.backend.set(key, f"{epoch}:{version}".encode(), self.SHARED_TTL)
+
+    async def new_epoch(self) -> str:
+        """Новая эпоха в общем бэкенде: сохраненные версии всех пользователей больше не читаются"""
+        epoch = new_version()
+        await self.backend.set(cache_key("data-epoch"), epoch.encode(), self.SHARED_TTL)
+        self.clear(epoch)
+        return epoch
+
+    def clear(self, epoch: Optional[str] = None) -> None:
+        """Сброс версий всех пользователей (epoch — новая эпоха общего бэкенда)"""
+        with self._lock:
+            self._floor = new_version()
+            self._versions.clear()
+            self._epoch = epoch
+
+    async def _load_epoch(self) -> str:
+        if self._epoch is not None:
+            return self._epoch
+        value = await self.backend.get(cache_key("data-epoch"))
+        if value is None:
+            epoch = new_version()
+            await self.backend.set(cache_key("data-epoch"), epoch.encode(), self.SHARED_TTL)
+            return epoch
+        self._epoch = value.decode()
+        return self._epoch
+
+    async def _load(self, user_id: int) -> str:
+        epoch = await self._load_epoch()
+        key = cache_key("data-version", user_id)
+        value = await self.backend.get(key)
+        stored_epoch, _, version = (value or b"").decode().partition(":")
+        if value is None or stored_epoch != epoch:
+            # Данные запроса читаются после сохранения версии: она не может
+            # оказаться в бэкенде раньше записи, данные которой не видит
+            version = new_version()
+            await self.backend.set(key, f"{epoch}:{version}".encode(), self.SHARED_TTL)
+            return version
+        with self._lock:
+            if self._epoch == epoch:
+                version = self._versions.setdefault(user_id, version)
+        return version
+
+
+data_versions = DataVersions(settings.DATA_VERSION_MAX_USERS)
+
+
+def _bump_everywhere(user_id: int) -> None:
+    version = data_versions.bump(user_id)
+    if cache_backend.shared:
+        cache_backend.spawn(data_versions.store(user_id, version))
+    invalidation_bus.broadcast("data", f"{user_id}:{version}")
+
+
+def _apply_message(key: str) -> None:
+    user_id, _, version = key.partition(":")
+    if user_id == ALL_USERS:
+        data_versions.clear(version or None)
+    else:
+        data_versions.bump(int(user_id), version or None)
+
+
+invalidation_bus.on("data", _apply_message)
+
+
+async def publish_data_changed(user_id: Optional[int] = None) -> None:
+    """Новая версия данных пользователя (без user_id — всех) во всех воркерах"""
+    if user_id is None:
+        if cache_backend.shared:
+            epoch = await data_versions.new_epoch()
+        else:
+            data_versions.clear()
+            epoch = ""
+        await invalidation_bus.publish("data", f"{ALL_USERS}:{epoch}")
+    else:
+        version = data_versions.bump(user_id)
+        if cache_backend.shared:
+            await data_versions.store(user_id, version)
+        await invalidation_bus.publish("data", f"{user_id}:{version}")
+
+
+def _user_data_changed(session: Session) -> None:
+    user_id = session.info.get("user_id")
+    if user_id is None:
+        return
+    _bump_everywhere(user_id)
+    if not session.info.get("data_changed"):
+        session.info["data_changed"] = True
+
+        def bump_after_commit():
+            session.info.pop("data_changed", None)
+            _bump_everywhere(user_id)
+
+        run_after_commit(session, bump_after_commit)
+
+
+@event.listens_for(Session, "after_flush")
+def _bump_on_flush(session: Session, flush_context) -> None:
+    _user_data_changed(session)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _bump_on_dml(orm_execute_state: ORMExecuteState) -> None:
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        _user_data_changed(orm_execute_state.session)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back_change(session: Session) -> None:
+    session.info.pop("data_changed", None)
+
+
+def matches_if_none_match(header: str, etag: str) -> bool:
+    """Совпадает ли ETag с заголовком If-None-Match (слабое сравнение, как требует RFC 9110)"""
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+class ETagMiddleware:
+    """
+    ASGI-middleware: добавляет к успешному ответу ETag, вычисленный
+    зависимостью etag_by_data_version (request.state.etag).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        async def send_with_etag(message):
+            if message["type"] == "http.response.start" and message["status"] == 200:
+                etag = scope.get("state", {}).get("etag")
+                if etag is not None:
+                    headers = list(message.get("headers", ()))
+                    headers.append((b"etag", etag.encode()))
+                    if not any(name.lower() == b"cache-control" for name, _ in headers):
+                        # Клиент хранит ответ, но перед использованием сверяет ETag
+                        headers.append((b"cache-control", b"private, no-cache"))
+                    message["headers"] = headers
+            await send(message)
+
+        await self.app(scope, receive, send_with_etag)
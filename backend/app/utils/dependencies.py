@@ -1,11 +1,16 @@
 # app/utils/dependencies.py
-from fastapi import Depends, HTTPException, status
+import secrets
+from typing import Optional
+from fastapi import Depends, Header, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import JWTError, jwt
-from sqlalchemy.orm import Session
-from app.database import get_db
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_db, bind_session_user, reads_from_replica
 from app.models.user import User
 from app.config import settings
+from app.utils.data_version import data_versions, etags_enabled, matches_if_none_match
+from app.utils.principal_cache import UserPrincipal, principal_cache
 from app.utils.security import SecurityUtils
 
 # Схема безопасности
@@ -14,9 +19,15 @@ security = HTTPBearer()
 
 async def get_current_user(
         credentials: HTTPAuthorizationCredentials = Depends(security),
-        db: Session = Depends(get_db)
-) -> User:
-    """Получение текущего пользователя из токена"""
+        db: AsyncSession = Depends(get_db)
+) -> UserPrincipal:
+    """
+    Получение текущего пользователя из токена.
+
+    Возвращает слепок пользователя (UserPrincipal) из кэша принципалов;
+    БД запрашивается только при промахе. Эндпоинты, которым нужна вся
+    строка пользователя, загружают ее сами.
+    """
     token = credentials.credentials
 
     credentials_exception = HTTPException(
@@ -33,20 +44,28 @@ async def get_current_user(
     if payload.get("type") != "access":
         raise credentials_exception
 
-    user_id: int = payload.get("sub")
-    if user_id is None:
+    user_id = payload.get("sub")
+    if user_id is None or not str(user_id).isdigit():
         raise credentials_exception
 
-    user = db.query(User).filter(User.id == user_id).first()
-    if user is None:
-        raise credentials_exception
+    # До первого запроса: сразу после своей записи пользователь читает с основной БД
+    bind_session_user(db, int(user_id))
 
-    return user
+    principal = await principal_cache.get(int(user_id))
+    if principal is None:
+        # sub хранится строкой, asyncpg требует точного типа параметра
+        user = await db.scalar(select(User).where(User.id == int(user_id)))
+        if user is None:
+            raise credentials_exception
+        principal = UserPrincipal.from_user(user)
+        await principal_cache.put(principal)
+
+    return principal
 
 
 async def get_current_active_user(
-        current_user: User = Depends(get_current_user)
-) -> User:
+        current_user: UserPrincipal = Depends(get_current_user)
+) -> UserPrincipal:
     """Получение активного пользователя"""
     if not current_user.is_active:
         raise HTTPException(
@@ -57,12 +76,59 @@ async def get_current_active_user(
 
 
 async def get_current_verified_user(
-        current_user: User = Depends(get_current_active_user)
-) -> User:
+        current_user: UserPrincipal = Depends(get_current_active_user)
+) -> UserPrincipal:
     """Получение верифицированного пользователя"""
     if not current_user.is_verified:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="User not verified"
         )
-    return current_user
\ No newline at end of file
+    return current_user
+
+
+async def etag_by_data_version(
+        request: Request,
+        current_user: UserPrincipal = Depends(get_current_active_user),
+        db: AsyncSession = Depends(get_db)
+) -> None:
+    """
+    Условный GET по версии данных пользователя.
+
+    Если If-None-Match совпадает с текущим ETag, отвечает 304 до обращения
+    к БД; иначе ETag добавляется к ответу (ETagMiddleware), если ответ
+    читается с основной БД: данные отстающей реплики не должны получить
+    метку новой версии. Подключается к эндпоинту или роутеру:
+    dependencies=[Depends(etag_by_data_version)].
+    """
+    if not etags_enabled() or request.method != "GET":
+        return
+
+    etag = await data_versions.etag(current_user.id)
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and matches_if_none_match(if_none_match, etag):
+        raise HTTPException(
+            status_code=status.HTTP_304_NOT_MODIFIED,
+            headers={"ETag": etag}
+        )
+    if not reads_from_replica(db):
+        request.state.etag = etag
+
+
+async def verify_internal_token(
+        x_internal_token: Optional[str] = Header(None)
+) -> None:
+    """
+    Проверка токена служебных эндпоинтов. Без INTERNAL_API_TOKEN в
+    настройках эндпоинты недоступны (404), как будто их нет.
+    """
+    if not settings.INTERNAL_API_TOKEN:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Not Found"
+        )
+    if not secrets.compare_digest(x_internal_token or "", settings.INTERNAL_API_TOKEN):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Invalid internal token"
+        )
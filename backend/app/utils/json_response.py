@@ -0,0 +1,46 @@
+# app/utils/json_response.py
+"""
+Быстрый JSON-ответ для больших списков.
+
+Эндпоинт, возвращающий RawJSONResponse, минует повторную валидацию
+через response_model: данные из БД сериализуются сразу в байты.
+Формат дат, перечислений и сумм совпадает с тем, что выдает Pydantic.
+"""
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from enum import Enum
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+
+def _default(value: Any) -> Any:
+    """Сериализация типов, которых не знает стандартный json"""
+    if isinstance(value, datetime):
+        serialized = value.isoformat()
+        # Pydantic записывает UTC как "Z"
+        return serialized[:-6] + "Z" if serialized.endswith("+00:00") else serialized
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, Decimal):
+        # Суммы (app.utils.money.Money) Pydantic тоже отдает числом
+        return float(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+_encoder = json.JSONEncoder(default=_default, ensure_ascii=False, separators=(",", ":"))
+
+
+def dump_json(content: Any) -> bytes:
+    """Сериализация словарей/списков из БД в JSON-байты"""
+    return _encoder.encode(content).encode("utf-8")
+
+
+class RawJSONResponse(JSONResponse):
+    """JSON-ответ без проверки через Pydantic, для уже подготовленных данных"""
+
+    def render(self, content: Any) -> bytes:
+        return dump_json(content)
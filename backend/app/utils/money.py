@@ -0,0 +1,107 @@
+# app/utils/money.py
+"""
+Денежные суммы: целые минорные единицы (центы, тиыны) в БД, Decimal в коде.
+
+Колонки MinorUnits хранят BIGINT — количество минорных единиц при
+показателе валюты (exponent: 2 — сотые доли). Суммирование в SQL и в
+памяти остается целочисленным и точным, а значения из БД приходят
+Decimal с нужным числом знаков. В API суммы по-прежнему передаются
+десятичными числами (тип Money).
+
+rollup суммирует минорные единицы по ключам; колонки, уже собранные в
+массивы NumPy int64 (NumPy не обязателен), складываются векторно.
+"""
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Annotated, Dict, Hashable, Sequence, Union
+
+from pydantic import AfterValidator, PlainSerializer
+from sqlalchemy import BigInteger
+from sqlalchemy.types import TypeDecorator
+
+try:
+    import numpy as np
+except ImportError:  # NumPy не обязателен
+    np = None
+
+# Показатель (число знаков минорной единицы) поддерживаемых валют (CurrencyEnum)
+CURRENCY_EXPONENTS = {"USD": 2, "EUR": 2, "RUB": 2, "KZT": 2, "GBP": 2}
+
+# Показатель хранимых сумм: суммы разных валют складываются в одних колонках,
+# поэтому он общий и равен наибольшему среди поддерживаемых валют
+MONEY_EXPONENT = max(CURRENCY_EXPONENTS.values())
+
+# Наибольшая сумма по модулю: пакет из тысяч таких сумм не переполняет int64
+MAX_AMOUNT = Decimal(10) ** 12
+
+Number = Union[int, float, Decimal]
+
+
+def to_minor(value: Number, exponent: int = MONEY_EXPONENT) -> int:
+    """Сумма в минорных единицах с округлением до ближайшей (половина — от нуля)"""
+    # float переводится через str: Decimal(0.1) хранил бы двоичную погрешность
+    amount = value if isinstance(value, Decimal) else Decimal(str(value))
+    return int(amount.scaleb(exponent).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def from_minor(minor: Union[int, Decimal], exponent: int = MONEY_EXPONENT) -> Decimal:
+    """Decimal с exponent знаками после запятой из минорных единиц"""
+    return Decimal(int(minor)).scaleb(-exponent)
+
+
+def quantize(value: Number, exponent: int = MONEY_EXPONENT) -> Decimal:
+    """Сумма, округленная до минорной единицы"""
+    return from_minor(to_minor(value, exponent), exponent)
+
+
+class MinorUnits(TypeDecorator):
+    """Колонка суммы: BIGINT минорных единиц в БД, Decimal в Python"""
+
+    impl = BigInteger
+    cache_ok = True
+
+    def __init__(self, exponent: int = MONEY_EXPONENT):
+        super().__init__()
+        self.exponent = exponent
+
+    def process_bind_param(self, value, dialect):
+        return None if value is None else to_minor(value, self.exponent)
+
+    def process_result_value(self, value, dialect):
+        # PostgreSQL возвращает SUM(bigint) как numeric: значение целое, тип Decimal
+        return None if value is None else from_minor(value, self.exponent)
+
+
+def _check_amount(value: Decimal) -> Decimal:
+    value = quantize(value)
+    if abs(value) >= MAX_AMOUNT:
+        raise ValueError(f"Amount must be less than {MAX_AMOUNT} in absolute value")
+    return value
+
+
+# Сумма в схемах: принимает десятичное число, округляет до минорной единицы,
+# в JSON отдает числом, как и прежде
+Money = Annotated[
+    Decimal,
+    AfterValidator(_check_amount),
+    PlainSerializer(float, return_type=float, when_used="json"),
+]
+
+
+def rollup(keys: Sequence[Hashable], minor_amounts: Sequence[int]) -> Dict[Hashable, int]:
+    """
+    Точные суммы минорных единиц по ключам: {ключ: сумма}.
+
+    Массивы NumPy складываются векторно в int64 (без перехода к float, как
+    было бы у bincount с весами). Списки Python суммируются словарем:
+    перевод списка в массив стоит дороже самого сложения.
+    """
+    if np is not None and isinstance(minor_amounts, np.ndarray):
+        unique_keys, positions = np.unique(np.asarray(keys), return_inverse=True)
+        totals = np.zeros(len(unique_keys), dtype=np.int64)
+        np.add.at(totals, positions, minor_amounts.astype(np.int64, copy=False))
+        return dict(zip(unique_keys.tolist(), totals.tolist()))
+
+    totals: Dict[Hashable, int] = {}
+    for key, amount in zip(keys, minor_amounts):
+        totals[key] = totals.get(key, 0) + amount
+    return totals
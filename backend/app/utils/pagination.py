@@ -0,0 +1,36 @@
+# app/utils/pagination.py
+"""
+Курсорная (keyset) пагинация.
+
+Курсор — непрозрачная строка, в которой закодирована позиция последней
+отданной записи: пара (transaction_date, id). Следующая страница выбирается
+условием "строго после этой пары" и стоит одинаково на любой глубине.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Tuple
+
+from fastapi import HTTPException, status
+
+
+def encode_cursor(transaction_date: datetime, transaction_id: int) -> str:
+    """Кодирование позиции (дата, id) в непрозрачный курсор"""
+    payload = json.dumps(
+        {"d": transaction_date.isoformat(), "id": transaction_id},
+        separators=(",", ":")
+    )
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Декодирование курсора обратно в пару (дата, id)"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.fromisoformat(payload["d"]), int(payload["id"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
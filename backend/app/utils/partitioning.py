@@ -0,0 +1,175 @@
+# app/utils/partitioning.py
+"""
+Помесячное секционирование таблицы transactions в PostgreSQL (опционально).
+
+Секции называются transactions_pYYYYMM и покрывают диапазон transaction_date
+от первого числа месяца до первого числа следующего (в UTC). Строки вне
+созданных секций попадают в transactions_default, поэтому вставка никогда
+не падает из-за отсутствующей секции. Запросы приложения не меняются:
+условия по transaction_date позволяют планировщику отбросить лишние секции.
+
+Функции принимают синхронное соединение SQLAlchemy (для AsyncConnection —
+через run_sync) и работают внутри его транзакции.
+"""
+from datetime import date
+from typing import List, Optional, Set, Tuple
+
+from sqlalchemy import Table, text
+from sqlalchemy.schema import AddConstraint, CreateIndex
+
+TABLE = "transactions"
+DEFAULT_PARTITION = "transactions_default"
+# Имя исходной таблицы на время переноса (и после него при keep_legacy=True)
+LEGACY_TABLE = "transactions_unpartitioned"
+
+# Ключ advisory-блокировки: воркеры, одновременно создающие секции, не мешают друг другу
+_LOCK_KEY = "transactions_partitions"
+
+
+def add_months(month: date, months: int) -> date:
+    """Первое число месяца, отстоящего от month на months"""
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{TABLE}_p{month:%Y%m}"
+
+
+def _bound_literals(month: date) -> Tuple[str, str]:
+    """Начало и конец месяца литералами времени в UTC (в DDL параметры недопустимы)"""
+    start, end = month.replace(day=1), add_months(month.replace(day=1), 1)
+    return f"'{start.isoformat()} 00:00:00+00'", f"'{end.isoformat()} 00:00:00+00'"
+
+
+def _bounds(month: date) -> str:
+    """Границы секции месяца для FOR VALUES"""
+    start, end = _bound_literals(month)
+    return f"FROM ({start}) TO ({end})"
+
+
+def is_partitioned(connection) -> bool:
+    """Секционирована ли таблица transactions"""
+    return bool(connection.execute(text(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:table))"
+    ), {"table": TABLE}).scalar())
+
+
+def existing_partitions(connection) -> Set[str]:
+    """Имена секций таблицы transactions"""
+    return set(connection.execute(text(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "WHERE pg_inherits.inhparent = to_regclass(:table)"
+    ), {"table": TABLE}).scalars())
+
+
+def _months_with_rows(connection, table_name: str) -> Set[date]:
+    return set(connection.execute(text(
+        f"SELECT DISTINCT date_trunc('month', transaction_date AT TIME ZONE 'UTC')::date FROM {table_name}"
+    )).scalars())
+
+
+def create_month_partition(connection, month: date) -> str:
+    """
+    Создание секции месяца.
+
+    Строки этого месяца, уже попавшие в секцию по умолчанию, переносятся в
+    новую таблицу до ее подключения: иначе PostgreSQL отказал бы в создании
+    секции, пересекающейся с данными default. Условие переноса использует
+    те же литералы в UTC, что и границы секции: параметры-даты привелись бы
+    к времени в часовом поясе сессии.
+    """
+    name = partition_name(month)
+    start, end = _bound_literals(month)
+    connection.execute(text(f"CREATE TABLE {name} (LIKE {TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    connection.execute(text(
+        f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} "
+        f"WHERE transaction_date >= {start} AND transaction_date < {end} RETURNING *) "
+        f"INSERT INTO {name} SELECT * FROM moved"
+    ))
+    connection.execute(text(f"ALTER TABLE {TABLE} ATTACH PARTITION {name} FOR VALUES {_bounds(month)}"))
+    return name
+
+
+def ensure_partitions(connection, months_ahead: int, today: Optional[date] = None) -> List[str]:
+    """
+    Создание недостающих секций: текущий месяц, months_ahead следующих и
+    месяцы, строки которых лежат в секции по умолчанию (импорт старой истории).
+
+    Возвращает имена созданных секций. Если таблица не секционирована,
+    ничего не делает.
+    """
+    if not is_partitioned(connection):
+        return []
+
+    connection.execute(text("SELECT pg_advisory_xact_lock(hashtext(:key))"), {"key": _LOCK_KEY})
+    existing = existing_partitions(connection)
+    current = (today or date.today()).replace(day=1)
+    months = {add_months(current, offset) for offset in range(months_ahead + 1)}
+    months |= _months_with_rows(connection, DEFAULT_PARTITION)
+
+    return [
+        create_month_partition(connection, month)
+        for month in sorted(months)
+        if partition_name(month) not in existing
+    ]
+
+
+def convert_to_partitioned(connection, table: Table, months_ahead: int, keep_legacy: bool = False,
+                           today: Optional[date] = None) -> int:
+    """
+    Перенос несекционированной таблицы transactions в секционированную.
+
+    Выполняется в одной транзакции под ACCESS EXCLUSIVE блокировкой (чтение
+    и запись на время переноса ждут), поэтому рассчитан на окно
+    обслуживания. Структура колонок берется из живой таблицы, индексы и
+    внешние ключи — из модели (table). Первичный ключ становится
+    (id, transaction_date): ключ секционирования обязан в него входить.
+    Возвращает количество перенесенных строк.
+    """
+    if is_partitioned(connection):
+        raise RuntimeError(f"Table {TABLE} is already partitioned")
+
+    connection.execute(text(f"LOCK TABLE {TABLE} IN ACCESS EXCLUSIVE MODE"))
+    connection.execute(text(f"ALTER TABLE {TABLE} RENAME TO {LEGACY_TABLE}"))
+    # Имена индексов уникальны в схеме: освобождаем их для новой таблицы
+    for index_name in connection.execute(text(
+            "SELECT indexname FROM pg_indexes WHERE schemaname = current_schema() AND tablename = :table"
+    ), {"table": LEGACY_TABLE}).scalars():
+        connection.execute(text(f'ALTER INDEX "{index_name}" RENAME TO "{index_name[:50]}_unpartitioned"'))
+
+    connection.execute(text(
+        f"CREATE TABLE {TABLE} (LIKE {LEGACY_TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS) "
+        f"PARTITION BY RANGE (transaction_date)"
+    ))
+    connection.execute(text(f"ALTER TABLE {TABLE} ADD PRIMARY KEY (id, transaction_date)"))
+    connection.execute(text(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {TABLE} DEFAULT"))
+
+    current = (today or date.today()).replace(day=1)
+    months = _months_with_rows(connection, LEGACY_TABLE)
+    months |= {add_months(current, offset) for offset in range(months_ahead + 1)}
+    for month in sorted(months):
+        connection.execute(text(
+            f"CREATE TABLE {partition_name(month)} PARTITION OF {TABLE} FOR VALUES {_bounds(month)}"
+        ))
+
+    moved = connection.execute(text(f"INSERT INTO {TABLE} SELECT * FROM {LEGACY_TABLE}")).rowcount
+
+    # Последовательность id должна пережить удаление исходной таблицы
+    sequence = connection.execute(text("SELECT pg_get_serial_sequence(:table, 'id')"),
+                                  {"table": LEGACY_TABLE}).scalar()
+    if sequence:
+        connection.execute(text(f"ALTER SEQUENCE {sequence} OWNED BY {TABLE}.id"))
+
+    # Индексы строятся после копирования (быстрее) и создаются на каждой секции
+    for index in table.indexes:
+        connection.execute(CreateIndex(index))
+    for foreign_key in table.foreign_key_constraints:
+        connection.execute(AddConstraint(foreign_key))
+
+    if not keep_legacy:
+        connection.execute(text(f"DROP TABLE {LEGACY_TABLE}"))
+    connection.execute(text(f"ANALYZE {TABLE}"))
+
+    return moved
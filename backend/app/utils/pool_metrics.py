@@ -0,0 +1,137 @@
+# app/utils/pool_metrics.py
+"""
+Метрики пула соединений SQLAlchemy для подбора его размера.
+
+Занятые соединения, переполнение, открытия и инвалидации считаются
+обработчиками событий пула (connect/checkout/checkin/invalidate). Время
+получения соединения событиями не покрывается, поэтому класс пула
+подменяется подклассом, замеряющим Pool.connect(): в это время входит
+ожидание свободного соединения и открытие нового.
+"""
+import threading
+import time
+from typing import Dict, List, Type
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import Pool
+
+# Верхние границы интервалов гистограммы времени получения соединения, мс
+WAIT_BUCKETS_MS = (1, 5, 10, 50, 100, 500, 1000)
+
+
+class PoolMetrics:
+    """Накопленные счетчики одного пула соединений"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """Сброс накопленных счетчиков (текущее число занятых соединений сохраняется)"""
+        with self._lock:
+            self.checked_out = getattr(self, "checked_out", 0)
+            self.peak_checked_out = self.checked_out
+            self.checkouts = 0
+            self.connects = 0
+            self.invalidations = 0
+            self.timeouts = 0
+            self.wait_total = 0.0
+            self.wait_max = 0.0
+            self.wait_buckets = [0] * (len(WAIT_BUCKETS_MS) + 1)
+
+    def record_wait(self, seconds: float, timed_out: bool = False) -> None:
+        """Учет времени получения соединения"""
+        milliseconds = seconds * 1000
+        bucket = next((i for i, bound in enumerate(WAIT_BUCKETS_MS) if milliseconds <= bound),
+                      len(WAIT_BUCKETS_MS))
+        with self._lock:
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+            self.wait_buckets[bucket] += 1
+            if timed_out:
+                self.timeouts += 1
+
+    def listen(self, engine) -> None:
+        """Подписка на события пула движка (для AsyncEngine передается sync_engine)"""
+        event.listen(engine, "connect", self._on_connect)
+        event.listen(engine, "checkout", self._on_checkout)
+        event.listen(engine, "checkin", self._on_checkin)
+        event.listen(engine, "invalidate", self._on_invalidate)
+
+    def snapshot(self, pool: Pool) -> Dict:
+        """Текущее состояние пула и накопленные счетчики"""
+        # Размер и переполнение есть только у пулов с очередью (QueuePool)
+        pool_size = pool.size() if hasattr(pool, "size") else None
+        max_overflow = getattr(pool, "_max_overflow", None)
+        with self._lock:
+            peak_overflow = max(0, self.peak_checked_out - pool_size) if pool_size is not None else None
+            # Среднее по всем замеренным ожиданиям, включая закончившиеся таймаутом
+            waits = sum(self.wait_buckets)
+            return {
+                "pool_class": type(pool).__name__,
+                "pool_size": pool_size,
+                "max_overflow": max_overflow,
+                "checked_out": self.checked_out,
+                "overflow": max(0, self.checked_out - pool_size) if pool_size is not None else None,
+                "peak_checked_out": self.peak_checked_out,
+                "peak_overflow": peak_overflow,
+                "checkouts": self.checkouts,
+                "connects": self.connects,
+                "invalidations": self.invalidations,
+                "timeouts": self.timeouts,
+                "checkout_wait": {
+                    "avg_ms": round(self.wait_total / waits * 1000, 3) if waits else 0.0,
+                    "max_ms": round(self.wait_max * 1000, 3),
+                    "buckets_ms": self._bucket_labels(),
+                },
+            }
+
+    def _bucket_labels(self) -> Dict[str, int]:
+        labels: List[str] = [f"<={bound}" for bound in WAIT_BUCKETS_MS] + [f">{WAIT_BUCKETS_MS[-1]}"]
+        return dict(zip(labels, self.wait_buckets))
+
+    def _on_connect(self, dbapi_connection, connection_record) -> None:
+        with self._lock:
+            self.connects += 1
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.checked_out += 1
+            self.peak_checked_out = max(self.peak_checked_out, self.checked_out)
+
+    def _on_checkin(self, dbapi_connection, connection_record) -> None:
+        with self._lock:
+            self.checked_out = max(0, self.checked_out - 1)
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception) -> None:
+        with self._lock:
+            self.invalidations += 1
+
+
+class _TimedConnectMixin:
+    """Замер времени Pool.connect() для metered_pool_class"""
+
+    metrics: PoolMetrics
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            connection = super().connect()
+        except PoolTimeoutError:
+            self.metrics.record_wait(time.perf_counter() - started, timed_out=True)
+            raise
+        self.metrics.record_wait(time.perf_counter() - started)
+        return connection
+
+
+def metered_pool_class(pool_class: Type[Pool], metrics: PoolMetrics) -> Type[Pool]:
+    """
+    Подкласс pool_class, замеряющий время получения соединения.
+
+    Метрики хранятся в атрибуте класса, поэтому переживают пересоздание
+    пула (engine.dispose() создает новый экземпляр того же класса).
+    """
+    return type(f"Metered{pool_class.__name__}", (_TimedConnectMixin, pool_class), {"metrics": metrics})
@@ -0,0 +1,109 @@
+# app/utils/principal_cache.py
+"""
+Кэш принципала аутентифицированного пользователя.
+
+get_current_user проверяет по каждому запросу лишь существование и флаги
+пользователя, поэтому их слепок (UserPrincipal) хранится в бэкенде кэша
+(cache_backend: LRU в памяти процесса или общий Redis) на
+AUTH_PRINCIPAL_CACHE_TTL секунд. Сервисы, меняющие пользователя,
+сбрасывают запись через invalidate_principal: сразу и еще раз после
+коммита, чтобы параллельный запрос не закэшировал старую строку,
+прочитанную до коммита. С общим бэкендом сброс виден всем воркерам.
+"""
+import json
+import threading
+from dataclasses import asdict, dataclass
+from typing import Dict, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.database import run_after_commit
+from app.utils.cache_backend import CacheBackend, cache_backend, cache_key
+
+
+@dataclass(frozen=True)
+class UserPrincipal:
+    """Слепок пользователя, достаточный зависимостям аутентификации и эндпоинтам"""
+    id: int
+    email: str
+    is_active: bool
+    is_verified: bool
+
+    @classmethod
+    def from_user(cls, user) -> "UserPrincipal":
+        return cls(id=user.id, email=user.email, is_active=user.is_active, is_verified=user.is_verified)
+
+
+class PrincipalCache:
+    """Принципалы в бэкенде кэша по id пользователя со счетчиками попаданий"""
+
+    def __init__(self, backend: CacheBackend, ttl_seconds: float):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self.reset()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0
+
+    def reset(self) -> None:
+        """Сброс счетчиков (записи сохраняются)"""
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+            self.invalidations = 0
+
+    async def get(self, user_id: int) -> Optional[UserPrincipal]:
+        """Принципал из кэша или None (промах или истекшая запись)"""
+        raw = await self.backend.get(cache_key("principal", user_id)) if self.enabled else None
+        principal = self._decode(raw)
+        with self._lock:
+            # Чужая или поврежденная запись считается промахом
+            if principal is None or principal.id != user_id:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return principal
+
+    @staticmethod
+    def _decode(raw: Optional[bytes]) -> Optional[UserPrincipal]:
+        if raw is None:
+            return None
+        try:
+            return UserPrincipal(**json.loads(raw))
+        except (ValueError, TypeError):
+            return None
+
+    async def put(self, principal: UserPrincipal) -> None:
+        if self.enabled:
+            await self.backend.set(cache_key("principal", principal.id),
+                                   json.dumps(asdict(principal)).encode(), self.ttl_seconds)
+
+    def invalidate(self, user_id: int) -> None:
+        self.backend.delete_nowait(cache_key("principal", user_id))
+        with self._lock:
+            self.invalidations += 1
+
+    def snapshot(self) -> Dict:
+        """Бэкенд, настройки и накопленные счетчики"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "backend": type(self.backend).__name__,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "invalidations": self.invalidations,
+            }
+
+
+principal_cache = PrincipalCache(cache_backend, settings.AUTH_PRINCIPAL_CACHE_TTL)
+
+
+def invalidate_principal(db: AsyncSession, user_id: int) -> None:
+    """Сброс принципала пользователя сейчас и после коммита сессии db"""
+    principal_cache.invalidate(user_id)
+    run_after_commit(db, lambda: principal_cache.invalidate(user_id))
@@ -4,6 +4,7 @@ from typing import Optional, Union
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from app.config import settings
+from app.utils.token_cache import revoke_token_digest, token_cache, token_digest
 import secrets
 import string
 
@@ -46,12 +47,33 @@ class SecurityUtils:
 
     @staticmethod
     def decode_token(token: str) -> dict:
-        """Декодирование токена"""
+        """
+        Декодирование токена.
+
+        Утверждения проверенного токена берутся из кэша до его exp, так что
+        подпись повторяемого клиентом токена проверяется один раз.
+        Отозванные токены отклоняются.
+        """
+        digest = token_digest(token)
+        payload = token_cache.get(digest)
+        if payload is not None:
+            return payload
+        if token_cache.is_revoked(digest):
+            return None
+
         try:
             payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-            return payload
         except JWTError:
             return None
+        token_cache.put(digest, payload)
+        return payload
+
+    @staticmethod
+    def revoke_token(token: str) -> None:
+        """Отзыв токена до его истечения (во всех воркерах при общем бэкенде кэша)"""
+        payload = SecurityUtils.decode_token(token)
+        if payload is not None and isinstance(payload.get("exp"), (int, float)):
+            revoke_token_digest(token_digest(token), payload["exp"])
 
     @staticmethod
     def generate_reset_token() -> str:
@@ -0,0 +1,129 @@
+# app/utils/token_cache.py
+"""
+Кэш проверенных JWT.
+
+Клиент повторяет один и тот же access-токен до его истечения, поэтому
+проверенные утверждения (claims) хранятся по SHA-256 токена до момента exp:
+повторная проверка подписи и разбор утверждений не нужны. Сами токены в
+памяти не держатся. Не больше AUTH_TOKEN_CACHE_SIZE записей (вытесняются
+давно не использованные); истекшие записи удаляются при обращении.
+
+Отозванный токен (выход из аккаунта) удаляется из кэша и до своего exp
+помнится в списке отозванных, который decode_token проверяет и без кэша.
+Кэш и список хранятся в памяти воркера; отзыв рассылается остальным
+воркерам через шину инвалидации (при общем бэкенде кэша).
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from app.config import settings
+from app.utils.cache_backend import invalidation_bus
+
+
+def token_digest(token: str) -> bytes:
+    """Ключ токена в кэше и списке отозванных"""
+    return hashlib.sha256(token.encode()).digest()
+
+
+class VerifiedTokenCache:
+    """LRU-кэш утверждений проверенных токенов до их exp и список отозванных токенов"""
+
+    # Порог размера списка отозванных, после которого из него удаляются истекшие
+    PRUNE_THRESHOLD = 1024
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[bytes, Tuple[float, dict]]" = OrderedDict()
+        self._revoked: Dict[bytes, float] = {}
+        self.reset()
+
+    def reset(self) -> None:
+        """Сброс счетчиков (записи сохраняются)"""
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+            self.expirations = 0
+
+    def get(self, digest: bytes) -> Optional[dict]:
+        """Копия утверждений токена или None (промах или истекший токен)"""
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is not None and entry[0] <= time.time():
+                del self._entries[digest]
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(digest)
+            self.hits += 1
+            return dict(entry[1])
+
+    def put(self, digest: bytes, claims: dict) -> None:
+        """Запоминает утверждения проверенного токена до его exp (токены без exp не кэшируются)"""
+        expires_at = claims.get("exp")
+        if self.max_size <= 0 or not isinstance(expires_at, (int, float)):
+            return
+        with self._lock:
+            # Токен мог быть отозван, пока его проверяли
+            if digest in self._revoked:
+                return
+            self._entries[digest] = (float(expires_at), dict(claims))
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def revoke(self, digest: bytes, expires_at: float) -> None:
+        """Удаляет токен из кэша и отклоняет его до expires_at"""
+        now = time.time()
+        with self._lock:
+            self._entries.pop(digest, None)
+            if len(self._revoked) >= self.PRUNE_THRESHOLD:
+                self._revoked = {key: until for key, until in self._revoked.items() if until > now}
+            self._revoked[digest] = expires_at
+
+    def is_revoked(self, digest: bytes) -> bool:
+        return self._revoked.get(digest, 0.0) > time.time()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._revoked.clear()
+
+    def snapshot(self) -> Dict:
+        """Размер, настройки и накопленные счетчики"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "revoked": len(self._revoked),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+token_cache = VerifiedTokenCache(settings.AUTH_TOKEN_CACHE_SIZE)
+
+
+def revoke_token_digest(digest: bytes, expires_at: float) -> None:
+    """Отзыв токена в этом воркере и рассылка отзыва остальным"""
+    token_cache.revoke(digest, expires_at)
+    invalidation_bus.broadcast("token", f"{digest.hex()}:{expires_at}")
+
+
+def _revoke_from_message(key: str) -> None:
+    digest, expires_at = key.split(":")
+    token_cache.revoke(bytes.fromhex(digest), float(expires_at))
+
+
+invalidation_bus.on("token", _revoke_from_message)
@@ -0,0 +1,56 @@
+# benchmarks/bench_token_cache.py
+"""
+Бенчмарк проверки JWT: стоимость SecurityUtils.decode_token для
+повторяемого access-токена с кэшем проверенных токенов и без него.
+
+Без кэша каждый вызов — полный jwt.decode (HMAC-подпись и разбор
+утверждений); с кэшем — SHA-256 токена и поиск в словаре.
+
+    python benchmarks/bench_token_cache.py [--repeat 20000]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+# Добавляем корневую директорию проекта в sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key")
+
+from app.utils.security import SecurityUtils
+from app.utils.token_cache import token_cache
+
+
+def measure(token: str, repeat: int, cached: bool) -> float:
+    """Медианное время одного decode_token в микросекундах"""
+    timings = []
+    for _ in range(repeat):
+        if not cached:
+            token_cache.clear()
+        started = time.perf_counter()
+        SecurityUtils.decode_token(token)
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    return timings[len(timings) // 2] * 1_000_000
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="JWT decode benchmark with and without the verified-token cache")
+    parser.add_argument("--repeat", type=int, default=20000, help="decode calls per mode")
+    args = parser.parse_args()
+
+    token = SecurityUtils.create_access_token({"sub": "42"})
+    assert SecurityUtils.decode_token(token)["sub"] == "42"
+
+    uncached_us = measure(token, args.repeat, cached=False)
+    token_cache.clear()
+    SecurityUtils.decode_token(token)
+    cached_us = measure(token, args.repeat, cached=True)
+
+    print(f"decode_token, {args.repeat} calls per mode (median)")
+    print(f"without cache (jwt.decode): {uncached_us:8.2f} us")
+    print(f"with cache (digest lookup): {cached_us:8.2f} us")
+    print(f"speedup: {uncached_us / cached_us:.1f}x")
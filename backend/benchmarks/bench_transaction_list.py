@@ -0,0 +1,173 @@
+# benchmarks/bench_transaction_list.py
+"""
+Бенчмарк ленты транзакций: стоимость страницы из 1000 строк.
+
+Сравниваются два пути от запроса к JSON-байтам:
+  orm  — прежний: ORM-сущности Transaction + ручное копирование в словари +
+         TransactionListResponse + повторная проверка по response_model,
+         как это делает FastAPI, и json.dumps;
+  lean — текущий: TransactionService.get_transactions (только колонки,
+         без ORM-объектов) + RawJSONResponse.
+
+    python benchmarks/bench_transaction_list.py [--rows 1000] [--repeat 50]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+# Добавляем корневую директорию проекта в sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key")
+
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base
+from app.models import User, BudgetCategory, Transaction
+from app.models.category import CategoryTypeEnum
+from app.models.transaction import PaymentMethodEnum
+from app.schemas.transaction import TransactionListResponse
+from app.services.transaction import TransactionService
+from app.services.pydantic_helpers import model_to_dict
+from app.utils.json_response import RawJSONResponse
+
+
+async def seed(db, rows: int) -> int:
+    """Создает пользователя, категории и rows транзакций"""
+    user = User(email="bench@example.com", full_name="Bench", hashed_password="x")
+    db.add(user)
+    await db.flush()
+
+    categories = [
+        BudgetCategory(user_id=user.id, name=f"Category {i}", icon="tag", color="#123456",
+                       category_type=CategoryTypeEnum.EXPENSE)
+        for i in range(8)
+    ]
+    db.add_all(categories)
+    await db.flush()
+
+    start = datetime(2024, 1, 1)
+    await db.execute(insert(Transaction), [
+        {
+            "user_id": user.id,
+            "category_id": categories[i % len(categories)].id,
+            "amount": 10.0 + i % 100,
+            "transaction_type": CategoryTypeEnum.EXPENSE,
+            "description": f"Transaction {i}",
+            "transaction_date": start + timedelta(minutes=i),
+            "payment_method": PaymentMethodEnum.CARD,
+            "note": "benchmark",
+        }
+        for i in range(rows)
+    ])
+    await db.commit()
+    return user.id
+
+
+async def orm_path(db, user_id: int, limit: int) -> bytes:
+    """Прежний путь: ORM-сущности, словари, двойная проверка Pydantic"""
+    results = (await db.execute(select(
+        Transaction,
+        BudgetCategory.name.label("category_name"),
+        BudgetCategory.icon.label("category_icon"),
+        BudgetCategory.color.label("category_color")
+    ).outerjoin(
+        BudgetCategory, Transaction.category_id == BudgetCategory.id
+    ).where(
+        Transaction.user_id == user_id
+    ).order_by(Transaction.transaction_date.desc()).offset(0).limit(limit))).all()
+
+    transactions = []
+    for transaction, category_name, category_icon, category_color in results:
+        transactions.append({
+            "id": transaction.id,
+            "user_id": transaction.user_id,
+            "amount": transaction.amount,
+            "transaction_type": transaction.transaction_type,
+            "description": transaction.description,
+            "transaction_date": transaction.transaction_date,
+            "payment_method": transaction.payment_method,
+            "is_recurring": transaction.is_recurring,
+            "note": transaction.note,
+            "category_id": transaction.category_id,
+            "category_name": category_name,
+            "category_icon": category_icon,
+            "category_color": category_color,
+            "receipt_photo_url": transaction.receipt_photo_url,
+            "created_at": transaction.created_at,
+            "updated_at": transaction.updated_at
+        })
+
+    response = TransactionListResponse(transactions=transactions, summary=None)
+    # FastAPI повторно проверяет возвращенную модель по response_model и сериализует ее
+    validated = TransactionListResponse.model_validate(response.model_dump())
+    return json.dumps(validated.model_dump(mode="json")).encode("utf-8")
+
+
+async def lean_path(db, user_id: int, limit: int) -> bytes:
+    """Текущий путь: кортежи колонок сразу в JSON-байты"""
+    transactions, summary, next_cursor = await TransactionService.get_transactions(
+        user_id, None, 0, limit, db, include_summary=False
+    )
+    return RawJSONResponse({
+        "transactions": transactions,
+        "summary": model_to_dict(summary) if summary else None,
+        "next_cursor": next_cursor
+    }).body
+
+
+async def measure(func, session_factory, user_id: int, limit: int, repeat: int) -> float:
+    """Среднее время одного вызова в миллисекундах (новая сессия на вызов, как в запросе)"""
+    timings = []
+    for _ in range(repeat):
+        async with session_factory() as db:
+            started = time.perf_counter()
+            await func(db, user_id, limit)
+            timings.append(time.perf_counter() - started)
+    timings.sort()
+    # Медиана устойчивее к случайным паузам GC
+    return timings[len(timings) // 2] * 1000
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Transaction list serialization benchmark")
+    parser.add_argument("--rows", type=int, default=1000, help="page size")
+    parser.add_argument("--repeat", type=int, default=50, help="iterations per path")
+    args = parser.parse_args()
+
+    async def main():
+        engine = create_async_engine(
+            "sqlite+aiosqlite:///:memory:",
+            poolclass=StaticPool,
+        )
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+        SessionFactory = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+
+        async with SessionFactory() as session:
+            bench_user_id = await seed(session, args.rows)
+
+        # Прогрев, заодно убеждаемся, что пути отдают одинаковые данные
+        async with SessionFactory() as session:
+            orm_payload = json.loads(await orm_path(session, bench_user_id, args.rows))
+            lean_payload = json.loads(await lean_path(session, bench_user_id, args.rows))
+            assert len(orm_payload["transactions"]) == len(lean_payload["transactions"]) == args.rows
+
+        orm_ms = await measure(orm_path, SessionFactory, bench_user_id, args.rows, args.repeat)
+        lean_ms = await measure(lean_path, SessionFactory, bench_user_id, args.rows, args.repeat)
+        await engine.dispose()
+
+        print(f"rows per page: {args.rows}")
+        print(f"orm  (entities + dicts + 2x pydantic): {orm_ms:8.2f} ms")
+        print(f"lean (columns + raw JSON bytes):       {lean_ms:8.2f} ms")
+        print(f"speedup: {orm_ms / lean_ms:.1f}x")
+
+    asyncio.run(main())
@@ -0,0 +1,73 @@
+# scripts/archive_transactions.py
+"""
+Перенос старых транзакций в архив (transactions_archive) и обратно.
+
+Транзакции старше TRANSACTION_ARCHIVE_AFTER_DAYS дней переносятся
+порциями по TRANSACTION_ARCHIVE_BATCH_SIZE, каждая порция — отдельной
+транзакцией БД, чтобы не держать долгих блокировок. Запускается по
+расписанию (например, раз в сутки).
+
+    python scripts/archive_transactions.py                  # архивация по настройкам
+    python scripts/archive_transactions.py --days 365       # другой возраст
+    python scripts/archive_transactions.py --restore        # вернуть все из архива
+    python scripts/archive_transactions.py --restore --user-id 42
+
+Перед отключением архива (TRANSACTION_ARCHIVE_AFTER_DAYS=None) верните
+транзакции через --restore: при отключенном архиве он не читается.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+from datetime import date, timedelta
+
+# Добавляем корневую директорию проекта в sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.config import settings
+from app.database import unit_of_work
+from app.services.archive import ArchiveService
+
+
+async def archive_transactions(days: int, batch_size: int) -> int:
+    """Переносит в архив транзакции старше days дней и возвращает их количество"""
+    older_than = date.today() - timedelta(days=days)
+    moved = 0
+    while True:
+        async with unit_of_work() as db:
+            batch = await ArchiveService.archive_batch(older_than, batch_size, db)
+        moved += batch
+        if batch < batch_size:
+            return moved
+
+
+async def restore_transactions(batch_size: int, user_id=None) -> int:
+    """Возвращает транзакции из архива и возвращает их количество"""
+    moved = 0
+    while True:
+        async with unit_of_work() as db:
+            batch = await ArchiveService.restore_batch(batch_size, db, user_id)
+        moved += batch
+        if batch < batch_size:
+            return moved
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move old transactions to the archive table and back")
+    parser.add_argument("--days", type=int, default=settings.TRANSACTION_ARCHIVE_AFTER_DAYS,
+                        help="archive transactions older than this many days")
+    parser.add_argument("--batch-size", type=int, default=settings.TRANSACTION_ARCHIVE_BATCH_SIZE)
+    parser.add_argument("--restore", action="store_true", help="move archived transactions back")
+    parser.add_argument("--user-id", type=int, default=None, help="restore only this user")
+    args = parser.parse_args()
+
+    if args.restore:
+        restored = asyncio.run(restore_transactions(args.batch_size, args.user_id))
+        print(f"Restored {restored} transaction(s) from the archive")
+    else:
+        # Без настройки приложение не читает архив, и перенесенные транзакции пропали бы из ответов
+        if not ArchiveService.is_enabled():
+            sys.exit("Archiving is disabled: set TRANSACTION_ARCHIVE_AFTER_DAYS")
+        archived = asyncio.run(archive_transactions(args.days, args.batch_size))
+        print(f"Archived {archived} transaction(s) older than {args.days} day(s)")
@@ -0,0 +1,66 @@
+# scripts/partition_transactions.py
+"""
+Помесячное секционирование таблицы transactions в PostgreSQL.
+
+    python scripts/partition_transactions.py convert [--keep-legacy]
+        Перевод существующей таблицы в секционированную (окно обслуживания:
+        таблица блокируется на время копирования). С --keep-legacy исходная
+        таблица остается как transactions_unpartitioned для отката.
+    python scripts/partition_transactions.py ensure [--months-ahead 3]
+        Создание секций на будущие месяцы и для строк из секции по
+        умолчанию. Запускается по расписанию (например, ежедневно); то же
+        делает приложение при старте, если DB_PARTITION_TRANSACTIONS=true.
+    python scripts/partition_transactions.py status
+        Список секций и количество строк в секции по умолчанию.
+
+После convert включите DB_PARTITION_TRANSACTIONS=true. Миграции Alembic
+продолжают работать с таблицей; индексы на ней нельзя создавать
+CONCURRENTLY (ограничение PostgreSQL для секционированных таблиц).
+"""
+
+import argparse
+import os
+import sys
+
+# Добавляем корневую директорию проекта в sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import text
+
+from app.config import settings
+from app.database import engine, is_sqlite
+from app.models.transaction import Transaction
+from app.utils.partitioning import (
+    DEFAULT_PARTITION, convert_to_partitioned, ensure_partitions, existing_partitions, is_partitioned,
+)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Monthly partitioning of the transactions table (PostgreSQL)")
+    parser.add_argument("command", choices=("convert", "ensure", "status"))
+    parser.add_argument("--months-ahead", type=int, default=settings.DB_PARTITION_MONTHS_AHEAD,
+                        help="future months to create partitions for")
+    parser.add_argument("--keep-legacy", action="store_true",
+                        help="convert: keep the original table as transactions_unpartitioned")
+    args = parser.parse_args()
+
+    if is_sqlite:
+        sys.exit("Partitioning is only supported on PostgreSQL")
+
+    with engine.begin() as connection:
+        if args.command == "convert":
+            moved = convert_to_partitioned(connection, Transaction.__table__, args.months_ahead, args.keep_legacy)
+            print(f"Moved {moved} transaction(s) into {len(existing_partitions(connection))} partition(s)")
+        elif args.command == "ensure":
+            if not is_partitioned(connection):
+                sys.exit("Table transactions is not partitioned, run 'convert' first")
+            created = ensure_partitions(connection, args.months_ahead)
+            print(f"Created {len(created)} partition(s): {', '.join(created) or '-'}")
+        else:
+            if not is_partitioned(connection):
+                print("Table transactions is not partitioned")
+            else:
+                for name in sorted(existing_partitions(connection)):
+                    print(name)
+                in_default = connection.execute(text(f"SELECT count(*) FROM {DEFAULT_PARTITION}")).scalar()
+                print(f"Rows in {DEFAULT_PARTITION}: {in_default}")
@@ -0,0 +1,50 @@
+# scripts/rebuild_balances.py
+"""
+Пересчет агрегированных балансов пользователей по сырым транзакциям.
+
+Используется для восстановления таблицы user_balances, если агрегат
+разошелся с транзакциями (ручные правки в БД, сбой при миграции и т.п.).
+После пересчета версии данных пересчитанных пользователей меняются во всех
+воркерах (через общий бэкенд кэша), чтобы их ETag не подтверждали старые
+балансы.
+
+    python scripts/rebuild_balances.py              # все пользователи
+    python scripts/rebuild_balances.py --user-id 42 # один пользователь
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+
+# Добавляем корневую директорию проекта в sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.database import unit_of_work
+from app.services.balance import BalanceService
+from app.utils.cache_backend import cache_backend
+from app.utils.data_version import publish_data_changed
+
+
+async def rebuild_balances(user_id=None) -> int:
+    """Пересчитывает балансы и возвращает количество записанных строк"""
+    async with unit_of_work() as db:
+        rebuilt = await BalanceService.rebuild(db, user_id)
+    await publish_data_changed(user_id)
+    return rebuilt
+
+
+async def main(user_id=None) -> int:
+    try:
+        return await rebuild_balances(user_id)
+    finally:
+        await cache_backend.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild user balances from raw transactions")
+    parser.add_argument("--user-id", type=int, default=None, help="rebuild only this user")
+    args = parser.parse_args()
+
+    rebuilt = asyncio.run(main(args.user_id))
+    print(f"Rebuilt {rebuilt} balance row(s)")
@@ -1,11 +1,16 @@
 # tests/conftest.py
+import asyncio
+import atexit
 import pytest
+import shutil
 import sys
 import os
+import tempfile
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool
 
 # Добавляем путь к корневой директории проекта
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -15,66 +20,91 @@ os.environ['DATABASE_URL'] = "sqlite:///:memory:"
 os.environ['SECRET_KEY'] = "test-secret-key-for-testing-purposes-only"
 
 # Импортируем только после установки переменных окружения
-from app.database import Base, get_db
+from app.config import settings
+from app.database import (
+    Base, get_db, get_async_database_url, get_session_factory, session_dependency, unit_of_work
+)
 from app.main import app
+from app.utils.category_cache import category_cache
+from app.utils.data_version import data_versions
+from app.utils.cache_backend import cache_backend
 from app.utils.security import SecurityUtils
+from app.utils.token_cache import token_cache
 from app.models.user import User
 from app.models.financial import UserProfile, FinancialData, SubscriptionTypeEnum
 # Импортируем все модели, чтобы они были доступны для создания таблиц
 from app.models import *
 
-# Создаем тестовую базу данных в памяти
-SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+# Тестовая база — временный файл SQLite: фикстуры наполняют ее через
+# синхронную сессию, приложение работает с ней через асинхронную (aiosqlite)
+TEST_DB_DIR = tempfile.mkdtemp()
+atexit.register(shutil.rmtree, TEST_DB_DIR, ignore_errors=True)
+SQLALCHEMY_DATABASE_URL = f"sqlite:///{os.path.join(TEST_DB_DIR, 'test.db')}"
 
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL,
     connect_args={"check_same_thread": False},
-    poolclass=StaticPool,
+)
+# Каждый TestClient запускает свой цикл событий, поэтому соединения
+# между тестами не переиспользуются
+async_engine = create_async_engine(
+    get_async_database_url(SQLALCHEMY_DATABASE_URL),
+    poolclass=NullPool,
 )
 
-# Создаем тестовую сессию
+# Создаем тестовые сессии
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+TestingAsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False,
+                                              expire_on_commit=False)
 
 # Создаем таблицы перед запуском тестов
 Base.metadata.create_all(bind=engine)
 
 
-def override_get_db():
-    """Переопределение функции get_db для тестов"""
-    try:
-        db = TestingSessionLocal()
-        yield db
-    finally:
-        db.close()
-
+# Переопределение функции get_db для тестов: та же единица работы на запрос
+override_get_db = session_dependency(TestingAsyncSessionLocal)
 
 # Переопределяем зависимость базы данных для тестов
 app.dependency_overrides[get_db] = override_get_db
+app.dependency_overrides[get_session_factory] = lambda: TestingAsyncSessionLocal
 
 
 @pytest.fixture(scope="function")
 def db():
     """Фикстура для тестовой базы данных"""
-    # Очищаем все существующие данные из таблиц перед каждым тестом
-    connection = engine.connect()
-    transaction = connection.begin()
+    # Очищаем все существующие данные из таблиц перед каждым тестом.
+    # Внешнюю транзакцию не используем: приложение работает через свои
+    # соединения и должно видеть данные фикстур, поэтому они коммитятся.
+    db = TestingSessionLocal()
 
     try:
-        # Создаем сессию с привязкой к транзакции
-        db = TestingSessionLocal(bind=connection)
-
-        # Очищаем все таблицы
-        tables = Base.metadata.sorted_tables
-        for table in tables:
+        # Очищаем все таблицы (зависимые — первыми)
+        for table in reversed(Base.metadata.sorted_tables):
             db.execute(text(f"DELETE FROM {table.name}"))
 
         db.commit()
+        # id пользователей после очистки повторяются: кэши прошлого теста недействительны
+        cache_backend.clear()
+        token_cache.clear()
+        category_cache.clear()
+        data_versions.clear()
 
         yield db
     finally:
         db.close()
-        transaction.rollback()
-        connection.close()
+
+
+@pytest.fixture(scope="function")
+def run_in_session(db):
+    """Фикстура для вызова асинхронных методов сервисов: run_in_session(lambda session: ...)"""
+    def run(call):
+        async def runner():
+            async with unit_of_work(TestingAsyncSessionLocal) as session:
+                return await call(session)
+
+        return asyncio.run(runner())
+
+    return run
 
 
 @pytest.fixture(scope="function")
@@ -148,6 +178,13 @@ def token(client, test_user):
     return response.json()["access_token"]
 
 
+@pytest.fixture(scope="function")
+def internal_headers(monkeypatch):
+    """Фикстура: заголовок доступа к служебным эндпоинтам /internal"""
+    monkeypatch.setattr(settings, "INTERNAL_API_TOKEN", "internal-secret")
+    return {"X-Internal-Token": "internal-secret"}
+
+
 @pytest.fixture(scope="function")
 def authorized_client(client, token):
     """Фикстура для авторизованного клиента"""
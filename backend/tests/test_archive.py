@@ -0,0 +1,137 @@
+# tests/test_archive.py
+"""
+Архив старых транзакций: перенос, прозрачное чтение ленты и агрегатов
+через объединение с архивом, изменение архивных транзакций и возврат
+из архива.
+"""
+from datetime import date, datetime
+
+import pytest
+
+from app.config import settings
+from app.models.category import CategoryTypeEnum
+from app.models.transaction import Transaction, TransactionArchive
+from app.services.archive import ArchiveService
+from tests.test_transactions import capture_statements, create_transaction
+
+
+@pytest.fixture
+def archive_enabled(monkeypatch):
+    monkeypatch.setattr(settings, "TRANSACTION_ARCHIVE_AFTER_DAYS", 365)
+
+
+def archive_before(run_in_session, older_than):
+    return run_in_session(lambda session: ArchiveService.archive_batch(older_than, 100, session))
+
+
+def test_archived_transactions_are_read_transparently(authorized_client, db, run_in_session, archive_enabled):
+    """Лента, итоги, статистика и баланс после архивации видят те же транзакции"""
+    create_transaction(authorized_client, 100.0, "income", "2021-05-10T10:00:00")
+    create_transaction(authorized_client, 30.0, "expense", "2021-06-10T10:00:00")
+    create_transaction(authorized_client, 20.0, "expense", "2024-03-15T10:00:00")
+    before = authorized_client.get("/api/v1/transactions/").json()
+
+    assert archive_before(run_in_session, date(2022, 1, 1)) == 2
+    assert db.query(Transaction).count() == 1
+    assert db.query(TransactionArchive).count() == 2
+
+    after = authorized_client.get("/api/v1/transactions/").json()
+    assert after == before
+    assert after["summary"]["transaction_count"] == 3
+
+    stats = authorized_client.get("/api/v1/transactions/stats/by-category", params={
+        "start_date": "2021-01-01", "end_date": "2021-12-31", "transaction_type": "expense"
+    }).json()
+    assert stats["total_amount"] == 30.0
+
+    series = authorized_client.get("/api/v1/transactions/stats/series", params={
+        "bucket": "year", "from": "2021-01-01", "to": "2024-12-31"
+    }).json()
+    assert [point["transaction_count"] for point in series["points"]] == [2, 0, 0, 1]
+
+    balance = authorized_client.get("/api/v1/transactions/balance").json()
+    assert balance["net_balance"] == 50.0 and balance["transaction_count"] == 3
+
+
+def test_recent_range_does_not_read_archive(authorized_client, run_in_session, archive_enabled):
+    """Диапазон, не доходящий до архива, читает только рабочую таблицу"""
+    create_transaction(authorized_client, 30.0, "expense", "2021-06-10T10:00:00")
+    create_transaction(authorized_client, 20.0, "expense", "2024-03-15T10:00:00")
+    archive_before(run_in_session, date(2022, 1, 1))
+
+    response, statements = capture_statements(lambda: authorized_client.get(
+        "/api/v1/transactions/period/month", params={"date": "2024-03-01"}
+    ))
+    assert [item["amount"] for item in response.json()["transactions"]] == [20.0]
+    # Архив только пробуется по индексу, в запросы ленты и итогов он не входит
+    archive_statements = [statement for statement in statements if "transactions_archive" in statement]
+    assert len(archive_statements) == 1 and "max(" in archive_statements[0]
+
+    response, statements = capture_statements(lambda: authorized_client.get(
+        "/api/v1/transactions/", params={"start_date": "2021-01-01"}
+    ))
+    assert [item["amount"] for item in response.json()["transactions"]] == [20.0, 30.0]
+    assert any("UNION ALL" in statement for statement in statements)
+
+
+def test_restore_moves_transactions_back(authorized_client, db, test_user, run_in_session, archive_enabled):
+    """Возврат из архива восстанавливает строки с исходными id"""
+    created = create_transaction(authorized_client, 30.0, "expense", "2021-06-10T10:00:00")
+    archive_before(run_in_session, date(2022, 1, 1))
+    assert db.query(Transaction).count() == 0
+
+    restored = run_in_session(lambda session: ArchiveService.restore_batch(100, session, test_user.id))
+
+    assert restored == 1
+    assert db.query(TransactionArchive).count() == 0
+    assert authorized_client.get(f"/api/v1/transactions/{created['id']}").json()["amount"] == 30.0
+
+
+def test_archived_transaction_by_id(authorized_client, db, run_in_session, archive_enabled):
+    """Архивная транзакция читается, изменяется и удаляется по id, как рабочая"""
+    updated, deleted = (create_transaction(authorized_client, amount, "expense", "2021-06-10T10:00:00")
+                        for amount in (30.0, 40.0))
+    archive_before(run_in_session, date(2022, 1, 1))
+
+    assert authorized_client.get(f"/api/v1/transactions/{updated['id']}").json()["amount"] == 30.0
+
+    response = authorized_client.put(f"/api/v1/transactions/{updated['id']}", json={"amount": 35.0})
+    assert response.status_code == 200 and response.json()["amount"] == 35.0
+    assert authorized_client.delete(f"/api/v1/transactions/{deleted['id']}").status_code == 200
+
+    assert db.query(TransactionArchive).count() == 0
+    assert [item["amount"] for item in authorized_client.get("/api/v1/transactions/").json()["transactions"]] == [35.0]
+    balance = authorized_client.get("/api/v1/transactions/balance").json()
+    assert balance["total_expense"] == 35.0 and balance["transaction_count"] == 1
+
+
+def test_bulk_operations_include_archive(authorized_client, db, run_in_session, archive_enabled):
+    """Массовые изменение и удаление затрагивают и архивные транзакции"""
+    old = create_transaction(authorized_client, 30.0, "expense", "2021-06-10T10:00:00")
+    recent = create_transaction(authorized_client, 20.0, "expense", "2024-03-15T10:00:00")
+    archive_before(run_in_session, date(2022, 1, 1))
+
+    response = authorized_client.post("/api/v1/transactions/bulk-update", json={
+        "ids": [old["id"], recent["id"]], "changes": {"description": "Renamed"}
+    })
+    assert response.json() == {"affected": 2}
+
+    response = authorized_client.post("/api/v1/transactions/bulk-delete", json={
+        "filters": {"end_date": "2021-12-31"}
+    })
+    assert response.json() == {"affected": 1}
+    assert db.query(TransactionArchive).count() == 0
+    remaining = authorized_client.get("/api/v1/transactions/").json()["transactions"]
+    assert [(item["id"], item["description"]) for item in remaining] == [(recent["id"], "Renamed")]
+
+
+def test_archive_disabled_skips_probe(authorized_client, db, test_user):
+    """Без настройки архив не запрашивается вовсе"""
+    db.add(Transaction(user_id=test_user.id, amount=10.0, transaction_type=CategoryTypeEnum.EXPENSE,
+                       transaction_date=datetime(2024, 3, 15)))
+    db.commit()
+
+    response, statements = capture_statements(lambda: authorized_client.get("/api/v1/transactions/"))
+
+    assert response.json()["summary"]["transaction_count"] == 1
+    assert not any("transactions_archive" in statement for statement in statements)
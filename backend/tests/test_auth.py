@@ -1,6 +1,16 @@
 # tests/test_auth.py
 import pytest
+from sqlalchemy import event
 from app.models.user import User
+from app.services.profile import ProfileService
+from tests.conftest import async_engine
+
+REGISTRATION = {
+    "email": "newuser@example.com",
+    "full_name": "New User",
+    "password": "StrongPass123!",
+    "confirm_password": "StrongPass123!"
+}
 
 
 def test_register_user(client, db):
@@ -28,6 +38,33 @@ def test_register_user(client, db):
     assert user.is_verified == False  # По умолчанию не верифицирован
 
 
+def test_register_user_commits_once(client, db):
+    """Пользователь, профиль, подписка и финансовые данные фиксируются одним коммитом"""
+    commits = []
+    listener = lambda connection: commits.append(connection)
+    event.listen(async_engine.sync_engine, "commit", listener)
+    try:
+        response = client.post("/api/v1/auth/register", json=REGISTRATION)
+    finally:
+        event.remove(async_engine.sync_engine, "commit", listener)
+
+    assert response.status_code == 201
+    assert len(commits) == 1
+
+
+def test_register_user_is_atomic(client, db, monkeypatch):
+    """Сбой на последнем шаге регистрации откатывает и пользователя"""
+    async def failing_financial_data(*args, **kwargs):
+        raise RuntimeError("financial data unavailable")
+
+    monkeypatch.setattr(ProfileService, "create_financial_data", failing_financial_data)
+
+    with pytest.raises(RuntimeError):
+        client.post("/api/v1/auth/register", json=REGISTRATION)
+
+    assert db.query(User).filter(User.email == REGISTRATION["email"]).first() is None
+
+
 def test_login_user(client, test_user):
     """Тест входа пользователя"""
     response = client.post(
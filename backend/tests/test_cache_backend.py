@@ -0,0 +1,286 @@
+# tests/test_cache_backend.py
+"""
+Бэкенды кэша: LRU в памяти процесса, клиент протокола Redis против
+локального поддельного сервера и рассылка инвалидаций между воркерами.
+"""
+import asyncio
+import time
+
+import pytest
+
+from app.config import settings
+from app.utils import cache_backend as cache_backend_module
+from app.utils.cache_backend import (
+    CacheBackend, InProcessBackend, InvalidationBus, RedisBackend, create_cache_backend, encode_command, read_reply
+)
+
+
+class FakeRedisServer:
+    """Минимальный сервер RESP: строки с PX, PUBLISH/SUBSCRIBE, AUTH и SELECT"""
+
+    def __init__(self, password: str = None):
+        self.password = password
+        self.values = {}
+        self.subscribers = {}
+        self.commands = []
+        self.connections = 0
+        # Задержка ответа на GET, секунд
+        self.delay = 0.0
+
+    async def __aenter__(self):
+        self.server = await asyncio.start_server(self._serve, "127.0.0.1", 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.server.close()
+        for writers in self.subscribers.values():
+            for writer in writers:
+                writer.close()
+
+    def url(self, db: int = 0) -> str:
+        credentials = f":{self.password}@" if self.password else ""
+        return f"redis://{credentials}127.0.0.1:{self.port}/{db}"
+
+    async def _serve(self, reader, writer):
+        self.connections += 1
+        authorized = self.password is None
+        try:
+            while True:
+                name, *args = await read_reply(reader)
+                name = name.upper()
+                self.commands.append(name)
+                if name == b"AUTH":
+                    authorized = args[-1].decode() == self.password
+                    writer.write(b"+OK\r\n" if authorized else b"-WRONGPASS invalid password\r\n")
+                elif not authorized:
+                    writer.write(b"-NOAUTH Authentication required.\r\n")
+                elif name in (b"PING", b"SELECT"):
+                    writer.write(b"+OK\r\n")
+                elif name == b"GET":
+                    await asyncio.sleep(self.delay)
+                    entry = self.values.get(args[0])
+                    if entry is None or entry[0] <= time.monotonic():
+                        writer.write(b"$-1\r\n")
+                    else:
+                        writer.write(b"$%d\r\n%s\r\n" % (len(entry[1]), entry[1]))
+                elif name == b"SET":
+                    self.values[args[0]] = (time.monotonic() + int(args[3]) / 1000, args[1])
+                    writer.write(b"+OK\r\n")
+                elif name == b"DEL":
+                    writer.write(b":%d\r\n" % sum(self.values.pop(key, None) is not None for key in args))
+                elif name == b"PUBLISH":
+                    receivers = self.subscribers.get(args[0], [])
+                    for receiver in receivers:
+                        receiver.write(encode_command(b"message", args[0], args[1]))
+                    writer.write(b":%d\r\n" % len(receivers))
+                elif name == b"SUBSCRIBE":
+                    for count, channel in enumerate(args, start=1):
+                        self.subscribers.setdefault(channel, []).append(writer)
+                        writer.write(encode_command(b"subscribe", channel) + b":%d\r\n" % count)
+                else:
+                    writer.write(b"-ERR unknown command\r\n")
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            writer.close()
+
+
+async def wait_until(condition, timeout: float = 2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        await asyncio.sleep(0.01)
+
+
+def test_in_process_backend_expires_and_evicts(monkeypatch):
+    """Тест TTL и вытеснения давно не использованных записей"""
+    now = [1000.0]
+    monkeypatch.setattr(cache_backend_module.time, "monotonic", lambda: now[0])
+    backend = InProcessBackend(max_items=2)
+
+    async def scenario():
+        await backend.set("a", b"1", 30)
+        await backend.set("b", b"2", 30)
+        assert await backend.get("a") == b"1"
+        await backend.set("c", b"3", 30)  # вытесняет b: к a обращались позже
+
+        assert await backend.get("b") is None
+        assert await backend.get("c") == b"3"
+        now[0] += 31
+        assert await backend.get("a") is None
+
+    asyncio.run(scenario())
+    assert backend.evictions == 1
+
+
+def test_redis_backend_values():
+    """Тест значений с TTL, удаления и авторизации в клиенте протокола Redis"""
+    async def scenario():
+        async with FakeRedisServer(password="secret") as server:
+            backend = RedisBackend(server.url(db=2))
+            await backend.set("key", b"value", 0.2)
+            assert await backend.get("key") == b"value"
+            await backend.delete("key")
+            assert await backend.get("key") is None
+
+            await backend.set("short", b"value", 0.05)
+            await asyncio.sleep(0.1)
+            assert await backend.get("short") is None
+            assert server.commands[:2] == [b"AUTH", b"SELECT"]
+            await backend.close()
+
+    asyncio.run(scenario())
+
+
+def test_redis_backend_failures_are_misses():
+    """Тест: недоступный сервер дает промах, а не ошибку запроса"""
+    async def scenario():
+        async with FakeRedisServer(password="secret") as server:
+            backend = RedisBackend(f"redis://:wrong@127.0.0.1:{server.port}", timeout=0.5)
+            assert await backend.get("key") is None
+            await backend.close()
+        backend = RedisBackend(f"redis://127.0.0.1:{server.port}", timeout=0.5)
+        await backend.set("key", b"value", 1)
+        assert await backend.get("key") is None
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_command_does_not_leak_reply():
+    """Тест: после отмены команды ее ответ не достается следующей команде"""
+    async def scenario():
+        async with FakeRedisServer() as server:
+            backend = RedisBackend(server.url())
+            await backend.set("alice", b"alice", 10)
+            await backend.set("bob", b"bob", 10)
+
+            server.delay = 0.1
+            pending = asyncio.create_task(backend.get("alice"))
+            await asyncio.sleep(0.02)
+            pending.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await pending
+            server.delay = 0.0
+
+            assert await backend.get("bob") == b"bob"
+            await backend.close()
+
+    asyncio.run(scenario())
+
+
+def test_unavailable_server_is_skipped_during_backoff(monkeypatch):
+    """Тест: после ошибки команды бэкенд не подключается заново до конца паузы"""
+    attempts = []
+
+    async def refuse(*args):
+        attempts.append(args)
+        raise ConnectionRefusedError()
+
+    monkeypatch.setattr(cache_backend_module.asyncio, "open_connection", refuse)
+
+    async def scenario():
+        backend = RedisBackend("redis://127.0.0.1:1")
+        assert await backend.get("key") is None
+        assert await backend.get("key") is None
+        await backend.set("key", b"value", 1)
+        assert len(attempts) == 1
+
+        backend._unavailable_until = 0.0
+        assert await backend.get("key") is None
+        assert len(attempts) == 2
+
+    asyncio.run(scenario())
+
+
+def test_deletes_during_backoff_are_retried():
+    """Тест: удаление во время паузы не теряется, а удаляемый ключ до повтора не читается"""
+    async def scenario():
+        async with FakeRedisServer() as server:
+            backend = RedisBackend(server.url())
+            await backend.set("revoked", b"principal", 10)
+            await backend.set("other", b"value", 10)
+
+            backend._unavailable_until = time.monotonic() + 0.2
+            backend.delete_nowait("revoked")
+            await asyncio.sleep(0.01)
+            assert b"revoked" in server.values
+            assert await backend.get("revoked") is None
+
+            # Повтор после паузы без новых команд
+            await wait_until(lambda: b"revoked" not in server.values)
+            assert await backend.get("other") == b"value"
+            await backend.close()
+
+    asyncio.run(scenario())
+
+
+def test_concurrent_commands_use_connection_pool():
+    """Тест: медленные команды выполняются параллельно по соединениям пула"""
+    async def scenario():
+        async with FakeRedisServer() as server:
+            backend = RedisBackend(server.url(), pool_size=3)
+            await backend.set("key", b"value", 10)
+            server.delay = 0.2
+
+            started = time.monotonic()
+            replies = await asyncio.gather(*(backend.get("key") for _ in range(6)))
+            elapsed = time.monotonic() - started
+
+            assert replies == [b"value"] * 6
+            assert 0.4 <= elapsed < 0.6
+            assert server.connections == 3
+            await backend.close()
+
+    asyncio.run(scenario())
+
+
+def test_backend_interface_is_abstract():
+    """Тест: бэкенд без реализации операций не создается"""
+    class Incomplete(CacheBackend):
+        async def get(self, key):
+            return None
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_invalidations_reach_other_workers():
+    """Тест: сообщение шины доходит до другого воркера и не возвращается отправителю"""
+    async def scenario():
+        async with FakeRedisServer() as server:
+            workers = [RedisBackend(server.url()) for _ in range(2)]
+            buses = [InvalidationBus(backend) for backend in workers]
+            received = [[], []]
+            for bus, keys in zip(buses, received):
+                bus.on("categories", keys.append)
+            for backend in workers:
+                await backend.start()
+            channel = (settings.CACHE_KEY_PREFIX + InvalidationBus.CHANNEL).encode()
+            await wait_until(lambda: len(server.subscribers.get(channel, [])) == 2)
+
+            buses[0].broadcast("categories", 42)
+            buses[0].broadcast("unknown", 1)
+            await wait_until(lambda: received[1] == ["42"])
+            await asyncio.sleep(0.05)
+            assert received[0] == []
+            for backend in workers:
+                await backend.close()
+
+    asyncio.run(scenario())
+
+
+def test_create_cache_backend_from_settings(monkeypatch):
+    """Тест выбора бэкенда по настройкам"""
+    monkeypatch.setattr(settings, "CACHE_BACKEND", "memory")
+    monkeypatch.setattr(settings, "CACHE_MEMORY_MAX_ITEMS", 7)
+    backend = create_cache_backend()
+    assert isinstance(backend, InProcessBackend) and backend.max_items == 7 and not backend.shared
+
+    monkeypatch.setattr(settings, "CACHE_BACKEND", "redis")
+    monkeypatch.setattr(settings, "CACHE_REDIS_URL", "redis://cache.internal:6380/1")
+    backend = create_cache_backend()
+    assert isinstance(backend, RedisBackend) and (backend.host, backend.port, backend.db) == ("cache.internal", 6380, 1)
+
+    monkeypatch.setattr(settings, "CACHE_REDIS_URL", None)
+    with pytest.raises(ValueError):
+        create_cache_backend()
@@ -0,0 +1,135 @@
+# tests/test_category_cache.py
+"""
+Кэш категорий: списки и проверка категорий транзакций из памяти,
+инвалидация версией при создании, изменении и удалении категории.
+"""
+from app.models.category import CategoryTypeEnum
+from app.schemas.category import CategoryCreate
+from app.services.category import CategoryService
+from app.utils.category_cache import CategoryCache, CategoryEntry, category_cache
+from tests.test_transactions import capture_statements, create_category
+
+
+def category_queries(statements):
+    return [statement for statement in statements if "budget_categories" in statement]
+
+
+def entry(category_id: int) -> CategoryEntry:
+    return CategoryEntry(id=category_id, user_id=1, name=f"Category {category_id}", description=None,
+                         icon=None, color=None, category_type=CategoryTypeEnum.EXPENSE, is_system=False,
+                         position=0, created_at=None, updated_at=None)
+
+
+def test_listings_and_validation_are_served_from_memory(authorized_client):
+    """Тест: после первой загрузки категории не запрашиваются"""
+    groceries = create_category(authorized_client, "Groceries")
+    # Первый вызов создает системные категории и меняет версию, второй загружает карту
+    authorized_client.get("/api/v1/categories/system")
+    authorized_client.get("/api/v1/categories/")
+
+    def requests():
+        return [
+            authorized_client.get("/api/v1/categories/"),
+            authorized_client.get("/api/v1/categories/expense"),
+            authorized_client.get("/api/v1/categories/system"),
+            authorized_client.post("/api/v1/transactions/", json={
+                "amount": 12.5, "transaction_type": "expense", "category_id": groceries,
+                "transaction_date": "2024-03-10T10:00:00"
+            }),
+        ]
+
+    (listing, expense, system, created), statements = capture_statements(requests)
+
+    assert category_queries(statements) == []
+    assert "Groceries" in [category["name"] for category in listing.json()["expense_categories"]]
+    assert expense.json() == listing.json()["expense_categories"]
+    assert len(system.json()["income_categories"]) == 4
+    assert created.status_code == 201
+
+
+def test_category_changes_invalidate_map(authorized_client):
+    """Тест: изменение и удаление категории сразу видны проверке транзакций"""
+    food = create_category(authorized_client, "Food")
+    transaction = {"amount": 10, "transaction_type": "expense", "category_id": food,
+                   "transaction_date": "2024-03-10T10:00:00"}
+    assert authorized_client.post("/api/v1/transactions/", json=transaction).status_code == 201
+
+    authorized_client.put(f"/api/v1/categories/{food}", json={"name": "Salary", "category_type": "income"})
+    assert authorized_client.post("/api/v1/transactions/", json=transaction).status_code == 400
+    assert [category["name"] for category in authorized_client.get("/api/v1/categories/income").json()] == ["Salary"]
+
+    other = create_category(authorized_client, "Gifts")
+    assert authorized_client.delete(f"/api/v1/categories/{other}").status_code == 200
+    response = authorized_client.post("/api/v1/transactions/", json={**transaction, "category_id": other})
+    assert response.status_code == 404
+
+
+def test_duplicate_check_ignores_cached_map(authorized_client, test_user):
+    """Тест: уникальность имени проверяется по базе, а не по карте из кэша"""
+    create_category(authorized_client, "Rent")
+    category_cache.put(test_user.id, category_cache.version(test_user.id), [])
+
+    response = authorized_client.post("/api/v1/categories/", json={"name": "Rent", "category_type": "expense"})
+    assert response.status_code == 400
+
+
+def test_category_missing_from_stale_map_is_read_from_database(authorized_client, test_user):
+    """Тест: категория, созданная в другом воркере, находится по базе, а устаревшая карта сбрасывается"""
+    travel = create_category(authorized_client, "Travel")
+    # Карта воркера, загруженная до создания категории: инвалидация до него не дошла
+    category_cache.put(test_user.id, category_cache.version(test_user.id), [])
+
+    response = authorized_client.post("/api/v1/transactions/", json={
+        "amount": 30, "transaction_type": "expense", "category_id": travel,
+        "transaction_date": "2024-03-10T10:00:00"
+    })
+
+    assert response.status_code == 201
+    assert category_cache.get(test_user.id) is None
+    assert authorized_client.post("/api/v1/transactions/", json={
+        "amount": 30, "transaction_type": "expense", "category_id": travel + 1000,
+        "transaction_date": "2024-03-10T10:00:00"
+    }).status_code == 404
+
+
+def test_map_with_uncommitted_changes_is_not_stored(run_in_session, test_user):
+    """Тест: сессия с незакоммиченными изменениями категорий читает их мимо кэша и не кэширует"""
+    async def create_and_read(session):
+        await CategoryService.create_category(
+            test_user.id, CategoryCreate(name="Pets", category_type="expense"), session
+        )
+        categories = await CategoryService.get_category_map(test_user.id, session)
+        return [entry.name for entry in categories.values()], category_cache.get(test_user.id)
+
+    names, cached_during_session = run_in_session(create_and_read)
+
+    assert names == ["Pets"] and cached_during_session is None
+    assert category_cache.get(test_user.id) is None
+
+
+def test_map_loaded_before_a_change_is_not_stored():
+    """Тест: карта, загруженная до смены версии, возвращается, но не кэшируется"""
+    cache = CategoryCache(max_size=10, ttl_seconds=60)
+    version = cache.version(1)
+    cache.bump(1)
+
+    assert list(cache.put(1, version, [entry(1)])) == [1]
+    assert cache.get(1) is None
+
+    cache.put(1, cache.version(1), [entry(1), entry(2)])
+    assert list(cache.get(1)) == [1, 2]
+
+
+def test_dropped_versions_keep_current_maps():
+    """Тест: при ограничении числа версий актуальные карты сохраняются, а старые загрузки — нет"""
+    cache = CategoryCache(max_size=2, ttl_seconds=60)
+    stale_version = cache.version(3)
+    for user_id in (1, 2):
+        cache.bump(user_id)
+        cache.put(user_id, cache.version(user_id), [entry(user_id)])
+    cache.bump(3)  # третья версия превышает предел: версии сбрасываются на новом _floor
+    cache.put(3, cache.version(3), [entry(3)])
+
+    assert cache.get(3) is not None
+    assert cache.get(1) is None  # вытеснена как давно не использованная
+    assert cache.put(4, stale_version, [entry(4)]) and cache.get(4) is None
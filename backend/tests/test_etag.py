@@ -0,0 +1,136 @@
+# tests/test_etag.py
+"""
+Условные GET: ETag по версии данных пользователя, 304 без обращения к БД
+и смена ETag после записи в транзакциях, категориях и профиле.
+"""
+import asyncio
+
+import pytest
+
+from app.config import settings
+from app.utils.cache_backend import InProcessBackend
+from app.utils.data_version import DataVersions, data_versions, matches_if_none_match, publish_data_changed
+from tests.test_transactions import capture_statements, create_category, create_transaction
+
+
+@pytest.fixture(autouse=True)
+def etags_on(monkeypatch):
+    """ETag включены явно: по умолчанию они работают только с общим бэкендом кэша"""
+    monkeypatch.setattr(settings, "DATA_VERSION_ETAGS", True)
+
+
+def revalidate(client, url, etag):
+    return client.get(url, headers={"If-None-Match": etag})
+
+
+def test_not_modified_without_database(authorized_client):
+    """Тест: совпавший If-None-Match дает 304 без SQL-запросов"""
+    create_transaction(authorized_client, 10.0)
+    response = authorized_client.get("/api/v1/transactions/")
+    etag = response.headers["ETag"]
+    assert response.headers["Cache-Control"] == "private, no-cache"
+
+    not_modified, statements = capture_statements(
+        lambda: revalidate(authorized_client, "/api/v1/transactions/", etag)
+    )
+
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+    assert not_modified.headers["ETag"] == etag
+    assert statements == []
+    assert revalidate(authorized_client, "/api/v1/transactions/", f'"other", W/{etag}').status_code == 304
+
+
+def test_writes_change_etag(authorized_client, test_profile):
+    """Тест: запись через сервисы транзакций, категорий и профиля меняет ETag"""
+    urls = ["/api/v1/transactions/", "/api/v1/categories/", "/api/v1/profile/full"]
+    writes = [
+        lambda: create_transaction(authorized_client, 25.0),
+        lambda: create_category(authorized_client, "Books"),
+        lambda: authorized_client.put("/api/v1/profile/financial", json={"savings": 700.0}),
+    ]
+
+    for write in writes:
+        etags = {url: authorized_client.get(url).headers["ETag"] for url in urls}
+        assert all(revalidate(authorized_client, url, etag).status_code == 304 for url, etag in etags.items())
+
+        write()
+
+        for url, etag in etags.items():
+            response = revalidate(authorized_client, url, etag)
+            assert response.status_code == 200
+            assert response.headers["ETag"] != etag
+
+
+def test_etags_off_by_default_without_shared_backend(authorized_client, monkeypatch):
+    """Тест: с бэкендом кэша в памяти процесса ETag по умолчанию не выдаются"""
+    monkeypatch.setattr(settings, "DATA_VERSION_ETAGS", None)
+    response = authorized_client.get("/api/v1/transactions/")
+    assert response.status_code == 200
+    assert "ETag" not in response.headers
+
+
+def etag(versions: DataVersions, user_id: int) -> str:
+    return asyncio.run(versions.etag(user_id))
+
+
+def test_out_of_band_changes_bump_versions():
+    """Тест: publish_data_changed меняет версию пользователя или всех пользователей"""
+    etags = {user_id: etag(data_versions, user_id) for user_id in (1, 2)}
+    asyncio.run(publish_data_changed(1))
+    assert etag(data_versions, 1) != etags[1] and etag(data_versions, 2) == etags[2]
+
+    etags = {user_id: etag(data_versions, user_id) for user_id in (1, 2)}
+    asyncio.run(publish_data_changed())
+    assert all(etag(data_versions, user_id) != value for user_id, value in etags.items())
+
+
+def test_etag_is_per_user():
+    """Тест версий: смена при записи, независимость пользователей, сброс при переполнении"""
+    versions = DataVersions(max_users=2, backend=InProcessBackend(max_items=10))
+    first = etag(versions, 1)
+    versions.bump(1)
+    assert etag(versions, 1) != first
+    assert DataVersions(max_users=2, backend=versions.backend).get(1) != versions.get(1)
+
+    before = {user_id: versions.get(user_id) for user_id in (1, 2)}
+    versions.bump(2)
+    versions.bump(3)  # превышение предела меняет версии всех пользователей
+    assert all(versions.get(user_id) != before[user_id] for user_id in (1, 2))
+
+
+def test_workers_share_etags_through_shared_backend():
+    """Тест: воркеры с общим бэкендом выдают один ETag, запись меняет его у всех"""
+    backend = InProcessBackend(max_items=100)
+    backend.shared = True
+    workers = [DataVersions(max_users=10, backend=backend) for _ in range(2)]
+
+    async def scenario():
+        first = await workers[0].etag(1)
+        assert await workers[1].etag(1) == first
+        assert await workers[0].etag(1) == first
+
+        # Запись в первом воркере: версия сохраняется в бэкенде и приходит второму сообщением
+        version = workers[0].bump(1)
+        await workers[0].store(1, version)
+        workers[1].bump(1, version)
+        changed = await workers[0].etag(1)
+        assert changed != first and await workers[1].etag(1) == changed
+        # Запущенный позже воркер читает версию из бэкенда
+        assert await DataVersions(max_users=10, backend=backend).etag(1) == changed
+
+        # Новая эпоха меняет версии всех пользователей
+        epoch = await workers[0].new_epoch()
+        workers[1].clear(epoch)
+        renewed = await workers[1].etag(1)
+        assert renewed != changed and await workers[0].etag(1) == renewed
+
+    asyncio.run(scenario())
+
+
+def test_if_none_match_parsing():
+    """Тест сравнения If-None-Match: список, слабые метки и *"""
+    assert matches_if_none_match('"a", "b"', '"b"')
+    assert matches_if_none_match('W/"b"', '"b"')
+    assert matches_if_none_match("*", '"b"')
+    assert not matches_if_none_match('"a"', '"b"')
@@ -0,0 +1,219 @@
+# tests/test_migrations.py
+"""
+Проверка цепочки миграций Alembic, пересчета денежных колонок и
+использования индексов планировщиком.
+
+Схема создается миграциями (а не create_all), затем реальные запросы
+TransactionService перехватываются и прогоняются через EXPLAIN.
+Для PostgreSQL задайте TEST_POSTGRES_URL (пустая тестовая база).
+"""
+import asyncio
+import os
+from datetime import date, datetime
+
+import pytest
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from app.database import get_async_database_url
+from app.models.category import CategoryTypeEnum
+from app.models.transaction import Transaction
+from app.models.user import User
+from app.schemas.transaction import TransactionFilters
+from app.services.transaction import TransactionService
+from app.utils.money import to_minor
+from app.utils.pagination import encode_cursor
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+TRANSACTION_INDEXES = {
+    "ix_transactions_user_date_id",
+    "ix_transactions_user_type_date",
+    "ix_transactions_user_category_date",
+}
+
+
+def run_migrations(connection, revision="head"):
+    """Применение миграций к переданному соединению (вне открытой транзакции)"""
+    config = Config(os.path.join(BACKEND_DIR, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(BACKEND_DIR, "alembic"))
+    config.attributes["connection"] = connection
+    command.upgrade(config, revision)
+
+
+async def capture_transaction_queries(async_engine):
+    """Выполнение горячих запросов сервиса с перехватом SQL по таблице transactions"""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and "transactions" in statement:
+            statements.append((statement, parameters))
+
+    Session = async_sessionmaker(async_engine, expire_on_commit=False)
+    async with Session() as db:
+        user = User(email="explain@example.com", full_name="Explain", hashed_password="x")
+        db.add(user)
+        await db.commit()
+        db.add(Transaction(user_id=user.id, amount=10.0, transaction_type=CategoryTypeEnum.EXPENSE,
+                           transaction_date=datetime(2024, 3, 15, 10, 0)))
+        await db.commit()
+
+        event.listen(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            # Лента с итогами, страница по курсору, период, фильтры по типу и категории
+            await TransactionService.get_transactions(user.id, None, 0, 100, db)
+            await TransactionService.get_transactions(
+                user.id, None, 0, 100, db, cursor=encode_cursor(datetime(2024, 3, 20), 100)
+            )
+            await TransactionService.get_transactions_by_period(user.id, "month", date(2024, 3, 1), db)
+            await TransactionService.get_transactions(
+                user.id, TransactionFilters(transaction_type=CategoryTypeEnum.EXPENSE), 0, 100, db
+            )
+            await TransactionService.get_transactions(
+                user.id, TransactionFilters(category_ids=[1, 2]), 0, 100, db
+            )
+        finally:
+            event.remove(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+
+    assert statements
+    return statements
+
+
+async def explain_transaction_queries(database_url, explain_prefix, setup_sql=None):
+    """
+    Планы запросов сервиса в виде текста, по одному на запрос.
+
+    Запросы перехватываются и объясняются через тот же асинхронный драйвер,
+    которым пользуется приложение (формат параметров у драйверов разный).
+    """
+    async_engine = create_async_engine(get_async_database_url(database_url))
+    try:
+        statements = await capture_transaction_queries(async_engine)
+
+        plans = []
+        async with async_engine.connect() as connection:
+            if setup_sql:
+                await connection.execute(text(setup_sql))
+            for statement, parameters in statements:
+                rows = (await connection.exec_driver_sql(f"{explain_prefix} {statement}", parameters)).fetchall()
+                # Текст плана — в последней колонке (в PostgreSQL она единственная)
+                plans.append(" ".join(row[-1] for row in rows))
+        return plans
+    finally:
+        await async_engine.dispose()
+
+
+# Суммы, у которых round(x * 100) над двоичным float расходится с to_minor
+EDGE_AMOUNTS = (1.005, 0.285, 2.675, 19.99)
+
+
+def migrate_edge_amounts(engine):
+    """Миграция до 0003, вставка EDGE_AMOUNTS, миграция до конца; возвращает суммы в минорных единицах"""
+    with engine.connect() as connection:
+        run_migrations(connection, "0003")
+    with engine.begin() as connection:
+        connection.execute(text("INSERT INTO users (id, email, full_name) VALUES (1, 'money@example.com', 'Money')"))
+        for amount in EDGE_AMOUNTS:
+            connection.execute(text(
+                "INSERT INTO transactions (user_id, amount, transaction_type, transaction_date) "
+                "VALUES (1, :amount, 'EXPENSE', '2024-03-15 10:00:00')"
+            ), {"amount": amount})
+    with engine.connect() as connection:
+        run_migrations(connection)
+    with engine.connect() as connection:
+        return [row[0] for row in connection.execute(text("SELECT amount FROM transactions ORDER BY id"))]
+
+
+@pytest.fixture
+def sqlite_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'migrations.db'}")
+    yield engine
+    engine.dispose()
+
+
+def test_migrations_create_transaction_indexes(sqlite_engine):
+    """Тест создания схемы и составных индексов цепочкой миграций"""
+    with sqlite_engine.connect() as connection:
+        run_migrations(connection)
+
+    inspector = inspect(sqlite_engine)
+    assert {"users", "transactions", "budget_categories", "user_balances"} <= set(inspector.get_table_names())
+    index_names = {index["name"] for index in inspector.get_indexes("transactions")}
+    assert TRANSACTION_INDEXES <= index_names
+
+
+def test_stamped_baseline_gets_backfilled_balances(sqlite_engine):
+    """Тест: база на базовой схеме получает user_balances с балансами по транзакциям"""
+    with sqlite_engine.connect() as connection:
+        run_migrations(connection, "0001")
+    with sqlite_engine.begin() as connection:
+        assert "user_balances" not in inspect(connection).get_table_names()
+        connection.execute(text("INSERT INTO users (id, email, full_name) VALUES (1, 'old@example.com', 'Old')"))
+        for amount, transaction_type in ((100.0, "INCOME"), (30.5, "EXPENSE"), (10.0, "EXPENSE")):
+            connection.execute(text(
+                "INSERT INTO transactions (user_id, amount, transaction_type, transaction_date) "
+                "VALUES (1, :amount, :transaction_type, '2024-03-15 10:00:00')"
+            ), {"amount": amount, "transaction_type": transaction_type})
+
+    with sqlite_engine.connect() as connection:
+        run_migrations(connection)
+    with sqlite_engine.connect() as connection:
+        balance = connection.execute(text(
+            "SELECT total_income, total_expense, transaction_count FROM user_balances WHERE user_id = 1"
+        )).one()
+    assert tuple(balance) == (10000, 4050, 3)
+
+
+def test_money_migration_matches_to_minor(sqlite_engine):
+    """Тест: миграция 0004 округляет суммы так же, как to_minor в приложении"""
+    assert migrate_edge_amounts(sqlite_engine) == [to_minor(amount) for amount in EDGE_AMOUNTS]
+
+
+@pytest.mark.skipif(not os.environ.get("TEST_POSTGRES_URL"), reason="TEST_POSTGRES_URL is not set")
+def test_postgres_money_migration_matches_to_minor():
+    """Тест: в PostgreSQL миграция 0004 округляет суммы так же, как to_minor"""
+    engine = create_engine(os.environ["TEST_POSTGRES_URL"])
+    try:
+        with engine.begin() as connection:
+            connection.execute(text("DROP SCHEMA public CASCADE"))
+            connection.execute(text("CREATE SCHEMA public"))
+        assert migrate_edge_amounts(engine) == [to_minor(amount) for amount in EDGE_AMOUNTS]
+    finally:
+        engine.dispose()
+
+
+def test_sqlite_planner_uses_transaction_indexes(sqlite_engine):
+    """Тест того, что SQLite выбирает составные индексы для запросов сервиса"""
+    with sqlite_engine.connect() as connection:
+        run_migrations(connection)
+
+    plans = asyncio.run(explain_transaction_queries(str(sqlite_engine.url), "EXPLAIN QUERY PLAN"))
+
+    for plan_text in plans:
+        assert any(name in plan_text for name in TRANSACTION_INDEXES), plan_text
+        assert "SCAN transactions" not in plan_text, plan_text
+
+
+@pytest.mark.skipif(not os.environ.get("TEST_POSTGRES_URL"), reason="TEST_POSTGRES_URL is not set")
+def test_postgres_planner_uses_transaction_indexes():
+    """Тест того, что PostgreSQL может обслужить запросы сервиса составными индексами"""
+    engine = create_engine(os.environ["TEST_POSTGRES_URL"])
+    try:
+        with engine.begin() as connection:
+            connection.execute(text("DROP SCHEMA public CASCADE"))
+            connection.execute(text("CREATE SCHEMA public"))
+        with engine.connect() as connection:
+            run_migrations(connection)
+
+        # На пустой таблице последовательное чтение всегда дешевле,
+        # поэтому запрещаем его и проверяем, что индекс применим
+        plans = asyncio.run(explain_transaction_queries(
+            os.environ["TEST_POSTGRES_URL"], "EXPLAIN", setup_sql="SET enable_seqscan = off"
+        ))
+
+        for plan_text in plans:
+            assert any(name in plan_text for name in TRANSACTION_INDEXES), plan_text
+    finally:
+        engine.dispose()
@@ -0,0 +1,53 @@
+# tests/test_money.py
+from decimal import Decimal
+
+import pytest
+
+from app.utils import money
+from app.utils.money import from_minor, quantize, rollup, to_minor
+from tests.test_transactions import create_transaction
+
+
+def test_minor_unit_conversion():
+    """Тест перевода сумм в минорные единицы и обратно"""
+    assert to_minor(Decimal("10.55")) == 1055
+    assert to_minor(0.1) == 10
+    assert to_minor(Decimal("-2.005")) == -201
+    assert from_minor(1055) == Decimal("10.55")
+    assert quantize(10.555) == Decimal("10.56")
+
+
+def test_rollup_sums_exactly_by_key():
+    """Тест точного суммирования по ключам: суммы за пределами точности float не теряются"""
+    keys = [index % 3 for index in range(1000)]
+    amounts = [10 ** 16 + index for index in range(1000)]
+    expected = {}
+    for key, amount in zip(keys, amounts):
+        expected[key] = expected.get(key, 0) + amount
+
+    assert rollup(keys, amounts) == expected
+    if money.np is not None:
+        assert rollup(money.np.array(keys), money.np.array(amounts, dtype=money.np.int64)) == expected
+
+
+def test_amounts_are_exact_decimals(authorized_client):
+    """Суммы хранятся точно: 0.1 + 0.2 дает ровно 0.3, лишние знаки округляются"""
+    create_transaction(authorized_client, 0.1)
+    create_transaction(authorized_client, 0.2)
+    rounded = create_transaction(authorized_client, 10.555)
+
+    assert rounded["amount"] == 10.56
+    summary = authorized_client.get("/api/v1/transactions/").json()["summary"]
+    assert summary["total_expense"] == 10.86
+    transactions = authorized_client.get("/api/v1/transactions/", params={"max_amount": 0.25}).json()
+    assert sorted(item["amount"] for item in transactions["transactions"]) == [0.1, 0.2]
+    assert authorized_client.get("/api/v1/transactions/balance").json()["total_expense"] == 10.86
+
+
+@pytest.mark.parametrize("amount", [10 ** 12, -5])
+def test_amount_bounds(authorized_client, amount):
+    """Тест отклонения отрицательных и слишком больших сумм"""
+    response = authorized_client.post("/api/v1/transactions/", json={
+        "amount": amount, "transaction_type": "expense", "transaction_date": "2024-03-15T10:00:00"
+    })
+    assert response.status_code == 422
@@ -0,0 +1,89 @@
+# tests/test_partitioning.py
+"""
+Проверка помесячного секционирования transactions.
+
+Перенос и отсечение секций проверяются только на PostgreSQL:
+задайте TEST_POSTGRES_URL (пустая тестовая база, схема пересоздается).
+"""
+import asyncio
+import os
+from datetime import date, datetime, timezone
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from app.models.category import CategoryTypeEnum
+from app.models.transaction import Transaction
+from app.models.user import User
+from app.utils.partitioning import (
+    DEFAULT_PARTITION, LEGACY_TABLE, add_months, convert_to_partitioned, ensure_partitions,
+    existing_partitions, is_partitioned, partition_name,
+)
+from tests.test_migrations import explain_transaction_queries, run_migrations
+
+
+def test_month_arithmetic():
+    """Тест вычисления месяцев и имен секций"""
+    assert add_months(date(2024, 11, 1), 3) == date(2025, 2, 1)
+    assert add_months(date(2024, 1, 1), -1) == date(2023, 12, 1)
+    assert partition_name(date(2024, 3, 1)) == "transactions_p202403"
+
+
+@pytest.mark.skipif(not os.environ.get("TEST_POSTGRES_URL"), reason="TEST_POSTGRES_URL is not set")
+def test_postgres_convert_and_ensure_partitions():
+    """Тест переноса таблицы в секции, отсечения секций и создания недостающих"""
+    engine = create_engine(os.environ["TEST_POSTGRES_URL"])
+    today = date(2024, 6, 15)
+    try:
+        with engine.begin() as connection:
+            connection.execute(text("DROP SCHEMA public CASCADE"))
+            connection.execute(text("CREATE SCHEMA public"))
+        with engine.connect() as connection:
+            run_migrations(connection)
+
+        with engine.begin() as connection:
+            user_id = connection.execute(User.__table__.insert().returning(User.__table__.c.id), {
+                "email": "partitions@example.com", "full_name": "Partitions", "hashed_password": "x",
+            }).scalar()
+            connection.execute(Transaction.__table__.insert(), [
+                {"user_id": user_id, "amount": 10.0, "transaction_type": CategoryTypeEnum.EXPENSE,
+                 "transaction_date": datetime(2024, month, 10, tzinfo=timezone.utc)}
+                for month in (1, 2, 3)
+            ])
+
+            assert ensure_partitions(connection, 3, today=today) == []
+            assert convert_to_partitioned(connection, Transaction.__table__, 1, today=today) == 3
+            assert is_partitioned(connection)
+            assert existing_partitions(connection) == {
+                DEFAULT_PARTITION, "transactions_p202401", "transactions_p202402",
+                "transactions_p202403", "transactions_p202406", "transactions_p202407",
+            }
+            assert connection.execute(text(f"SELECT to_regclass('{LEGACY_TABLE}')")).scalar() is None
+
+            # Вставка продолжает нумерацию id; строка вне секций попадает в default
+            connection.execute(Transaction.__table__.insert(), {
+                "user_id": user_id, "amount": 5.0, "transaction_type": CategoryTypeEnum.INCOME,
+                "transaction_date": datetime(2023, 12, 31, 20, tzinfo=timezone.utc),
+            })
+            assert connection.execute(text("SELECT count(DISTINCT id) FROM transactions")).scalar() == 4
+            assert connection.execute(text(f"SELECT count(*) FROM {DEFAULT_PARTITION}")).scalar() == 1
+
+            # ensure создает будущий месяц и выносит строки из default в свою секцию;
+            # границы переноса не зависят от часового пояса сессии (в Токио 31.12 20:00 UTC — уже январь)
+            connection.execute(text("SET LOCAL TimeZone = 'Asia/Tokyo'"))
+            assert ensure_partitions(connection, 2, today=today) == ["transactions_p202312", "transactions_p202408"]
+            assert connection.execute(text(f"SELECT count(*) FROM {DEFAULT_PARTITION}")).scalar() == 0
+            assert connection.execute(text("SELECT count(*) FROM transactions_p202312")).scalar() == 1
+
+        # Запрос за месяц читает только секцию этого месяца (март 2024)
+        plans = asyncio.run(explain_transaction_queries(os.environ["TEST_POSTGRES_URL"], "EXPLAIN"))
+        period_plans = [plan for plan in plans if "2024-03-01 00:00:00" in plan]
+        assert period_plans
+        for plan in period_plans:
+            assert "transactions_p202403" in plan, plan
+            assert "transactions_p202402" not in plan and DEFAULT_PARTITION not in plan, plan
+    finally:
+        with engine.begin() as connection:
+            connection.execute(text("DROP SCHEMA public CASCADE"))
+            connection.execute(text("CREATE SCHEMA public"))
+        engine.dispose()
@@ -0,0 +1,105 @@
+# tests/test_pool_metrics.py
+"""
+Метрики пула соединений: счетчики занятых соединений, переполнения,
+ожидания и таймаутов, а также служебный эндпоинт /internal/db/pool.
+"""
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+from app.config import settings
+from app.utils.pool_metrics import PoolMetrics, metered_pool_class
+
+
+@pytest.fixture
+def metered_engine(tmp_path):
+    """Движок с пулом из одного соединения без переполнения"""
+    metrics = PoolMetrics("test")
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=metered_pool_class(QueuePool, metrics),
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.1,
+    )
+    metrics.listen(engine)
+    yield engine, metrics
+    engine.dispose()
+
+
+def test_pool_metrics_count_checkouts_and_timeouts(metered_engine):
+    """Исчерпание пула фиксируется как таймаут и пик занятых соединений"""
+    engine, metrics = metered_engine
+
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+        # Единственное соединение занято: второй запрос ждет и получает таймаут
+        with pytest.raises(PoolTimeoutError):
+            engine.connect()
+
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+
+    snapshot = metrics.snapshot(engine.pool)
+    assert snapshot["pool_class"] == "MeteredQueuePool"
+    assert snapshot["pool_size"] == 1
+    assert snapshot["max_overflow"] == 0
+    assert snapshot["checked_out"] == 0
+    assert snapshot["peak_checked_out"] == 1
+    assert snapshot["peak_overflow"] == 0
+    assert snapshot["checkouts"] == 2
+    # Соединение открывается один раз и затем берется из пула
+    assert snapshot["connects"] == 1
+    assert snapshot["timeouts"] == 1
+    # Ожидание таймаута (~100 мс) попадает в гистограмму наряду с быстрыми получениями
+    assert sum(snapshot["checkout_wait"]["buckets_ms"].values()) == 3
+    assert snapshot["checkout_wait"]["max_ms"] >= 100
+    assert snapshot["checkout_wait"]["avg_ms"] == pytest.approx(metrics.wait_total / 3 * 1000, abs=0.001)
+
+    metrics.reset()
+    snapshot = metrics.snapshot(engine.pool)
+    assert snapshot["checkouts"] == 0
+    assert snapshot["timeouts"] == 0
+    assert snapshot["peak_checked_out"] == 0
+
+
+def test_pool_metrics_survive_pool_recreate(metered_engine):
+    """Метрики привязаны к классу пула и переживают engine.dispose()"""
+    engine, metrics = metered_engine
+
+    engine.dispose()
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+
+    assert metrics.snapshot(engine.pool)["checkouts"] == 1
+
+
+def test_internal_pool_endpoint(client, internal_headers):
+    """Эндпоинт отдает состояние основного пула"""
+    response = client.get("/api/v1/internal/db/pool", headers=internal_headers)
+
+    assert response.status_code == 200
+    primary = response.json()["pools"]["primary"]
+    for key in ("pool_class", "checked_out", "peak_checked_out", "timeouts", "checkout_wait"):
+        assert key in primary
+
+
+def test_internal_endpoints_disabled_without_token(client, monkeypatch):
+    """Без INTERNAL_API_TOKEN служебные эндпоинты недоступны"""
+    monkeypatch.setattr(settings, "INTERNAL_API_TOKEN", None)
+
+    assert client.get("/api/v1/internal/db/pool").status_code == 404
+    assert client.get("/api/v1/internal/auth/token-cache?reset=true").status_code == 404
+
+
+def test_internal_pool_endpoint_requires_token(client, internal_headers):
+    """При заданном INTERNAL_API_TOKEN без верного заголовка доступ запрещен"""
+    assert client.get("/api/v1/internal/db/pool").status_code == 403
+    assert client.get(
+        "/api/v1/internal/db/pool", headers={"X-Internal-Token": "wrong"}
+    ).status_code == 403
+    response = client.get(
+        "/api/v1/internal/db/pool", headers={"X-Internal-Token": "internal-secret"}
+    )
+    assert response.status_code == 200
@@ -0,0 +1,101 @@
+# tests/test_principal_cache.py
+"""
+Кэш принципала в get_current_user: повторные запросы без обращения
+к таблице users, сброс при изменении пользователя, отключение нулевым TTL.
+"""
+import asyncio
+
+from app.utils.cache_backend import InProcessBackend, cache_key
+from app.utils.principal_cache import PrincipalCache, UserPrincipal, principal_cache
+from tests.test_transactions import capture_statements
+
+
+def principal(user_id: int) -> UserPrincipal:
+    return UserPrincipal(id=user_id, email=f"user{user_id}@example.com", is_active=True, is_verified=True)
+
+
+def cached(user_id: int, cache: PrincipalCache = principal_cache):
+    return asyncio.run(cache.get(user_id))
+
+
+def users_queries(statements):
+    return [statement for statement in statements if "FROM users" in statement]
+
+
+def test_repeated_requests_skip_user_query(authorized_client, internal_headers):
+    """Тест: после первого запроса пользователь берется из кэша"""
+    principal_cache.reset()
+    authorized_client.get("/api/v1/categories/")
+
+    response, statements = capture_statements(lambda: authorized_client.get("/api/v1/categories/"))
+
+    assert response.status_code == 200
+    assert users_queries(statements) == []
+    metrics = authorized_client.get("/api/v1/internal/auth/principal-cache", headers=internal_headers).json()
+    assert metrics["hits"] == 1 and metrics["misses"] == 1
+    assert metrics["backend"] == "InProcessBackend"
+
+
+def test_user_changes_invalidate_principal(authorized_client, test_user):
+    """Тест: обновление и удаление пользователя сразу видны следующему запросу"""
+    authorized_client.get("/api/v1/users/me")
+
+    authorized_client.put("/api/v1/users/me", json={"full_name": "Renamed User"})
+    assert cached(test_user.id) is None
+    assert authorized_client.get("/api/v1/users/me").json()["full_name"] == "Renamed User"
+
+    assert authorized_client.delete("/api/v1/users/me").status_code == 200
+    response = authorized_client.get("/api/v1/users/me")
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Inactive user"
+
+
+def test_password_change_invalidates_principal(authorized_client, test_user):
+    """Тест: смена пароля сбрасывает принципал"""
+    authorized_client.get("/api/v1/users/me")
+    assert cached(test_user.id) is not None
+
+    response = authorized_client.post("/api/v1/users/change-password", params={
+        "current_password": "password123", "new_password": "NewPassword123!"
+    })
+
+    assert response.status_code == 200
+    assert cached(test_user.id) is None
+
+
+def test_principal_round_trip_and_invalidation():
+    """Тест: принципал сохраняется в бэкенде и сбрасывается invalidate"""
+    cache = PrincipalCache(InProcessBackend(max_items=10), ttl_seconds=30)
+    asyncio.run(cache.put(principal(1)))
+
+    assert cached(1, cache) == principal(1)
+    cache.invalidate(1)
+    assert cached(1, cache) is None
+    assert (cache.hits, cache.misses, cache.invalidations) == (1, 1, 1)
+
+
+def test_foreign_or_broken_entry_is_a_miss():
+    """Тест: запись с чужим id или неразборная запись не выдается"""
+    backend = InProcessBackend(max_items=10)
+    cache = PrincipalCache(backend, ttl_seconds=30)
+
+    async def fill():
+        await cache.put(principal(2))
+        # Ответ на чужой ключ, прочитанный из общего соединения
+        await backend.set(cache_key("principal", 1), await backend.get(cache_key("principal", 2)), 30)
+        await backend.set(cache_key("principal", 3), b"not json", 30)
+
+    asyncio.run(fill())
+
+    assert cached(1, cache) is None
+    assert cached(3, cache) is None
+    assert cached(2, cache) == principal(2)
+
+
+def test_disabled_cache_stores_nothing():
+    """Тест: нулевой TTL отключает кэш"""
+    backend = InProcessBackend(max_items=100)
+    cache = PrincipalCache(backend, ttl_seconds=0)
+    asyncio.run(cache.put(principal(1)))
+    assert cached(1, cache) is None
+    assert len(backend) == 0
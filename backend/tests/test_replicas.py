@@ -0,0 +1,102 @@
+# tests/test_replicas.py
+"""
+Маршрутизация чтения на реплики. Реплика — копия файла тестовой базы
+SQLite, снятая в момент вызова фикстуры replica: все, что записано в
+основную базу позже, на реплике не видно, как при отставании репликации.
+"""
+import shutil
+from datetime import datetime
+
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.config import settings
+from app.database import (
+    ReplicaStickiness, create_session_factory, get_async_database_url, get_db, session_dependency,
+)
+from app.main import app
+from app.models.category import BudgetCategory, CategoryTypeEnum
+from app.models.transaction import Transaction
+from tests.conftest import SQLALCHEMY_DATABASE_URL, async_engine
+
+
+@pytest.fixture
+def replica(tmp_path, db):
+    """Снимок основной базы в роли реплики; сессии запросов маршрутизируются между ними"""
+    primary_path = SQLALCHEMY_DATABASE_URL.removeprefix("sqlite:///")
+    replica_path = tmp_path / "replica.db"
+    shutil.copyfile(primary_path, replica_path)
+
+    replica_engine = create_async_engine(get_async_database_url(f"sqlite:///{replica_path}"),
+                                         poolclass=NullPool)
+    stickiness = ReplicaStickiness(window_seconds=60)
+    previous_override = app.dependency_overrides[get_db]
+    app.dependency_overrides[get_db] = session_dependency(
+        create_session_factory(async_engine, [replica_engine], stickiness)
+    )
+    yield stickiness
+    app.dependency_overrides[get_db] = previous_override
+
+
+def list_amounts(client):
+    response = client.get("/api/v1/transactions/")
+    assert response.status_code == 200
+    return [transaction["amount"] for transaction in response.json()["transactions"]]
+
+
+def test_get_reads_from_replica(authorized_client, db, test_user, replica):
+    """GET читает с реплики: строка, записанная в основную базу напрямую, не видна"""
+    db.add(Transaction(user_id=test_user.id, amount=10.0, transaction_type=CategoryTypeEnum.EXPENSE,
+                       transaction_date=datetime(2024, 3, 15)))
+    db.commit()
+
+    assert list_amounts(authorized_client) == []
+
+
+def test_read_your_writes_window(authorized_client, replica):
+    """После своей записи пользователь читает с основной базы, пока окно не закрыто"""
+    response = authorized_client.post("/api/v1/transactions/", json={
+        "amount": 25.0, "transaction_type": "expense", "transaction_date": "2024-03-15T10:00:00"
+    })
+    assert response.status_code == 201
+
+    # Запись ушла в основную базу, и следующий GET читает оттуда же
+    assert list_amounts(authorized_client) == [25.0]
+
+    # Окно закрыто: чтение снова с реплики, которая запись еще не получила
+    replica.clear()
+    assert list_amounts(authorized_client) == []
+
+
+def test_category_map_is_loaded_from_primary(authorized_client, db, test_user, replica):
+    """Карта категорий для кэша загружается с основной базы, даже когда GET читает с реплики"""
+    db.add(BudgetCategory(user_id=test_user.id, name="Travel", category_type=CategoryTypeEnum.EXPENSE))
+    db.commit()
+
+    response = authorized_client.get("/api/v1/categories/expense")
+    assert [category["name"] for category in response.json()] == ["Travel"]
+
+
+def test_replica_reads_get_no_etag(authorized_client, replica, monkeypatch):
+    """Ответ с реплики не получает ETag, ответ с основной базы в окне после записи — получает"""
+    monkeypatch.setattr(settings, "DATA_VERSION_ETAGS", True)
+    assert "ETag" not in authorized_client.get("/api/v1/transactions/").headers
+
+    authorized_client.post("/api/v1/transactions/", json={
+        "amount": 25.0, "transaction_type": "expense", "transaction_date": "2024-03-15T10:00:00"
+    })
+    assert "ETag" in authorized_client.get("/api/v1/transactions/").headers
+
+
+def test_stickiness_window_expires():
+    """Окно read-your-writes действует window_seconds и только для записавшего пользователя"""
+    stickiness = ReplicaStickiness(window_seconds=60)
+    stickiness.mark(1)
+    assert stickiness.is_sticky(1)
+    assert not stickiness.is_sticky(2)
+    assert not stickiness.is_sticky(None)
+
+    expired = ReplicaStickiness(window_seconds=0)
+    expired.mark(1)
+    assert not expired.is_sticky(1)
@@ -0,0 +1,73 @@
+# tests/test_token_cache.py
+"""
+Кэш проверенных JWT: повторный токен без проверки подписи, истечение
+по exp, вытеснение и отзыв токена при выходе.
+"""
+from datetime import timedelta
+
+from app.utils import security as security_module
+from app.utils import token_cache as token_cache_module
+from app.utils.security import SecurityUtils
+from app.utils.token_cache import VerifiedTokenCache, token_cache, token_digest
+
+
+def count_signature_checks(monkeypatch):
+    calls = []
+    decode = security_module.jwt.decode
+
+    def counting_decode(*args, **kwargs):
+        calls.append(args[0])
+        return decode(*args, **kwargs)
+
+    monkeypatch.setattr(security_module.jwt, "decode", counting_decode)
+    return calls
+
+
+def test_repeated_token_is_verified_once(db, monkeypatch):
+    """Тест: подпись повторяемого токена проверяется один раз"""
+    calls = count_signature_checks(monkeypatch)
+    token = SecurityUtils.create_access_token({"sub": "1"})
+
+    first = SecurityUtils.decode_token(token)
+    first["sub"] = "changed"  # изменение результата не портит кэш
+    second = SecurityUtils.decode_token(token)
+
+    assert second["sub"] == "1" and second["type"] == "access"
+    assert len(calls) == 1
+    # Измененный токен — другой ключ, он проверяется заново и отклоняется
+    assert SecurityUtils.decode_token(token[:-2] + "xx") is None
+    assert len(calls) == 2
+
+
+def test_expired_token_is_evicted(db, monkeypatch):
+    """Тест: запись действует только до exp токена"""
+    token = SecurityUtils.create_access_token({"sub": "1"}, expires_delta=timedelta(minutes=1))
+    payload = SecurityUtils.decode_token(token)
+
+    monkeypatch.setattr(token_cache_module.time, "time", lambda: payload["exp"] + 1)
+    assert token_cache.get(token_digest(token)) is None
+    assert token_cache.snapshot()["expirations"] == 1 and token_cache.snapshot()["size"] == 0
+
+
+def test_cache_is_bounded():
+    """Тест вытеснения давно не использованных токенов"""
+    cache = VerifiedTokenCache(max_size=2)
+    exp = token_cache_module.time.time() + 60
+    for key in (b"a", b"b", b"c"):
+        cache.put(key, {"exp": exp})
+
+    assert cache.get(b"a") is None
+    assert cache.get(b"c") == {"exp": exp}
+    assert cache.snapshot()["evictions"] == 1
+
+
+def test_logout_revokes_access_token(authorized_client, token, internal_headers):
+    """Тест: после выхода токен отклоняется, хотя был в кэше"""
+    assert authorized_client.get("/api/v1/users/me").status_code == 200
+
+    assert authorized_client.post("/api/v1/auth/logout").status_code == 200
+
+    assert authorized_client.get("/api/v1/users/me").status_code == 401
+    assert token_cache.is_revoked(token_digest(token))
+    metrics = authorized_client.get("/api/v1/internal/auth/token-cache", headers=internal_headers).json()
+    assert metrics["revoked"] == 1 and metrics["size"] == 0
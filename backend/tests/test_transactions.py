@@ -0,0 +1,675 @@
+# tests/test_transactions.py
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from app.models.category import CategoryTypeEnum
+from app.models.transaction import Transaction
+from app.schemas.transaction import MAX_BATCH_SIZE
+from app.services.transaction import TransactionService
+from tests.conftest import async_engine
+
+
+def create_transaction(client, amount, transaction_type="expense", transaction_date="2024-03-15T10:00:00", **extra):
+    """Вспомогательная функция создания транзакции через API"""
+    data = {
+        "amount": amount,
+        "transaction_type": transaction_type,
+        "transaction_date": transaction_date,
+        **extra
+    }
+    response = client.post("/api/v1/transactions/", json=data)
+    assert response.status_code == 201
+    return response.json()
+
+
+def capture_statements(request):
+    """Выполняет request() и возвращает ответ вместе со списком выполненных SQL-запросов"""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append(" ".join(statement.split()))
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", capture)
+    try:
+        response = request()
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", capture)
+    return response, statements
+
+
+def test_cursor_pagination_walks_all_transactions(authorized_client):
+    """Тест обхода всех транзакций по курсору без пропусков и повторов"""
+    # Две транзакции с одинаковой датой проверяют стабильность порядка по id
+    dates = [
+        "2024-03-10T10:00:00",
+        "2024-03-11T10:00:00",
+        "2024-03-11T10:00:00",
+        "2024-03-12T10:00:00",
+        "2024-03-13T10:00:00",
+    ]
+    created_ids = [create_transaction(authorized_client, 10 + i, transaction_date=d)["id"]
+                   for i, d in enumerate(dates)]
+
+    seen_ids = []
+    cursor = None
+    while True:
+        params = {"limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        response = authorized_client.get("/api/v1/transactions/", params=params)
+        assert response.status_code == 200
+        data = response.json()
+        assert len(data["transactions"]) <= 2
+        seen_ids.extend(t["id"] for t in data["transactions"])
+        cursor = data["next_cursor"]
+        if not cursor:
+            break
+
+    assert sorted(seen_ids) == sorted(created_ids)
+    assert len(seen_ids) == len(set(seen_ids))
+
+    # Порядок совпадает с обычной выдачей через skip
+    response = authorized_client.get("/api/v1/transactions/", params={"limit": 100})
+    assert [t["id"] for t in response.json()["transactions"]] == seen_ids
+
+
+def test_last_page_has_no_next_cursor(authorized_client):
+    """Тест отсутствия курсора, когда записей больше нет"""
+    create_transaction(authorized_client, 50)
+
+    response = authorized_client.get("/api/v1/transactions/", params={"limit": 1})
+    assert response.status_code == 200
+    assert response.json()["next_cursor"] is None
+
+
+def test_invalid_cursor(authorized_client):
+    """Тест ошибки при поврежденном курсоре"""
+    response = authorized_client.get("/api/v1/transactions/", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+
+
+def test_summary_matches_filters(authorized_client):
+    """Тест итогов, посчитанных по тем же фильтрам, что и список"""
+    create_transaction(authorized_client, 1000, "income", "2024-03-01T09:00:00")
+    create_transaction(authorized_client, 200, "expense", "2024-03-05T09:00:00")
+    create_transaction(authorized_client, 50, "expense", "2024-04-02T09:00:00")
+
+    response = authorized_client.get(
+        "/api/v1/transactions/",
+        params={"start_date": "2024-03-01", "end_date": "2024-03-31", "limit": 1}
+    )
+    assert response.status_code == 200
+    summary = response.json()["summary"]
+
+    # Итоги не зависят от размера страницы и не включают апрельскую транзакцию
+    assert summary["total_income"] == 1000
+    assert summary["total_expense"] == 200
+    assert summary["net_balance"] == 800
+    assert summary["transaction_count"] == 2
+
+
+def test_summary_can_be_skipped(authorized_client):
+    """Тест отключения подсчета итогов"""
+    create_transaction(authorized_client, 10)
+
+    response = authorized_client.get("/api/v1/transactions/", params={"include_summary": False})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["summary"] is None
+    assert len(data["transactions"]) == 1
+
+
+def test_writes_return_server_values_without_reselect(authorized_client):
+    """created_at и updated_at приходят из INSERT/UPDATE ... RETURNING, без SELECT по транзакции"""
+    def statements_after_write(request, write_prefix):
+        response, statements = capture_statements(request)
+        write = next(i for i, statement in enumerate(statements) if statement.startswith(write_prefix))
+        assert "RETURNING" in statements[write]
+        return response, statements[write + 1:]
+
+    response, after_insert = statements_after_write(
+        lambda: authorized_client.post("/api/v1/transactions/", json={
+            "amount": 100, "transaction_type": "expense", "transaction_date": "2024-03-15T10:00:00"
+        }),
+        "INSERT INTO transactions"
+    )
+    assert response.status_code == 201
+    created = response.json()
+    assert created["created_at"] is not None
+
+    response, after_update = statements_after_write(
+        lambda: authorized_client.put(f"/api/v1/transactions/{created['id']}", json={"amount": 150}),
+        "UPDATE transactions"
+    )
+    assert response.status_code == 200
+    assert response.json()["updated_at"] is not None
+
+    # После записи транзакция не перечитывается
+    for statement in after_insert + after_update:
+        assert not statement.startswith("SELECT transactions.")
+
+
+def test_balance_follows_transaction_changes(authorized_client):
+    """Тест инкрементального обновления баланса при создании, изменении и удалении"""
+    income = create_transaction(authorized_client, 1000, "income")
+    expense = create_transaction(authorized_client, 300, "expense")
+
+    response = authorized_client.get("/api/v1/transactions/balance")
+    assert response.status_code == 200
+    balance = response.json()
+    assert balance["total_income"] == 1000
+    assert balance["total_expense"] == 300
+    assert balance["net_balance"] == 700
+    assert balance["transaction_count"] == 2
+
+    # Смена суммы и типа переносит вклад между доходом и расходом
+    response = authorized_client.put(
+        f"/api/v1/transactions/{expense['id']}",
+        json={"amount": 400, "transaction_type": "income"}
+    )
+    assert response.status_code == 200
+    balance = authorized_client.get("/api/v1/transactions/balance").json()
+    assert balance["total_income"] == 1400
+    assert balance["total_expense"] == 0
+
+    response = authorized_client.delete(f"/api/v1/transactions/{income['id']}")
+    assert response.status_code == 200
+    balance = authorized_client.get("/api/v1/transactions/balance").json()
+    assert balance["total_income"] == 400
+    assert balance["transaction_count"] == 1
+
+
+def test_balance_rebuild_repairs_drift(authorized_client, db, test_user, run_in_session):
+    """Тест пересчета баланса по сырым транзакциям"""
+    from app.models.balance import UserBalance
+    from app.services.balance import BalanceService
+
+    create_transaction(authorized_client, 250, "income")
+    create_transaction(authorized_client, 100, "expense")
+
+    # Портим агрегат вручную
+    db.query(UserBalance).filter(UserBalance.user_id == test_user.id).update({"total_income": 0.0})
+    db.commit()
+
+    run_in_session(lambda session: BalanceService.rebuild(session))
+
+    balance = authorized_client.get("/api/v1/transactions/balance").json()
+    assert balance["total_income"] == 250
+    assert balance["total_expense"] == 100
+    assert balance["transaction_count"] == 2
+
+
+def test_balance_without_ledger_row_is_read_only(authorized_client, db, test_user):
+    """Тест: без строки баланса GET считает его по транзакциям и ничего не записывает"""
+    from app.models.balance import UserBalance
+
+    create_transaction(authorized_client, 250, "income")
+    create_transaction(authorized_client, 100.25, "expense")
+    db.query(UserBalance).filter(UserBalance.user_id == test_user.id).delete()
+    db.commit()
+
+    response, statements = capture_statements(lambda: authorized_client.get("/api/v1/transactions/balance"))
+
+    balance = response.json()
+    assert (balance["net_balance"], balance["transaction_count"]) == (149.75, 2)
+    assert not any(statement.split()[0] in ("INSERT", "DELETE", "UPDATE") for statement in statements)
+    assert db.query(UserBalance).count() == 0
+
+
+def test_category_stats(authorized_client):
+    """Тест статистики расходов по категориям"""
+    food = authorized_client.post("/api/v1/categories/", json={
+        "name": "Food", "icon": "restaurant", "color": "#FF9800", "category_type": "expense"
+    }).json()
+    transport = authorized_client.post("/api/v1/categories/", json={
+        "name": "Transport", "icon": "car", "color": "#2196F3", "category_type": "expense"
+    }).json()
+
+    create_transaction(authorized_client, 60, category_id=food["id"])
+    create_transaction(authorized_client, 15, category_id=food["id"])
+    create_transaction(authorized_client, 25, category_id=transport["id"])
+    create_transaction(authorized_client, 500, "income")
+    create_transaction(authorized_client, 40, category_id=food["id"], transaction_date="2024-05-01T10:00:00")
+
+    response = authorized_client.get(
+        "/api/v1/transactions/stats/by-category",
+        params={"start_date": "2024-03-01", "end_date": "2024-03-31"}
+    )
+    assert response.status_code == 200
+    data = response.json()
+
+    # Доходы и транзакции вне периода не учитываются
+    assert data["transaction_type"] == "expense"
+    assert data["total_amount"] == 100
+    assert data["transaction_count"] == 3
+
+    first, second = data["categories"]
+    assert first["category_id"] == food["id"]
+    assert first["category_name"] == "Food"
+    assert first["category_icon"] == "restaurant"
+    assert first["total_amount"] == 75
+    assert first["transaction_count"] == 2
+    assert first["share"] == pytest.approx(0.75)
+    assert second["category_id"] == transport["id"]
+    assert second["share"] == pytest.approx(0.25)
+
+
+def test_series_by_month(authorized_client):
+    """Тест помесячной серии с заполнением пустых месяцев"""
+    create_transaction(authorized_client, 1000, "income", "2024-01-10T10:00:00")
+    create_transaction(authorized_client, 300, "expense", "2024-01-31T23:30:00")
+    create_transaction(authorized_client, 200, "expense", "2024-03-01T00:10:00")
+
+    response = authorized_client.get(
+        "/api/v1/transactions/stats/series",
+        params={"bucket": "month", "from": "2024-01-15", "to": "2024-03-15"}
+    )
+    assert response.status_code == 200
+    data = response.json()
+
+    # Диапазон расширяется до целых месяцев
+    assert data["start_date"] == "2024-01-01"
+    assert data["end_date"] == "2024-03-31"
+    points = data["points"]
+    assert [p["bucket_start"] for p in points] == ["2024-01-01", "2024-02-01", "2024-03-01"]
+    assert points[0]["total_income"] == 1000
+    assert points[0]["total_expense"] == 300
+    assert points[0]["net_balance"] == 700
+    assert points[1]["transaction_count"] == 0
+    assert points[2]["total_expense"] == 200
+
+
+def test_series_weeks_start_on_monday(authorized_client):
+    """Тест недельных интервалов с понедельника, как в /period/week"""
+    # 2024-03-10 — воскресенье, 2024-03-11 — понедельник
+    create_transaction(authorized_client, 10, transaction_date="2024-03-10T12:00:00")
+    create_transaction(authorized_client, 20, transaction_date="2024-03-11T12:00:00")
+
+    response = authorized_client.get(
+        "/api/v1/transactions/stats/series",
+        params={"bucket": "week", "from": "2024-03-10", "to": "2024-03-11"}
+    )
+    assert response.status_code == 200
+    points = response.json()["points"]
+    assert [p["bucket_start"] for p in points] == ["2024-03-04", "2024-03-11"]
+    assert [p["total_expense"] for p in points] == [10, 20]
+
+
+def test_series_invalid_bucket(authorized_client):
+    """Тест ошибки при неизвестном интервале"""
+    response = authorized_client.get(
+        "/api/v1/transactions/stats/series",
+        params={"bucket": "hour", "from": "2024-03-01", "to": "2024-03-02"}
+    )
+    assert response.status_code == 400
+
+
+def test_list_payload_matches_schema(authorized_client):
+    """Тест совпадения быстрого JSON-ответа с сериализацией TransactionListResponse"""
+    from app.schemas.transaction import TransactionListResponse
+
+    category = authorized_client.post("/api/v1/categories/", json={
+        "name": "Food", "icon": "restaurant", "color": "#FF9800", "category_type": "expense"
+    }).json()
+    create_transaction(authorized_client, 12.5, category_id=category["id"], payment_method="card", note="lunch")
+    create_transaction(authorized_client, 99, "income")
+
+    data = authorized_client.get("/api/v1/transactions/").json()
+
+    parsed = TransactionListResponse.model_validate(data)
+    assert parsed.model_dump(mode="json") == data
+    assert data["transactions"][1]["category_name"] == "Food"
+    assert data["transactions"][1]["payment_method"] == "card"
+
+
+def test_list_limit_is_bounded(authorized_client):
+    """Тест: размер страницы ленты ограничен, как у /period и /grouped"""
+    assert authorized_client.get("/api/v1/transactions/", params={"limit": 10_000_000}).status_code == 422
+    assert authorized_client.get("/api/v1/transactions/", params={"limit": 0}).status_code == 422
+    assert authorized_client.get("/api/v1/transactions/", params={"limit": 1000}).status_code == 200
+
+
+def test_export_ndjson(authorized_client):
+    """Тест потоковой выгрузки истории в NDJSON"""
+    import json
+
+    for i in range(3):
+        create_transaction(authorized_client, 10 + i, transaction_date=f"2024-03-1{i}T10:00:00")
+
+    response = authorized_client.get("/api/v1/transactions/export", params={"format": "ndjson"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["amount"] for row in rows] == [12, 11, 10]
+    assert rows[0]["transaction_type"] == "expense"
+
+
+def test_export_csv(authorized_client):
+    """Тест потоковой выгрузки истории в CSV"""
+    import csv
+    import io
+
+    create_transaction(authorized_client, 42, "income", note="salary, march")
+
+    response = authorized_client.get("/api/v1/transactions/export", params={"format": "csv"})
+    assert response.status_code == 200
+    assert "attachment" in response.headers["content-disposition"]
+
+    header, row = list(csv.reader(io.StringIO(response.text)))
+    record = dict(zip(header, row))
+    assert record["amount"] == "42.0"
+    assert record["transaction_type"] == "income"
+    assert record["note"] == "salary, march"
+
+
+def test_export_closes_its_own_session(authorized_client, test_user):
+    """Тест: выгрузка читает собственной сессией и закрывает ее при обрыве"""
+    import asyncio
+    from tests.conftest import TestingAsyncSessionLocal
+
+    for amount in (10, 20):
+        create_transaction(authorized_client, amount)
+    sessions = []
+
+    def session_factory():
+        sessions.append(TestingAsyncSessionLocal())
+        return sessions[-1]
+
+    async def read_first_chunk():
+        export = TransactionService.export_transactions(test_user.id, "ndjson", session_factory)
+        chunk = await export.__anext__()
+        assert sessions[0].in_transaction()
+        await export.aclose()
+        return chunk
+
+    assert b'"amount":20' in asyncio.run(read_first_chunk()).replace(b" ", b"")
+    assert len(sessions) == 1 and not sessions[0].in_transaction()
+
+
+def test_export_invalid_format(authorized_client):
+    """Тест ошибки при неизвестном формате выгрузки"""
+    response = authorized_client.get("/api/v1/transactions/export", params={"format": "xml"})
+    assert response.status_code == 400
+
+
+def test_period_pages_with_continuation(authorized_client):
+    """Тест постраничной выдачи периода с итогами по всему периоду"""
+    for day in range(1, 6):
+        create_transaction(authorized_client, day * 10, transaction_date=f"2024-03-0{day}T10:00:00")
+    create_transaction(authorized_client, 999, transaction_date="2024-04-01T10:00:00")
+
+    response = authorized_client.get(
+        "/api/v1/transactions/period/month", params={"date": "2024-03-15", "limit": 2}
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data["transactions"]) == 2
+    # Итоги за весь месяц, а не за первую страницу
+    assert data["summary"]["total_expense"] == 150
+    assert data["summary"]["transaction_count"] == 5
+
+    amounts = [t["amount"] for t in data["transactions"]]
+    cursor = data["next_cursor"]
+    while cursor:
+        data = authorized_client.get(
+            "/api/v1/transactions/period/month",
+            params={"date": "2024-03-15", "limit": 2, "cursor": cursor}
+        ).json()
+        assert data["summary"] is None
+        amounts.extend(t["amount"] for t in data["transactions"])
+        cursor = data["next_cursor"]
+
+    assert amounts == [50, 40, 30, 20, 10]
+
+
+def test_grouped_sections_continue_across_pages(authorized_client):
+    """Тест секций по датам: ключи считаются в запросе, секции продолжаются между страницами"""
+    today = datetime.combine(date.today(), datetime.min.time())
+    for days_ago in (0, 0, 1, 1, 1):
+        create_transaction(authorized_client, 10,
+                           transaction_date=(today - timedelta(days=days_ago, hours=-10)).isoformat())
+    create_transaction(authorized_client, 10, transaction_date="2020-02-10T10:00:00")
+
+    response = authorized_client.get("/api/v1/transactions/sections", params={"limit": 3})
+    assert response.status_code == 200
+    data = response.json()
+    assert [(s["key"], len(s["data"])) for s in data["sections"]] == [("today", 2), ("yesterday", 1)]
+    assert data["sections"][0]["title"] == "Today"
+    assert data["next_cursor"]
+
+    data = authorized_client.get(
+        "/api/v1/transactions/sections", params={"limit": 3, "cursor": data["next_cursor"]}
+    ).json()
+    # Вчерашняя секция продолжается с тем же ключом
+    assert [(s["key"], len(s["data"])) for s in data["sections"]] == [("yesterday", 2), ("2020-02", 1)]
+    assert data["sections"][1]["title"] == "February 2020"
+    assert data["next_cursor"] is None
+
+
+def test_grouped_keeps_list_contract_with_skip(authorized_client):
+    """Тест: /grouped по-прежнему отдает список секций и листает по skip"""
+    for amount in (10, 20, 30):
+        create_transaction(authorized_client, amount, transaction_date=f"2020-02-{amount // 10:02d}T10:00:00")
+
+    response = authorized_client.get("/api/v1/transactions/grouped", params={"skip": 1, "limit": 1})
+
+    assert response.status_code == 200
+    sections = response.json()
+    assert [(section["title"], [item["amount"] for item in section["data"]]) for section in sections] == [
+        ("February 2020", [20])
+    ]
+
+
+def test_grouped_this_month_ignores_other_years(db, test_user, run_in_session):
+    """Тест того, что "This Month" не включает тот же месяц прошлых лет"""
+    for transaction_date in (datetime(2024, 3, 2, 10), datetime(2023, 3, 20, 10)):
+        db.add(Transaction(user_id=test_user.id, amount=10.0, transaction_type=CategoryTypeEnum.EXPENSE,
+                           transaction_date=transaction_date))
+    db.commit()
+
+    sections, next_cursor = run_in_session(lambda session: TransactionService.get_transactions_grouped(
+        test_user.id, 100, None, session, today=date(2024, 3, 25)
+    ))
+
+    assert [section["key"] for section in sections] == ["this_month", "2023-03"]
+    assert next_cursor is None
+
+
+def create_category(client, name, category_type="expense"):
+    response = client.post("/api/v1/categories/", json={
+        "name": name, "icon": "tag", "color": "#123456", "category_type": category_type
+    })
+    assert response.status_code == 201
+    return response.json()["id"]
+
+
+def test_batch_create(authorized_client):
+    """Пакет проверяет категории одним запросом и вставляется одним INSERT"""
+    food = create_category(authorized_client, "Food")
+    salary = create_category(authorized_client, "Salary", "income")
+    items = [
+        {"amount": 10 + i, "transaction_type": "expense", "category_id": food,
+         "transaction_date": f"2024-03-{i + 1:02d}T10:00:00"}
+        for i in range(20)
+    ] + [{"amount": 500, "transaction_type": "income", "category_id": salary,
+          "transaction_date": "2024-03-25T10:00:00"}]
+
+    response, statements = capture_statements(
+        lambda: authorized_client.post("/api/v1/transactions/batch", json={"transactions": items})
+    )
+
+    assert response.status_code == 201
+    data = response.json()
+    assert data["created"] == 21
+    assert data["failed"] == 0
+    assert [result["index"] for result in data["results"]] == list(range(21))
+    assert data["results"][0]["transaction"]["amount"] == 10
+    assert data["results"][0]["transaction"]["id"] is not None
+    assert data["results"][0]["transaction"]["created_at"] is not None
+    # id из RETURNING сопоставлены своим элементам
+    for result in data["results"]:
+        stored = authorized_client.get(f"/api/v1/transactions/{result['transaction']['id']}").json()
+        assert stored["amount"] == result["transaction"]["amount"]
+
+    assert sum(statement.startswith("SELECT budget_categories.id") for statement in statements) == 1
+    assert sum(statement.startswith("INSERT INTO transactions") for statement in statements) == 1
+
+    balance = authorized_client.get("/api/v1/transactions/balance").json()
+    assert balance["total_expense"] == sum(10 + i for i in range(20))
+    assert balance["total_income"] == 500
+    assert balance["transaction_count"] == 21
+
+
+def test_batch_atomic_rejects_whole_batch(authorized_client):
+    """В режиме atomic ошибка в одном элементе отменяет весь пакет"""
+    items = [
+        {"amount": 10, "transaction_type": "expense", "transaction_date": "2024-03-15T10:00:00"},
+        {"amount": 20, "transaction_type": "expense", "category_id": 999999,
+         "transaction_date": "2024-03-15T10:00:00"},
+    ]
+
+    response = authorized_client.post("/api/v1/transactions/batch", json={"transactions": items})
+
+    assert response.status_code == 400
+    assert response.json()["detail"]["errors"] == [{"index": 1, "error": "Category not found"}]
+    assert authorized_client.get("/api/v1/transactions/").json()["transactions"] == []
+
+
+def test_batch_partial_creates_valid_items(authorized_client):
+    """В режиме partial создаются корректные элементы, остальные возвращаются с ошибкой"""
+    salary = create_category(authorized_client, "Salary", "income")
+    items = [
+        {"amount": 10, "transaction_type": "expense", "transaction_date": "2024-03-15T10:00:00"},
+        {"amount": 20, "transaction_type": "expense", "category_id": 999999,
+         "transaction_date": "2024-03-15T10:00:00"},
+        {"amount": 30, "transaction_type": "expense", "category_id": salary,
+         "transaction_date": "2024-03-15T10:00:00"},
+    ]
+
+    response = authorized_client.post("/api/v1/transactions/batch",
+                                      json={"transactions": items, "mode": "partial"})
+
+    assert response.status_code == 201
+    data = response.json()
+    assert data["created"] == 1
+    assert data["failed"] == 2
+    assert [result["status"] for result in data["results"]] == ["created", "failed", "failed"]
+    assert data["results"][1]["error"] == "Category not found"
+    assert data["results"][2]["error"].startswith("Cannot use")
+
+    balance = authorized_client.get("/api/v1/transactions/balance").json()
+    assert balance["total_expense"] == 10
+    assert balance["transaction_count"] == 1
+
+
+def test_batch_size_limits(authorized_client):
+    """Пустой пакет и пакет больше MAX_BATCH_SIZE отклоняются проверкой схемы"""
+    item = {"amount": 10, "transaction_type": "expense", "transaction_date": "2024-03-15T10:00:00"}
+
+    assert authorized_client.post("/api/v1/transactions/batch",
+                                  json={"transactions": []}).status_code == 422
+    assert authorized_client.post("/api/v1/transactions/batch",
+                                  json={"transactions": [item] * (MAX_BATCH_SIZE + 1)}).status_code == 422
+
+
+def test_bulk_update_recategorizes_by_filters(authorized_client):
+    """Перенос транзакций категории A за период в категорию B одним UPDATE"""
+    category_a = create_category(authorized_client, "Food")
+    category_b = create_category(authorized_client, "Groceries")
+    in_march = [create_transaction(authorized_client, amount, category_id=category_a,
+                                   transaction_date=f"2024-03-{day:02d}T10:00:00")
+                for amount, day in ((10, 5), (20, 25))]
+    in_april = create_transaction(authorized_client, 30, category_id=category_a,
+                                  transaction_date="2024-04-02T10:00:00")
+    balance_before = authorized_client.get("/api/v1/transactions/balance").json()
+
+    response, statements = capture_statements(lambda: authorized_client.post(
+        "/api/v1/transactions/bulk-update",
+        json={
+            "filters": {"category_ids": [category_a], "start_date": "2024-03-01", "end_date": "2024-03-31"},
+            "changes": {"category_id": category_b}
+        }
+    ))
+
+    assert response.status_code == 200
+    assert response.json() == {"affected": 2}
+    assert sum(statement.startswith("UPDATE transactions") for statement in statements) == 1
+
+    for transaction in in_march:
+        stored = authorized_client.get(f"/api/v1/transactions/{transaction['id']}").json()
+        assert stored["category_id"] == category_b
+        assert stored["updated_at"] is not None
+    assert authorized_client.get(f"/api/v1/transactions/{in_april['id']}").json()["category_id"] == category_a
+
+    # Сумма и тип не менялись — баланс прежний
+    balance_after = authorized_client.get("/api/v1/transactions/balance").json()
+    assert balance_after["total_expense"] == balance_before["total_expense"]
+
+
+def test_bulk_update_rejects_category_of_other_type(authorized_client):
+    """Категория должна подходить по типу всем выбранным транзакциям"""
+    salary = create_category(authorized_client, "Salary", "income")
+    expense = create_transaction(authorized_client, 10)
+
+    response = authorized_client.post("/api/v1/transactions/bulk-update", json={
+        "ids": [expense["id"]], "changes": {"category_id": salary}
+    })
+
+    assert response.status_code == 400
+    assert authorized_client.get(f"/api/v1/transactions/{expense['id']}").json()["category_id"] is None
+
+
+def test_bulk_delete_by_ids_updates_balance(authorized_client):
+    """Массовое удаление по id возвращает число удаленных строк и уменьшает баланс"""
+    kept = create_transaction(authorized_client, 100, "income")
+    removed = [create_transaction(authorized_client, amount) for amount in (10, 20)]
+    removed.append(create_transaction(authorized_client, 50, "income"))
+
+    response = authorized_client.post("/api/v1/transactions/bulk-delete", json={
+        # Несуществующий id не учитывается в количестве
+        "ids": [transaction["id"] for transaction in removed] + [999999]
+    })
+
+    assert response.status_code == 200
+    assert response.json() == {"affected": 3}
+    remaining = authorized_client.get("/api/v1/transactions/").json()["transactions"]
+    assert [transaction["id"] for transaction in remaining] == [kept["id"]]
+
+    balance = authorized_client.get("/api/v1/transactions/balance").json()
+    assert balance["total_income"] == 100
+    assert balance["total_expense"] == 0
+    assert balance["transaction_count"] == 1
+
+
+def test_bulk_delete_by_filters(authorized_client):
+    """Удаление по фильтру затрагивает только подходящие транзакции"""
+    create_transaction(authorized_client, 10, transaction_date="2024-01-10T10:00:00")
+    create_transaction(authorized_client, 20, transaction_date="2024-02-10T10:00:00")
+    create_transaction(authorized_client, 30, "income", transaction_date="2024-01-15T10:00:00")
+
+    response = authorized_client.post("/api/v1/transactions/bulk-delete", json={
+        "filters": {"transaction_type": "expense", "end_date": "2024-01-31"}
+    })
+
+    assert response.json() == {"affected": 1}
+    balance = authorized_client.get("/api/v1/transactions/balance").json()
+    assert balance["total_expense"] == 20
+    assert balance["total_income"] == 30
+
+
+def test_bulk_selection_must_not_be_empty(authorized_client):
+    """Без id и фильтров массовая операция отклоняется"""
+    create_transaction(authorized_client, 10)
+
+    assert authorized_client.post("/api/v1/transactions/bulk-delete", json={}).status_code == 422
+    assert authorized_client.post("/api/v1/transactions/bulk-delete",
+                                  json={"filters": {}}).status_code == 422
+    assert authorized_client.post("/api/v1/transactions/bulk-delete",
+                                  json={"filters": {"category_ids": []}}).status_code == 422
+    assert authorized_client.post("/api/v1/transactions/bulk-update", json={
+        "filters": {"category_ids": []}, "changes": {"description": "Renamed"}
+    }).status_code == 422
+    assert len(authorized_client.get("/api/v1/transactions/").json()["transactions"]) == 1